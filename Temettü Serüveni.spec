@@ -4,6 +4,16 @@ from PyInstaller.utils.hooks import collect_all
 datas = [('logo.ico', '.'), ('logo.png', '.')]
 binaries = []
 hiddenimports = []
+
+# Sayfalar utils.lazy_loader ile importlib üzerinden (string adla) yüklenir;
+# statik analiz bunları göremediği için kayıttaki modüller açıkça eklenir
+import sys
+sys.path.insert(0, SPECPATH)
+from utils.lazy_loader import PAGE_REGISTRY
+hiddenimports += sorted({module for module, _ in PAGE_REGISTRY.values()})
+# Gecikmeli oluşturulan servisler (LazyService)
+hiddenimports += ['api_service', 'integration_manager']
+
 tmp_ret = collect_all('customtkinter')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 
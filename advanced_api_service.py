@@ -6,10 +6,166 @@ Gelişmiş API servisleri - TEFAS, Kripto, Emtia, Monte Carlo
 import requests
 import yfinance as yf
 import numpy as np
+import pandas as pd
 import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
 import json
 
+# Monte Carlo motoru ayarları
+MC_CHUNK_MAX_ELEMENTS = 4_000_000       # Parça başına en fazla eleman (~32 MB float64)
+MC_PARALLEL_MIN_ELEMENTS = 20_000_000   # Bu boyutun altında süreç havuzu açmaya değmez
+MC_BAND_MAX_PATHS = 20_000              # Günlük bantlar için saklanan en fazla yol
+MC_PORTFOLIO_BAND_PATHS = 5_000         # Çok varlıklı simülasyonda tam yolu üretilen örnek
+MC_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def _simulate_gbm_chunk(current_value, mu, sigma, days, n_paths, seed, keep_paths):
+    """
+    Monte Carlo yollarının bir parçasını üret (süreç havuzunda da çalışır)
+    
+    Args:
+        current_value: Başlangıç değeri
+        mu: Günlük ortalama getiri (oran)
+        sigma: Günlük standart sapma (oran)
+        days: Simülasyon günü
+        n_paths: Bu parçadaki yol sayısı
+        seed: numpy SeedSequence
+        keep_paths: Günlük bantlar için döndürülecek yol sayısı
+    
+    Returns:
+        tuple: (bitiş değerleri, saklanan yollar veya None)
+    """
+    rng = np.random.default_rng(seed)
+    paths = rng.normal(mu, sigma, size=(n_paths, days))
+    paths += 1.0
+    np.cumprod(paths, axis=1, out=paths)
+    paths *= current_value
+    
+    terminal = paths[:, -1].copy()
+    kept = paths[:keep_paths].astype(np.float32) if keep_paths else None
+    return terminal, kept
+
+
+def _simulate_portfolio_chunk(values, mu, chol, days, n_paths, seed, keep_paths):
+    """
+    Korelasyonlu çok varlıklı yolların bir parçasını üret
+    
+    Args:
+        values: (N,) varlıkların güncel değerleri
+        mu: (N,) günlük ortalama log getiriler
+        chol: (N, N) kovaryans matrisinin Cholesky çarpanı
+        days: Simülasyon günü
+        n_paths: Bu parçadaki yol sayısı
+        seed: numpy SeedSequence
+        keep_paths: Günlük bantlar için döndürülecek yol sayısı
+    
+    Returns:
+        tuple: ((n_paths, N) varlık bitiş değerleri, saklanan portföy yolları veya None)
+    """
+    rng = np.random.default_rng(seed)
+    n_assets = len(values)
+    chol32 = chol.T.astype(np.float32)
+    
+    # Bant örneği: (yol, gün, varlık) standart normal -> korelasyonlu günlük log getiriler
+    kept = None
+    horizon_log = np.empty((n_paths, n_assets))
+    if keep_paths:
+        shocks = rng.standard_normal((keep_paths, days, n_assets), dtype=np.float32)
+        log_returns = shocks @ chol32
+        log_returns += mu.astype(np.float32)
+        np.cumsum(log_returns, axis=1, out=log_returns)
+        horizon_log[:keep_paths] = log_returns[:, -1, :]
+        kept = np.exp(log_returns) @ values.astype(np.float32)
+    
+    # Diğer yollar: sabit parametreli Gauss günlük getirilerin toplamı yine
+    # Gauss'tur, vade sonu log getirisi doğrudan (tam dağılımla) çekilir
+    rest = n_paths - keep_paths
+    if rest:
+        shocks = rng.standard_normal((rest, n_assets))
+        horizon_log[keep_paths:] = np.sqrt(days) * (shocks @ chol.T) + days * mu
+    
+    return values * np.exp(horizon_log), kept
+
+
+def _run_monte_carlo_chunks(worker, jobs, store, workers=1, min_parallel_elements=0,
+                            progress_callback=None, cancel_event=None):
+    """
+    Simülasyon parçalarını sırayla veya süreç havuzunda çalıştır
+    
+    Args:
+        worker: Parça fonksiyonu (modül seviyesinde, pickle edilebilir)
+        jobs: Parça argümanları listesi
+        store: store(index, sonuç) - sonucu yerine yazar
+        workers: Süreç sayısı (1 = aynı süreçte çalış)
+        min_parallel_elements: Havuz için gereken toplam eleman sayısı
+        progress_callback: İlerleme fonksiyonu (0-1 arası oran alır)
+        cancel_event: threading.Event - set edilirse durur
+    
+    Returns:
+        bool: Tüm parçalar tamamlandıysa True, iptal edildiyse False
+    """
+    use_pool = workers and workers > 1 and len(jobs) > 1 and min_parallel_elements >= MC_PARALLEL_MIN_ELEMENTS
+    
+    if use_pool:
+        # Dondurulmuş (PyInstaller) sürümde çocuk süreçler için main.py'de
+        # multiprocessing.freeze_support() çağrılır
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(jobs)))
+        try:
+            futures = {pool.submit(worker, *job): i for i, job in enumerate(jobs)}
+            for done, future in enumerate(as_completed(futures), 1):
+                if cancel_event is not None and cancel_event.is_set():
+                    return False
+                store(futures[future], future.result())
+                if progress_callback:
+                    progress_callback(done / len(jobs))
+        finally:
+            # İptal/hata durumunda çalışan parçaları beklemeden bekleyenleri iptal et
+            pool.shutdown(wait=False, cancel_futures=True)
+        return True
+    
+    for i, job in enumerate(jobs):
+        if cancel_event is not None and cancel_event.is_set():
+            return False
+        store(i, worker(*job))
+        if progress_callback:
+            progress_callback((i + 1) / len(jobs))
+    return True
+
+
+def _plan_chunks(simulations, elements_per_path, seed, band_paths=MC_BAND_MAX_PATHS):
+    """
+    Simülasyonu bellek sınırlı parçalara böl
+    
+    Returns:
+        tuple: (parça boyutları, parça tohumları, başlangıç ofsetleri, bant için saklanacak yol sayıları)
+    """
+    chunk_size = max(1, min(simulations, MC_CHUNK_MAX_ELEMENTS // max(elements_per_path, 1)))
+    sizes = [chunk_size] * (simulations // chunk_size)
+    if simulations % chunk_size:
+        sizes.append(simulations % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(int)
+    
+    # Günlük bantlar ilk band_paths yoldan hesaplanır (yollar i.i.d.)
+    keeps = []
+    remaining = min(simulations, band_paths)
+    for size in sizes:
+        keeps.append(min(size, remaining))
+        remaining -= keeps[-1]
+    
+    return sizes, seeds, offsets, keeps
+
+
+def _percentile_bands(band_paths, start_value):
+    """Günlük persentil bantları (0. gün = başlangıç değeri)"""
+    band_values = np.percentile(band_paths, MC_PERCENTILES, axis=0)
+    return {
+        p: np.concatenate(([start_value], band_values[i]))
+        for i, p in enumerate(MC_PERCENTILES)
+    }
+
+
 class TEFASService:
     """TEFAS (Türkiye Elektronik Fon Bilgi Sistemi) entegrasyonu"""
     
@@ -192,48 +348,79 @@ class AdvancedAnalysisService:
     """Gelişmiş analiz servisi - Monte Carlo, Hedef Analizi, Vergi Optimizasyonu"""
     
     @staticmethod
-    def monte_carlo_simulation(current_value, daily_return, std_dev, days=252, simulations=10000):
+    def monte_carlo_simulation(current_value, daily_return, std_dev, days=252, simulations=10000,
+                               seed=None, workers=1, progress_callback=None, cancel_event=None):
         """
         Monte Carlo Simülasyonu
         
+        Yollar bellek sınırlı parçalar halinde vektörel olarak üretilir; büyük
+        simülasyonlarda parçalar süreç havuzuna dağıtılabilir.
+        
         Args:
             current_value: Güncel portföy değeri
             daily_return: Günlük ortalama getiri (%)
             std_dev: Günlük standart sapma (%)
             days: Simülasyon günü
             simulations: Simülasyon sayısı
+            seed: Tekrarlanabilir sonuçlar için tohum (opsiyonel)
+            workers: Süreç sayısı (1 = aynı süreçte çalış)
+            progress_callback: İlerleme fonksiyonu (0-1 arası oran alır)
+            cancel_event: threading.Event - set edilirse simülasyon durur
         
         Returns:
-            dict: Simülasyon sonuçları
+            dict: Simülasyon sonuçları (iptal veya hata durumunda None)
         """
         try:
-            daily_return = daily_return / 100
-            std_dev = std_dev / 100
+            mu = daily_return / 100
+            sigma = std_dev / 100
+            days = max(int(days), 1)
+            simulations = max(int(simulations), 1)
             
-            # Simülasyon için rastgele yollar oluştur
-            results = np.zeros(simulations)
+            sizes, seeds, offsets, keeps = _plan_chunks(simulations, days, seed)
+            band_offsets = np.concatenate(([0], np.cumsum(keeps)[:-1])).astype(int)
             
-            for i in range(simulations):
-                value = current_value
-                for _ in range(days):
-                    # Geometrik Brownian Motion
-                    daily_change = np.random.normal(daily_return, std_dev)
-                    value = value * (1 + daily_change)
-                
-                results[i] = value
+            terminal = np.empty(simulations)
+            band_paths = np.empty((sum(keeps), days), dtype=np.float32)
+            
+            def store(index, result):
+                values, kept = result
+                start = offsets[index]
+                terminal[start:start + sizes[index]] = values
+                if kept is not None:
+                    band_start = band_offsets[index]
+                    band_paths[band_start:band_start + keeps[index]] = kept
+            
+            jobs = [
+                (current_value, mu, sigma, days, size, chunk_seed, keep)
+                for size, chunk_seed, keep in zip(sizes, seeds, keeps)
+            ]
+            completed = _run_monte_carlo_chunks(
+                _simulate_gbm_chunk, jobs, store,
+                workers=workers,
+                min_parallel_elements=simulations * days,
+                progress_callback=progress_callback,
+                cancel_event=cancel_event
+            )
+            if not completed:
+                return None
+            
+            bands = _percentile_bands(band_paths, current_value)
+            horizon = np.percentile(terminal, [5, 25, 75, 95])
             
             # İstatistikler
             return {
                 'baslanc_degeri': current_value,
-                'ortalama_bitis': np.mean(results),
-                'medyan_bitis': np.median(results),
-                'min_degeri': np.min(results),
-                'max_degeri': np.max(results),
-                'percentil_5': np.percentile(results, 5),
-                'percentil_25': np.percentile(results, 25),
-                'percentil_75': np.percentile(results, 75),
-                'percentil_95': np.percentile(results, 95),
-                'std_sapma': np.std(results),
+                'ortalama_bitis': np.mean(terminal),
+                'medyan_bitis': np.median(terminal),
+                'min_degeri': np.min(terminal),
+                'max_degeri': np.max(terminal),
+                'percentil_5': horizon[0],
+                'percentil_25': horizon[1],
+                'percentil_75': horizon[2],
+                'percentil_95': horizon[3],
+                'std_sapma': np.std(terminal),
+                'kayip_olasiligi': float(np.mean(terminal < current_value) * 100),
+                'gunluk_bantlar': bands,
                 'simulasyon_sayisi': simulations,
                 'gün': days
             }
@@ -241,6 +428,211 @@ class AdvancedAnalysisService:
             print(f"❌ Monte Carlo hatası: {e}")
             return None
     
+    @staticmethod
+    def monte_carlo_simulation_async(current_value, daily_return, std_dev, days=252, simulations=10000,
+                                     callback=None, progress_callback=None, cancel_event=None,
+                                     seed=None, workers=1):
+        """
+        Monte Carlo simülasyonunu arka plan thread'inde çalıştır
+        
+        Args:
+            callback: Sonuç dict'i (veya None) ile çağrılır
+            progress_callback: İlerleme oranı (0-1) ile çağrılır
+            (diğer parametreler monte_carlo_simulation ile aynı)
+        
+        Returns:
+            threading.Thread: Başlatılan worker thread
+        """
+        def run():
+            result = AdvancedAnalysisService.monte_carlo_simulation(
+                current_value, daily_return, std_dev, days, simulations,
+                seed=seed,
+                workers=workers,
+                progress_callback=progress_callback,
+                cancel_event=cancel_event
+            )
+            if callback:
+                callback(result)
+        
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+        return worker
+    
+    @staticmethod
+    def estimate_return_model(returns, min_periods=20):
+        """
+        Günlük log getirilerden ortalama vektörü ve Cholesky çarpanını tahmin et
+        
+        Kovaryans ikili (pairwise) gözlemlerle hesaplanır; yeni listelenen
+        hisseler diğerlerinin geçmişini kısaltmaz. Sonuç pozitif yarı-tanımlı
+        olacak şekilde özdeğerlerden düzeltilir.
+        
+        Args:
+            returns: (T, N) günlük log getiriler (NaN = veri yok)
+            min_periods: İkili kovaryans için en az ortak gözlem
+        
+        Returns:
+            tuple: ((N,) ortalama, (N, N) Cholesky çarpanı)
+        """
+        frame = pd.DataFrame(returns)
+        mu = frame.mean().fillna(0.0).to_numpy()
+        
+        cov = frame.cov(min_periods=min_periods).to_numpy()
+        variances = frame.var().fillna(0.0).to_numpy()
+        cov = np.where(np.isnan(cov), 0.0, cov)
+        np.fill_diagonal(cov, variances)
+        
+        # İkili kovaryans PSD olmayabilir - negatif özdeğerleri kırp
+        eigenvalues, eigenvectors = np.linalg.eigh((cov + cov.T) / 2)
+        eigenvalues = np.clip(eigenvalues, 1e-12, None)
+        cov = (eigenvectors * eigenvalues) @ eigenvectors.T
+        
+        return mu, np.linalg.cholesky(cov)
+    
+    @staticmethod
+    def portfolio_monte_carlo(symbols, values, returns, days=252, simulations=50000,
+                              tail_percentile=5, static_value=0.0, seed=None, workers=1,
+                              progress_callback=None, cancel_event=None):
+        """
+        Çok varlıklı (korelasyonlu) Monte Carlo Simülasyonu
+        
+        Her varlık, geçmiş getirilerden tahmin edilen kovaryansla Cholesky
+        üzerinden korelasyonlu olarak simüle edilir.
+        
+        Args:
+            symbols: Varlık sembolleri (N)
+            values: (N,) varlıkların güncel değerleri
+            returns: (T, N) günlük log getiriler (örn. PriceMatrix.returns)
+            days: Simülasyon günü
+            simulations: Simülasyon sayısı
+            tail_percentile: Kuyruk kaybı eşiği (%)
+            static_value: Simülasyona girmeyen (geçmişi olmayan) varlıkların değeri
+            seed: Tekrarlanabilir sonuçlar için tohum (opsiyonel)
+            workers: Süreç sayısı (1 = aynı süreçte çalış)
+            progress_callback: İlerleme fonksiyonu (0-1 arası oran alır)
+            cancel_event: threading.Event - set edilirse simülasyon durur
+        
+        Returns:
+            dict: Simülasyon sonuçları (iptal veya hata durumunda None)
+        """
+        try:
+            values = np.asarray(values, dtype=float)
+            days = max(int(days), 1)
+            simulations = max(int(simulations), 1)
+            n_assets = len(values)
+            
+            mu, chol = AdvancedAnalysisService.estimate_return_model(returns)
+            
+            sizes, seeds, offsets, keeps = _plan_chunks(
+                simulations, days * n_assets, seed, band_paths=MC_PORTFOLIO_BAND_PATHS
+            )
+            band_offsets = np.concatenate(([0], np.cumsum(keeps)[:-1])).astype(int)
+            
+            asset_terminal = np.empty((simulations, n_assets))
+            band_paths = np.empty((sum(keeps), days), dtype=np.float32)
+            
+            def store(index, result):
+                terminal, kept = result
+                start = offsets[index]
+                asset_terminal[start:start + sizes[index]] = terminal
+                if kept is not None:
+                    band_start = band_offsets[index]
+                    band_paths[band_start:band_start + keeps[index]] = kept
+            
+            jobs = [
+                (values, mu, chol, days, size, chunk_seed, keep)
+                for size, chunk_seed, keep in zip(sizes, seeds, keeps)
+            ]
+            completed = _run_monte_carlo_chunks(
+                _simulate_portfolio_chunk, jobs, store,
+                workers=workers,
+                min_parallel_elements=(sum(keeps) * days + simulations) * n_assets,
+                progress_callback=progress_callback,
+                cancel_event=cancel_event
+            )
+            if not completed:
+                return None
+            
+            start_value = values.sum() + static_value
+            terminal = asset_terminal.sum(axis=1) + static_value
+            bands = _percentile_bands(band_paths + static_value, start_value)
+            horizon = np.percentile(terminal, [5, 25, 75, 95])
+            
+            # Kuyruk kaybına katkı: eşik altındaki yollarda varlık bazlı ortalama kayıp
+            threshold = np.percentile(terminal, tail_percentile)
+            tail = terminal <= threshold
+            asset_losses = values - asset_terminal[tail]
+            contributions = asset_losses.mean(axis=0)
+            tail_loss = start_value - terminal[tail].mean()
+            
+            katkilar = sorted(
+                (
+                    {
+                        'sembol': symbol,
+                        'deger': float(values[i]),
+                        'kuyruk_kaybi': float(contributions[i]),
+                        'katki_yuzde': float(contributions[i] / tail_loss * 100) if tail_loss else 0.0
+                    }
+                    for i, symbol in enumerate(symbols)
+                ),
+                key=lambda item: item['kuyruk_kaybi'],
+                reverse=True
+            )
+            
+            # İstatistikler
+            return {
+                'baslanc_degeri': start_value,
+                'ortalama_bitis': np.mean(terminal),
+                'medyan_bitis': np.median(terminal),
+                'min_degeri': np.min(terminal),
+                'max_degeri': np.max(terminal),
+                'percentil_5': horizon[0],
+                'percentil_25': horizon[1],
+                'percentil_75': horizon[2],
+                'percentil_95': horizon[3],
+                'std_sapma': np.std(terminal),
+                'kayip_olasiligi': float(np.mean(terminal < start_value) * 100),
+                'kuyruk_esigi': tail_percentile,
+                'var': float(start_value - threshold),
+                'cvar': float(tail_loss),
+                'varlik_katkilari': katkilar,
+                'gunluk_bantlar': bands,
+                'simulasyon_sayisi': simulations,
+                'varlik_sayisi': n_assets,
+                'gün': days
+            }
+        except Exception as e:
+            print(f"❌ Portföy Monte Carlo hatası: {e}")
+            return None
+    
+    @staticmethod
+    def portfolio_monte_carlo_async(symbols, values, returns, days=252, simulations=50000,
+                                    callback=None, progress_callback=None, cancel_event=None, **kwargs):
+        """
+        Çok varlıklı Monte Carlo simülasyonunu arka plan thread'inde çalıştır
+        
+        Args:
+            callback: Sonuç dict'i (veya None) ile çağrılır
+            progress_callback: İlerleme oranı (0-1) ile çağrılır
+            (diğer parametreler portfolio_monte_carlo ile aynı)
+        
+        Returns:
+            threading.Thread: Başlatılan worker thread
+        """
+        def run():
+            result = AdvancedAnalysisService.portfolio_monte_carlo(
+                symbols, values, returns, days, simulations,
+                progress_callback=progress_callback,
+                cancel_event=cancel_event,
+                **kwargs
+            )
+            if callback:
+                callback(result)
+        
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+        return worker
+    
     @staticmethod
     def goal_projection(current_value, monthly_investment, annual_return, years):
         """
@@ -7,6 +7,7 @@ Desteklenen: isyatirimhisse (ana), yfinance (yedek)
 import threading
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List, Callable, Any, Tuple
 from dataclasses import dataclass
@@ -17,6 +18,13 @@ from functools import lru_cache
 from pathlib import Path
 import json
 import pickle
+import sqlite3
+from collections import OrderedDict, defaultdict
+
+from utils.market_calendar import BistCalendar
+
+# BIST işlem takvimi (seans/tatil kontrolleri)
+_market_calendar = BistCalendar()
 
 # Logging
 logging.basicConfig(level=logging.INFO)
@@ -68,84 +76,207 @@ except ImportError:
 CACHE_TIMEOUT = 300  # 5 dakika
 CACHE_DIR = Path.home() / ".bist_api_cache"
 CACHE_DIR.mkdir(exist_ok=True)
+CACHE_MAX_MEMORY_ENTRIES = 512            # Bellekte tutulacak en fazla kayıt
+CACHE_DISK_MAX_BYTES = 200 * 1024 * 1024  # Disk cache üst sınırı (200 MB)
 
 # İstek ayarları
 MAX_RETRIES = 3
 RETRY_DELAY = 2
 MIN_REQUEST_INTERVAL = 0.5  # İstekler arası minimum süre
 
+# Toplu fiyat motoru ayarları
+QUOTE_MAX_WORKERS = 8        # Toplu indirme başarısız olursa paralel istek sayısı
+QUOTE_BATCH_PERIOD = "5d"    # Hafta sonu/tatil için son kapanışı yakalayacak pencere
+
 # Varsayılan değerler
 DEFAULT_DAYS = 30
 TRADING_DAYS_PER_YEAR = 252
 
+# Geçmiş fiyat deposu
+HISTORY_DB_FILE = CACHE_DIR / "price_history.db"
+MARKET_CLOSE_HOUR = 18  # Bu saatten sonra çekilen günlük bar kesinleşmiş sayılır
+CLOSE_COLUMNS = ['HISSE_KAPANIS', 'Close', 'close', 'Kapanış']
+
 
 # ============================================================================
 # CACHE MANAGER
 # ============================================================================
 
+class DiskCache:
+    """
+    Anahtar bazlı SQLite disk cache'i
+    
+    Her kayıt ayrı bir satırda tutulur; yazma sadece ilgili anahtarı
+    günceller. Toplam boyut sınırı aşılınca en uzun süredir erişilmeyen
+    kayıtlar silinir (LRU).
+    """
+    
+    def __init__(self, db_path: Path, max_bytes: int):
+        self._db_path = db_path
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        ''')
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed_at)")
+        self._conn.commit()
+    
+    def get(self, key: str, max_age: float) -> Optional[Tuple[Any, datetime]]:
+        """Anahtarı diskten oku (süresi geçmişse None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            blob, created_at = row
+            now = time.time()
+            if now - created_at > max_age:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        
+        return pickle.loads(blob), datetime.fromtimestamp(created_at)
+    
+    def set(self, key: str, value: Any, timestamp: datetime) -> None:
+        """Tek anahtarı diske yaz ve gerekirse LRU temizliği yap"""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, accessed_at, size) VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(blob), timestamp.timestamp(), now, len(blob))
+            )
+            self._evict()
+            self._conn.commit()
+    
+    def _evict(self) -> None:
+        """Boyut sınırı aşıldıysa en eski erişilen kayıtları sil"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self._max_bytes:
+            return
+        
+        excess = total - self._max_bytes
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM cache ORDER BY accessed_at ASC"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+    
+    def delete_pattern(self, pattern: str) -> None:
+        """Pattern içeren anahtarları sil"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE instr(key, ?) > 0", (pattern,))
+            self._conn.commit()
+    
+    def clear(self) -> None:
+        """Tüm disk cache'ini sil"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+
 class CacheManager:
-    """Thread-safe cache yöneticisi"""
+    """Thread-safe cache yöneticisi (bellek LRU + SQLite disk katmanı)"""
     
     def __init__(self, timeout: int = CACHE_TIMEOUT):
-        self._cache: Dict[str, Tuple[Any, datetime]] = {}
+        self._cache: "OrderedDict[str, Tuple[Any, datetime]]" = OrderedDict()
         self._lock = threading.RLock()
         self._timeout = timeout
+        self._max_memory_entries = CACHE_MAX_MEMORY_ENTRIES
         
         # Request timeout ayarları - İYİLEŞTİRİLDİ
         self._connect_timeout = 10  # Bağlantı timeout
         self._read_timeout = 30     # Okuma timeout
         
-        # Disk cache
-        self._disk_cache_file = CACHE_DIR / "cache.pkl"
-        self._load_disk_cache()
-    
-    def _load_disk_cache(self):
-        """Disk cache'i yükle"""
+        # Disk cache - kayıtlar ilk erişimde tembel olarak yüklenir
+        self._disk: Optional[DiskCache] = None
         try:
-            if self._disk_cache_file.exists():
-                with open(self._disk_cache_file, 'rb') as f:
-                    disk_cache = pickle.load(f)
-                    # Sadece geçerli olanları yükle
-                    now = datetime.now()
-                    for key, (value, timestamp) in disk_cache.items():
-                        if (now - timestamp).seconds < self._timeout:
-                            self._cache[key] = (value, timestamp)
+            self._disk = DiskCache(CACHE_DIR / "cache.db", CACHE_DISK_MAX_BYTES)
         except Exception as e:
-            logger.debug(f"Disk cache yükleme hatası: {e}")
+            logger.debug(f"Disk cache açılamadı: {e}")
+        
+        # Eski tek-dosya pickle cache'i artık kullanılmıyor
+        legacy_file = CACHE_DIR / "cache.pkl"
+        if legacy_file.exists():
+            try:
+                legacy_file.unlink()
+            except OSError:
+                pass
     
-    def _save_disk_cache(self):
-        """Cache'i diske kaydet"""
-        try:
-            with open(self._disk_cache_file, 'wb') as f:
-                pickle.dump(self._cache, f)
-        except Exception as e:
-            logger.debug(f"Disk cache kaydetme hatası: {e}")
+    def _is_expired(self, timestamp: datetime) -> bool:
+        return (datetime.now() - timestamp).total_seconds() > self._timeout
+    
+    def _remember(self, key: str, value: Any, timestamp: datetime) -> None:
+        """Bellek katmanına yaz, sınır aşıldıysa en eskiyi at"""
+        self._cache[key] = (value, timestamp)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._max_memory_entries:
+            self._cache.popitem(last=False)
     
     def get(self, key: str) -> Optional[Any]:
         """Cache'den veri al"""
         with self._lock:
-            if key not in self._cache:
-                return None
-            
-            data, timestamp = self._cache[key]
-            if (datetime.now() - timestamp).seconds > self._timeout:
-                del self._cache[key]
-                return None
-            
-            return data
+            entry = self._cache.get(key)
+            if entry is not None:
+                data, timestamp = entry
+                if self._is_expired(timestamp):
+                    del self._cache[key]
+                    return None
+                self._cache.move_to_end(key)
+                return data
+        
+        if self._disk is None:
+            return None
+        
+        try:
+            disk_entry = self._disk.get(key, self._timeout)
+        except Exception as e:
+            logger.debug(f"Disk cache okuma hatası: {e}")
+            return None
+        
+        if disk_entry is None:
+            return None
+        
+        data, timestamp = disk_entry
+        with self._lock:
+            self._remember(key, data, timestamp)
+        return data
     
     def set(self, key: str, value: Any) -> None:
         """Cache'e veri kaydet"""
+        timestamp = datetime.now()
         with self._lock:
-            self._cache[key] = (value, datetime.now())
-            self._save_disk_cache()
+            self._remember(key, value, timestamp)
+        
+        if self._disk is not None:
+            try:
+                self._disk.set(key, value, timestamp)
+            except Exception as e:
+                logger.debug(f"Disk cache kaydetme hatası: {e}")
     
     def clear(self) -> None:
         """Cache'i temizle"""
         with self._lock:
             self._cache.clear()
-            if self._disk_cache_file.exists():
-                self._disk_cache_file.unlink()
+        if self._disk is not None:
+            self._disk.clear()
     
     def remove_pattern(self, pattern: str) -> None:
         """Pattern'e uyan anahtarları sil"""
@@ -153,12 +284,254 @@ class CacheManager:
             keys_to_remove = [k for k in self._cache.keys() if pattern in k]
             for key in keys_to_remove:
                 del self._cache[key]
+        if self._disk is not None:
+            self._disk.delete_pattern(pattern)
 
 
 # Global cache
 _cache = CacheManager()
 
 
+# ============================================================================
+# PRICE HISTORY STORE
+# ============================================================================
+
+class PriceHistoryStore:
+    """
+    Sembol bazlı kalıcı günlük OHLCV deposu
+    
+    Kapanmış işlem günleri değişmediği için bir kez yazılan barlar bir daha
+    sağlayıcıdan istenmez. Her sembol için hangi tarih aralığının çekildiği
+    `price_history_meta` tablosunda tutulur; böylece farklı pencere
+    istekleri (30/90/365 gün) aynı depodan karşılanır.
+    """
+    
+    def __init__(self, db_path: Path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS price_history (
+                symbol TEXT NOT NULL,
+                date TEXT NOT NULL,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL NOT NULL,
+                volume REAL,
+                PRIMARY KEY (symbol, date)
+            ) WITHOUT ROWID
+        ''')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS price_history_meta (
+                symbol TEXT PRIMARY KEY,
+                first_date TEXT NOT NULL,
+                last_date TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        ''')
+        self._conn.commit()
+    
+    def get_coverage(self, symbol: str) -> Optional[Tuple[datetime, datetime, datetime]]:
+        """
+        Sembol için çekilmiş aralık
+        
+        Returns:
+            (first_date, last_date, fetched_at) veya None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT first_date, last_date, fetched_at FROM price_history_meta WHERE symbol = ?",
+                (symbol,)
+            ).fetchone()
+        
+        if row is None:
+            return None
+        
+        return (
+            datetime.strptime(row[0], '%Y-%m-%d'),
+            datetime.strptime(row[1], '%Y-%m-%d'),
+            datetime.fromtimestamp(row[2])
+        )
+    
+    def read(self, symbol: str, start_date: datetime) -> pd.DataFrame:
+        """Başlangıç tarihinden itibaren barları DataFrame olarak oku"""
+        with self._lock:
+            rows = self._conn.execute(
+                '''
+                SELECT date, open, high, low, close, volume FROM price_history
+                WHERE symbol = ? AND date >= ?
+                ORDER BY date ASC
+                ''',
+                (symbol, start_date.strftime('%Y-%m-%d'))
+            ).fetchall()
+        
+        df = pd.DataFrame(rows, columns=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
+        df[['Open', 'High', 'Low', 'Close', 'Volume']] = df[['Open', 'High', 'Low', 'Close', 'Volume']].astype(float)
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.pop('Date')), name='Date')
+        return df
+    
+    def write(
+        self,
+        symbol: str,
+        bars: Optional[pd.DataFrame],
+        covered_start: datetime,
+        covered_end: datetime
+    ) -> None:
+        """
+        Barları upsert et ve kapsanan aralığı genişlet
+        
+        Sağlayıcıdan veri gelmediyse yalnızca deneme zamanı güncellenir,
+        kapsama genişletilmez (bir sonraki istekte tekrar denenir). Kapsamın
+        sonu istenen bitiş değil yazılan son bardır: bugünün barı yanıtta
+        yoksa o gün kayıtlı sayılmaz ve sonraki istekte tekrar çekilir.
+        """
+        now = time.time()
+        if bars is not None and not bars.empty:
+            covered_end = min(covered_end, bars.index.max().to_pydatetime())
+        with self._lock:
+            if bars is None or bars.empty:
+                self._conn.execute(
+                    "UPDATE price_history_meta SET fetched_at = ? WHERE symbol = ?",
+                    (now, symbol)
+                )
+                self._conn.commit()
+                return
+            
+            self._conn.executemany(
+                '''
+                INSERT OR REPLACE INTO price_history
+                (symbol, date, open, high, low, close, volume)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''',
+                [
+                    (symbol, idx.strftime('%Y-%m-%d'),
+                     _nullable(row.Open), _nullable(row.High), _nullable(row.Low),
+                     float(row.Close), _nullable(row.Volume))
+                    for idx, row in zip(bars.index, bars.itertuples(index=False))
+                ]
+            )
+            self._conn.execute(
+                '''
+                INSERT INTO price_history_meta (symbol, first_date, last_date, fetched_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(symbol) DO UPDATE SET
+                    first_date = MIN(first_date, excluded.first_date),
+                    last_date = MAX(last_date, excluded.last_date),
+                    fetched_at = excluded.fetched_at
+                ''',
+                (symbol, covered_start.strftime('%Y-%m-%d'), covered_end.strftime('%Y-%m-%d'), now)
+            )
+            self._conn.commit()
+
+
+def _nullable(value: Any) -> Optional[float]:
+    """NaN değerleri NULL olarak yaz"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if np.isnan(value) else value
+
+
+def _has_weekday(start: datetime, end: datetime) -> bool:
+    """Aralıkta en az bir hafta içi gün var mı?"""
+    if start.date() > end.date():
+        return False
+    if (end.date() - start.date()).days >= 2:
+        return True
+    day = start
+    while day.date() <= end.date():
+        if day.weekday() < 5:
+            return True
+        day += timedelta(days=1)
+    return False
+
+
+def normalize_ohlcv(data: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """
+    Sağlayıcı çıktısını ortak Open/High/Low/Close/Volume formatına çevir
+    
+    Args:
+        data: İş Yatırım veya yfinance DataFrame'i
+        
+    Returns:
+        Normalize edilmiş DataFrame veya None
+    """
+    if data is None or data.empty:
+        return None
+    
+    close_col = next((col for col in CLOSE_COLUMNS if col in data.columns), None)
+    if close_col is None:
+        return None
+    
+    index = data.index if isinstance(data.index, pd.DatetimeIndex) else pd.to_datetime(data.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    
+    def _column(*names):
+        for name in names:
+            if name in data.columns:
+                return pd.to_numeric(data[name], errors='coerce').values
+        return np.full(len(data), np.nan)
+    
+    df = pd.DataFrame({
+        'Open': _column('Open', 'open'),
+        'High': _column('High', 'high'),
+        'Low': _column('Low', 'low'),
+        'Close': pd.to_numeric(data[close_col], errors='coerce').values,
+        'Volume': _column('Volume', 'volume'),
+    }, index=index.normalize())
+    
+    df = df[~df.index.duplicated(keep='last')].dropna(subset=['Close'])
+    return df if not df.empty else None
+
+
+def last_closes(data: Optional[pd.DataFrame], tickers: Dict[str, str]) -> Dict[str, float]:
+    """
+    yf.download çıktısından her ticker'ın son geçerli kapanışı
+    
+    group_by="ticker" ile tek ticker için de MultiIndex sütun dönebilir;
+    düz sütunlu çıktı yalnızca tek ticker istendiğinde kabul edilir.
+    
+    Args:
+        data: yf.download DataFrame'i
+        tickers: {yfinance ticker: sonuç anahtarı}
+        
+    Returns:
+        {sonuç anahtarı: fiyat} (fiyatı olmayan veya sıfır olanlar hariç)
+    """
+    prices: Dict[str, float] = {}
+    if data is None or data.empty:
+        return prices
+    
+    for ticker_symbol, key in tickers.items():
+        try:
+            if isinstance(data.columns, pd.MultiIndex):
+                if ticker_symbol not in data.columns.get_level_values(0):
+                    continue
+                close = data[ticker_symbol]['Close']
+            elif len(tickers) == 1 and 'Close' in data.columns:
+                close = data['Close']
+            else:
+                continue
+            
+            close = close.dropna()
+            if not close.empty:
+                price = float(close.iloc[-1])
+                if price > 0:
+                    prices[key] = price
+        except Exception as e:
+            logger.debug(f"Kapanış fiyatı ayrıştırma hatası ({key}): {e}")
+    
+    return prices
+
+
+# Global geçmiş fiyat deposu
+_history_store = PriceHistoryStore(HISTORY_DB_FILE)
+
+
 # ============================================================================
 # API SERVICE CLASS
 # ============================================================================
@@ -175,6 +548,7 @@ class APIService:
         """API Service başlat"""
         self.cache = _cache
         self.cache_timeout = CACHE_TIMEOUT
+        self.history_store = _history_store
         self.cache_lock = threading.Lock()
         
         # İş Yatırım StockData
@@ -383,53 +757,141 @@ class APIService:
         """
         Tek hisse için geçmiş veriler
         
+        Veriler kalıcı geçmiş deposundan okunur; sağlayıcıdan yalnızca
+        depoda olmayan aralıklar (genelde son kayıtlı günden sonrası) istenir.
+        
         Args:
             symbol: Hisse sembolü
             days: Gün sayısı
             
         Returns:
-            DataFrame veya None
+            Open/High/Low/Close/Volume DataFrame'i veya None
         """
-        cache_key = f"hist_{symbol}_{days}"
-        cached = self.cache.get(cache_key)
-        if cached is not None:
-            return cached
+        clean_symbol = self._format_symbol_for_isyatirim(symbol)
+        start_date = datetime.now() - timedelta(days=days + 10)  # Buffer
         
-        # İş Yatırım'dan dene
+        try:
+            self._fill_history_gaps([clean_symbol], start_date)
+            data = self.history_store.read(clean_symbol, start_date)
+        except Exception as e:
+            logger.error(f"Geçmiş veri hatası ({symbol}): {e}")
+            return None
+        
+        if data.empty:
+            return None
+        
+        return data.tail(days)
+    
+    def _missing_history_ranges(
+        self,
+        clean_symbol: str,
+        start_date: datetime,
+        today: datetime
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Depoda eksik olan tarih aralıkları
+        
+        Returns:
+            [(başlangıç, bitiş), ...] listesi
+        """
+        start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        coverage = self.history_store.get_coverage(clean_symbol)
+        
+        if coverage is None:
+            return [(start_date, today)] if _has_weekday(start_date, today) else []
+        
+        first_date, last_date, fetched_at = coverage
+        ranges = []
+        
+        # Daha eski veri isteniyorsa geriye doğru doldur
+        if start_date < first_date:
+            backfill_end = first_date - timedelta(days=1)
+            if _has_weekday(start_date, backfill_end):
+                ranges.append((start_date, backfill_end))
+        
+        # Son kayıtlı gün kapanıştan sonra çekildiyse kesinleşmiştir
+        session_closed = fetched_at >= last_date.replace(hour=MARKET_CLOSE_HOUR)
+        forward_start = last_date + timedelta(days=1) if session_closed else last_date
+        recently_fetched = (datetime.now() - fetched_at).total_seconds() < CACHE_TIMEOUT
+        
+        if not recently_fetched and _has_weekday(forward_start, today):
+            ranges.append((forward_start, today))
+        
+        return ranges
+    
+    def _fill_history_gaps(self, clean_symbols: List[str], start_date: datetime) -> None:
+        """Eksik aralıkları sağlayıcıdan çekip depoya yaz (aynı aralıklar toplu çekilir)"""
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        
+        pending: Dict[Tuple[datetime, datetime], List[str]] = defaultdict(list)
+        for clean_symbol in clean_symbols:
+            for date_range in self._missing_history_ranges(clean_symbol, start_date, today):
+                pending[date_range].append(clean_symbol)
+        
+        for (range_start, range_end), symbols in pending.items():
+            fetched = self._fetch_history_range(symbols, range_start, range_end)
+            for clean_symbol in symbols:
+                self.history_store.write(clean_symbol, fetched.get(clean_symbol), range_start, range_end)
+    
+    def _fetch_history_range(
+        self,
+        clean_symbols: List[str],
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Sağlayıcılardan belirli tarih aralığındaki barları çek
+        
+        Returns:
+            {clean_symbol: normalize DataFrame} sözlüğü
+        """
+        results: Dict[str, pd.DataFrame] = {}
+        
+        # İş Yatırım (çoklu sembol tek istekte)
         if self.is_available:
             try:
-                end_date = datetime.now()
-                start_date = end_date - timedelta(days=days + 10)  # Buffer
-                
-                data = self._get_stock_data_isyatirim(symbol, start_date, end_date)
-                
-                # DataFrame kontrolü düzeltmesi
-                if data is not None and not data.empty:
-                    # Son N günü al
-                    data = data.tail(days)
-                    self.cache.set(cache_key, data)
-                    return data
+                if len(clean_symbols) == 1:
+                    data = normalize_ohlcv(
+                        self._get_stock_data_isyatirim(clean_symbols[0], start_date, end_date)
+                    )
+                    if data is not None:
+                        results[clean_symbols[0]] = data
+                else:
+                    def _fetch():
+                        return self._stock_data.get_data(
+                            symbols=clean_symbols,
+                            start_date=start_date.strftime('%d-%m-%Y'),
+                            end_date=end_date.strftime('%d-%m-%Y')
+                        )
+                    
+                    with self._lock:
+                        data = self._safe_request(_fetch)
+                    
+                    if data is not None and not data.empty and 'HISSE_KODU' in data.columns:
+                        for clean_symbol in clean_symbols:
+                            symbol_data = normalize_ohlcv(data[data['HISSE_KODU'] == clean_symbol])
+                            if symbol_data is not None:
+                                results[clean_symbol] = symbol_data
             except Exception as e:
                 logger.debug(f"İş Yatırım geçmiş veri hatası: {e}")
         
         # yfinance fallback
         if self.use_yfinance_fallback:
-            try:
-                clean_symbol = self._format_symbol_for_isyatirim(symbol)
-                ticker_symbol = f"{clean_symbol}.IS"
-                
-                ticker = yf.Ticker(ticker_symbol)
-                data = ticker.history(period=f"{days}d")
-                
-                # DataFrame kontrolü düzeltmesi
-                if data is not None and not data.empty:
-                    self.cache.set(cache_key, data)
-                    return data
-                    
-            except Exception as e:
-                logger.debug(f"yfinance history hatası ({symbol}): {e}")
+            for clean_symbol in clean_symbols:
+                if clean_symbol in results:
+                    continue
+                try:
+                    ticker = yf.Ticker(f"{clean_symbol}.IS")
+                    data = normalize_ohlcv(ticker.history(
+                        start=start_date.strftime('%Y-%m-%d'),
+                        end=(end_date + timedelta(days=1)).strftime('%Y-%m-%d')
+                    ))
+                    if data is not None:
+                        results[clean_symbol] = data
+                except Exception as e:
+                    logger.debug(f"yfinance history hatası ({clean_symbol}): {e}")
         
-        return None
+        return results
     
     def get_bist100_data(self, days: int = DEFAULT_DAYS) -> Optional[pd.DataFrame]:
         """
@@ -648,6 +1110,133 @@ class APIService:
         
         return results
     
+    def get_price_snapshot(
+        self,
+        symbols: List[str],
+        use_cache: bool = True
+    ) -> Dict[str, float]:
+        """
+        Ortak fiyat motoru - tüm semboller için tek seferde fiyat al
+        
+        Önce yfinance ile tek bir çoklu-ticker indirmesi denenir; bu
+        indirmede eksik kalan semboller sınırlı bir thread havuzunda
+        paralel çekilir. Son çare olarak İş Yatırım toplu sorgusu kullanılır.
+        
+        Args:
+            symbols: Hisse sembolleri listesi (tekrarlar tek sefer çekilir)
+            use_cache: False ise cache atlanır ve fiyatlar yeniden çekilir
+            
+        Returns:
+            {symbol: price} sözlüğü (fiyatı alınamayan semboller yer almaz)
+        """
+        # Orijinal sembol -> temiz sembol eşlemesi (tekrarsız)
+        symbol_map: Dict[str, str] = {}
+        for symbol in symbols:
+            if symbol:
+                symbol_map.setdefault(symbol, self._format_symbol_for_isyatirim(symbol))
+        
+        clean_symbols = list(dict.fromkeys(symbol_map.values()))
+        prices: Dict[str, float] = {}
+        
+        # Cache kontrolü
+        pending = []
+        for clean_symbol in clean_symbols:
+            cached = self.cache.get(f"price_{clean_symbol}") if use_cache else None
+            if cached is not None:
+                prices[clean_symbol] = cached
+            else:
+                pending.append(clean_symbol)
+        
+        fetched: Dict[str, float] = {}
+        
+        if pending and self.use_yfinance_fallback:
+            # 1) Tek çoklu-ticker indirmesi
+            fetched.update(self._download_quotes_batch(pending))
+            
+            # 2) Eksikler için sınırlı thread havuzu
+            missing = [s for s in pending if s not in fetched]
+            if missing:
+                fetched.update(self._fetch_quotes_parallel(missing))
+        
+        # 3) İş Yatırım toplu sorgusu (yfinance yoksa veya eksik kaldıysa)
+        missing = [s for s in pending if s not in fetched]
+        if missing and self.is_available:
+            for clean_symbol, price in self.get_multiple_prices(missing).items():
+                if price:
+                    fetched[clean_symbol] = price
+        
+        for clean_symbol, price in fetched.items():
+            self.cache.set(f"price_{clean_symbol}", price)
+        prices.update(fetched)
+        
+        return {
+            symbol: prices[clean_symbol]
+            for symbol, clean_symbol in symbol_map.items()
+            if clean_symbol in prices
+        }
+    
+    def _download_quotes_batch(self, clean_symbols: List[str]) -> Dict[str, float]:
+        """
+        yfinance ile tek istekte çoklu-ticker son kapanış fiyatları
+        
+        Args:
+            clean_symbols: Temizlenmiş semboller (THYAO, AKBNK, ...)
+            
+        Returns:
+            {clean_symbol: price} sözlüğü
+        """
+        tickers = {f"{s}.IS": s for s in clean_symbols}
+        prices: Dict[str, float] = {}
+        
+        def _fetch():
+            return yf.download(
+                tickers=list(tickers.keys()),
+                period=QUOTE_BATCH_PERIOD,
+                interval="1d",
+                group_by="ticker",
+                auto_adjust=False,
+                threads=True,
+                progress=False
+            )
+        
+        try:
+            prices = last_closes(self._safe_request(_fetch), tickers)
+        except Exception as e:
+            logger.error(f"Toplu fiyat indirme hatası: {e}")
+        
+        return prices
+    
+    def _fetch_quotes_parallel(self, clean_symbols: List[str]) -> Dict[str, float]:
+        """
+        Sembolleri sınırlı bir thread havuzunda tek tek çek
+        
+        Args:
+            clean_symbols: Temizlenmiş semboller
+            
+        Returns:
+            {clean_symbol: price} sözlüğü
+        """
+        def _fetch_one(clean_symbol: str) -> Optional[float]:
+            try:
+                hist = yf.Ticker(f"{clean_symbol}.IS").history(period="1d")
+                if hist is not None and not hist.empty:
+                    price = float(hist['Close'].iloc[-1])
+                    if price > 0:
+                        return price
+            except Exception as e:
+                logger.debug(f"yfinance hatası ({clean_symbol}): {e}")
+            return None
+        
+        prices: Dict[str, float] = {}
+        workers = max(1, min(QUOTE_MAX_WORKERS, len(clean_symbols)))
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for clean_symbol, price in zip(clean_symbols, executor.map(_fetch_one, clean_symbols)):
+                if price is not None:
+                    prices[clean_symbol] = price
+        
+        return prices
+    
     def get_multiple_historical_data(
         self, 
         symbols: List[str], 
@@ -656,6 +1245,9 @@ class APIService:
         """
         Birden fazla hisse için geçmiş veriler
         
+        Eksik aralıklar aynı tarih aralığına sahip semboller için tek
+        istekte çekilir; sonuçlar kalıcı geçmiş deposundan okunur.
+        
         Args:
             symbols: Hisse sembolleri listesi
             days: Gün sayısı
@@ -664,69 +1256,23 @@ class APIService:
             {symbol: DataFrame} sözlüğü
         """
         results = {}
+        symbol_map = {symbol: self._format_symbol_for_isyatirim(symbol) for symbol in symbols}
+        start_date = datetime.now() - timedelta(days=days + 10)
         
-        # Cache kontrolü
-        uncached = []
-        for symbol in symbols:
-            cache_key = f"hist_{symbol}_{days}"
-            cached = self.cache.get(cache_key)
-            if cached is not None:
-                results[symbol] = cached
-            else:
-                uncached.append(symbol)
-        
-        if not uncached:
-            return results
+        try:
+            self._fill_history_gaps(list(dict.fromkeys(symbol_map.values())), start_date)
+        except Exception as e:
+            logger.error(f"Çoklu geçmiş veri hatası: {e}")
         
-        # İş Yatırım'dan toplu çekmeyi dene
-        if self.is_available and uncached:
+        for symbol, clean_symbol in symbol_map.items():
             try:
-                clean_symbols = [self._format_symbol_for_isyatirim(s) for s in uncached]
-                
-                end_date = datetime.now()
-                start_date = end_date - timedelta(days=days + 10)
-                
-                def _fetch():
-                    return self._stock_data.get_data(
-                        symbols=clean_symbols,
-                        start_date=start_date.strftime('%d-%m-%Y'),
-                        end_date=end_date.strftime('%d-%m-%Y')
-                    )
-                
-                data = self._safe_request(_fetch)
-                
-                if data is not None and not data.empty:
-                    # Veri formatını kontrol et
-                    if 'HISSE_KODU' in data.columns:
-                        # Her sembol için ayır
-                        for i, symbol in enumerate(uncached):
-                            clean_symbol = clean_symbols[i]
-                            symbol_data = data[data['HISSE_KODU'] == clean_symbol].copy()
-                            
-                            if not symbol_data.empty:
-                                if not isinstance(symbol_data.index, pd.DatetimeIndex):
-                                    symbol_data.index = pd.to_datetime(symbol_data.index)
-                                symbol_data = symbol_data.tail(days)
-                                results[symbol] = symbol_data
-                                self.cache.set(f"hist_{symbol}_{days}", symbol_data)
-                    else:
-                        # Tek sembol verisi
-                        if len(uncached) == 1:
-                            if not isinstance(data.index, pd.DatetimeIndex):
-                                data.index = pd.to_datetime(data.index)
-                            data = data.tail(days)
-                            results[uncached[0]] = data
-                            self.cache.set(f"hist_{uncached[0]}_{days}", data)
-                
+                data = self.history_store.read(clean_symbol, start_date)
             except Exception as e:
-                logger.error(f"Çoklu geçmiş veri hatası: {e}")
-        
-        # Başarısız olanları tek tek çek
-        for symbol in uncached:
-            if symbol not in results:
-                hist_data = self.get_historical_data(symbol, days)
-                if hist_data is not None:
-                    results[symbol] = hist_data
+                logger.debug(f"Geçmiş depo okuma hatası ({symbol}): {e}")
+                continue
+            
+            if not data.empty:
+                results[symbol] = data.tail(days)
         
         return results
     
@@ -953,7 +1499,7 @@ class APIService:
     # UTILITY METHODS
     # ========================================================================
     
-    def update_all_prices(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+    def update_all_prices(self, symbols: List[str]) -> Dict[str, float]:
         """
         Tüm sembollerin fiyatlarını güncelle ve cache'i yenile
         
@@ -963,12 +1509,7 @@ class APIService:
         Returns:
             Güncel fiyatlar
         """
-        # Cache'i temizle
-        for symbol in symbols:
-            self.cache.remove_pattern(f"price_{symbol}")
-        
-        # Yeni fiyatları çek
-        return self.get_multiple_prices(symbols)
+        return self.get_price_snapshot(symbols, use_cache=False)
     
     def clear_cache(self) -> None:
         """Tüm cache'i temizle"""
@@ -976,33 +1517,16 @@ class APIService:
         logger.info("🗑️ Cache temizlendi")
     
     def is_market_open(self) -> bool:
-        """Borsa açık mı?"""
-        now = datetime.now()
-        weekday = now.weekday()
-        
-        # Hafta sonu değilse
-        if weekday < 5:  # Pazartesi-Cuma
-            current_time = now.time()
-            market_open = datetime.strptime("10:00", "%H:%M").time()
-            market_close = datetime.strptime("18:00", "%H:%M").time()
-            
-            return market_open <= current_time <= market_close
-        
-        return False
+        """Borsa açık mı? (BIST takvimi: hafta sonu, tatil ve yarım günler dahil)"""
+        return _market_calendar.is_open()
     
     def get_last_trading_day(self) -> datetime:
-        """Son işlem gününü döndür"""
-        today = datetime.now()
-        
-        # Eğer bugün hafta sonuysa veya saat 18:00'den sonraysa
-        if today.weekday() >= 5 or today.hour >= 18:
-            # Cuma'yı bul
-            days_since_friday = (today.weekday() - 4) % 7
-            if days_since_friday == 0 and today.hour < 18:
-                return today
-            return today - timedelta(days=days_since_friday if days_since_friday > 0 else 7)
-        
-        return today
+        """Son işlem gününü döndür (seans günü kapanıştan önce bugün sayılır)"""
+        now = datetime.now()
+        session = _market_calendar.session(now.date())
+        if session and now < session[1]:
+            return now
+        return datetime.combine(_market_calendar.last_trading_day(now), now.time())
     
     def get_provider_info(self) -> Dict[str, Any]:
         """Sağlayıcı bilgisi"""
@@ -0,0 +1,306 @@
+# async_integration.py
+"""
+Kripto, TEFAS ve emtia fiyatları için asyncio tabanlı entegrasyon katmanı
+
+Tüm istekler tek bir havuzlu HTTP istemcisinden geçer (bağlantılar ve TLS
+oturumları yeniden kullanılır), sunucu başına eşzamanlı istek sayısı
+sınırlanır ve sağlayıcının toplu uç noktası varsa (CoinGecko çoklu id
+sorgusu) tek istekte çok varlık çekilir. Tek giriş noktası:
+
+    await refresh_all_assets(db, user_id)
+
+aiohttp kuruluysa gerçek async istemci, değilse havuzlu requests.Session
+bir thread havuzunda kullanılır. Sağlayıcı adresleri AssetPriceFetcher'a
+parametre olarak verilebildiği için yerel bir sahte sunucuya karşı
+çalıştırılabilir.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+COINGECKO_URL = "https://api.coingecko.com/api/v3"
+TEFAS_URL = "https://api.tefas.com.tr/v1"
+
+HTTP_TIMEOUT = 10
+# Havuzdaki toplam bağlantı sayısı
+HTTP_POOL_SIZE = 10
+# Sunucu başına eşzamanlı istek sınırı (CoinGecko ücretsiz katmanı hız sınırlıdır)
+HOST_CONCURRENCY = {
+    "api.coingecko.com": 2,
+    "api.tefas.com.tr": 4,
+}
+DEFAULT_HOST_CONCURRENCY = 4
+# CoinGecko /simple/price tek istekte kabul edilen en fazla id
+COINGECKO_BATCH_SIZE = 250
+
+# Varlık sembolü -> CoinGecko id (listede yoksa sembolün küçük harfi kullanılır)
+COINGECKO_IDS = {
+    "BTC": "bitcoin",
+    "ETH": "ethereum",
+    "USDT": "tether",
+    "BNB": "binancecoin",
+    "SOL": "solana",
+    "XRP": "ripple",
+    "USDC": "usd-coin",
+    "ADA": "cardano",
+    "DOGE": "dogecoin",
+    "AVAX": "avalanche-2",
+    "TRX": "tron",
+    "DOT": "polkadot",
+    "LINK": "chainlink",
+    "MATIC": "matic-network",
+    "LTC": "litecoin",
+}
+
+
+class AsyncHttpClient:
+    """
+    Havuzlu, sunucu başına eşzamanlılığı sınırlı async HTTP istemcisi
+
+    async with AsyncHttpClient() as client:
+        data = await client.get_json(url, params)
+    """
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT, host_limits=None):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.host_limits = dict(HOST_CONCURRENCY, **(host_limits or {}))
+
+        self._semaphores = {}
+        self._session = None
+        self._executor = None
+
+    async def __aenter__(self):
+        if aiohttp is not None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        else:
+            # aiohttp yoksa: bağlantı havuzlu tek Session, istekler thread havuzunda
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+            self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="async-http")
+        return self
+
+    async def __aexit__(self, *exc):
+        if aiohttp is not None:
+            await self._session.close()
+        else:
+            self._executor.shutdown(wait=False)
+            self._session.close()
+        self._session = None
+
+    def _semaphore(self, url):
+        host = urlsplit(url).hostname or ""
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.host_limits.get(host, DEFAULT_HOST_CONCURRENCY))
+        return self._semaphores[host]
+
+    async def get_json(self, url, params=None):
+        """
+        GET isteği gönder ve JSON gövdeyi döndür
+
+        Returns:
+            Ayrıştırılmış JSON; HTTP 200 dışı yanıtlarda None
+        """
+        async with self._semaphore(url):
+            if aiohttp is not None:
+                async with self._session.get(url, params=params) as response:
+                    if response.status != 200:
+                        return None
+                    return await response.json(content_type=None)
+
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                self._executor,
+                lambda: self._session.get(url, params=params, timeout=self.timeout)
+            )
+            if response.status_code != 200:
+                return None
+            return response.json()
+
+
+class AssetPriceFetcher:
+    """Varlık türlerine göre toplu fiyat çekici"""
+
+    def __init__(self, client, coingecko_url=COINGECKO_URL, tefas_url=TEFAS_URL, commodities=None):
+        """
+        Args:
+            client: AsyncHttpClient (açık oturum)
+            coingecko_url: CoinGecko API kökü (test için yerel sunucu verilebilir)
+            tefas_url: TEFAS API kökü
+            commodities: {emtia kodu: yfinance sembolü}; verilmezse CommodityService tablosu
+        """
+        self.client = client
+        self.coingecko_url = coingecko_url.rstrip("/")
+        self.tefas_url = tefas_url.rstrip("/")
+        self.commodities = commodities
+
+    async def crypto_prices(self, symbols):
+        """
+        Kripto fiyatları (TRY) - CoinGecko çoklu id sorgusu ile
+
+        Returns:
+            {sembol: fiyat}
+        """
+        ids = {COINGECKO_IDS.get(symbol.upper(), symbol.lower()): symbol for symbol in symbols}
+        id_list = list(ids)
+        batches = [id_list[i:i + COINGECKO_BATCH_SIZE] for i in range(0, len(id_list), COINGECKO_BATCH_SIZE)]
+
+        async def fetch(batch):
+            return await self.client.get_json(
+                f"{self.coingecko_url}/simple/price",
+                {"ids": ",".join(batch), "vs_currencies": "try"}
+            )
+
+        prices = {}
+        for result in await asyncio.gather(*(fetch(b) for b in batches), return_exceptions=True):
+            if isinstance(result, Exception):
+                print(f"❌ Kripto fiyat çekme hatası: {result}")
+                continue
+            for coin_id, data in (result or {}).items():
+                if coin_id in ids and data.get("try") is not None:
+                    prices[ids[coin_id]] = float(data["try"])
+        return prices
+
+    async def fund_prices(self, codes):
+        """
+        Fon fiyatları - TEFAS toplu uç nokta sunmadığı için fon başına istek
+        (sunucu başına eşzamanlılık sınırı içinde paralel)
+
+        Returns:
+            {fon kodu: fiyat}
+        """
+        async def fetch(code):
+            data = await self.client.get_json(f"{self.tefas_url}/fund/{code}/price")
+            if not data:
+                return code, None
+            return code, data.get("fiyat") or data.get("price")
+
+        prices = {}
+        for result in await asyncio.gather(*(fetch(c) for c in codes), return_exceptions=True):
+            if isinstance(result, Exception):
+                print(f"❌ Fon fiyat çekme hatası: {result}")
+                continue
+            code, price = result
+            if price:
+                prices[code] = float(price)
+        return prices
+
+    async def commodity_prices(self, codes):
+        """
+        Emtia fiyatları (USD) - yfinance tek çoklu indirme ile, thread havuzunda
+
+        Returns:
+            {emtia kodu: fiyat}
+        """
+        commodities = self.commodities
+        if commodities is None:
+            from advanced_api_service import CommodityService
+            commodities = {code: info["symbol"] for code, info in CommodityService().commodities.items()}
+
+        tickers = {commodities[code]: code for code in codes if code in commodities}
+        if not tickers:
+            return {}
+
+        def download():
+            import yfinance as yf
+            from api_service import last_closes
+            data = yf.download(list(tickers), period="5d", progress=False, group_by="ticker", threads=True)
+            # Tek ticker'da da MultiIndex dönebilir; hisse toplu indirmesiyle aynı ayrıştırma
+            return last_closes(data, tickers)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, download)
+        except Exception as e:
+            print(f"❌ Emtia fiyat çekme hatası: {e}")
+            return {}
+
+
+async def refresh_all_assets(db, user_id, fetcher=None, asset_types=None, **fetcher_options):
+    """
+    Kullanıcının tüm kripto, fon ve emtia varlıklarının fiyatlarını yenile
+
+    Varlıklar bir kez okunur, türler paralel çekilir ve sonuç tek
+    transaction'da yazılır.
+
+    Args:
+        db: Database
+        user_id: Kullanıcı ID
+        fetcher: Hazır AssetPriceFetcher (verilmezse geçici istemci açılır)
+        asset_types: Sadece bu türleri yenile (örn. ('kripto',)); None ise hepsi
+        **fetcher_options: AssetPriceFetcher parametreleri (coingecko_url, tefas_url, ...)
+
+    Returns:
+        dict: {(sembol, tür): yeni fiyat}
+    """
+    assets = db.get_all_assets(user_id)
+    by_type = {}
+    for asset in assets:
+        if asset_types is None or asset["tur"] in asset_types:
+            by_type.setdefault(asset["tur"], []).append(asset["sembol"])
+
+    if not any(by_type.get(t) for t in ("kripto", "fon", "emtia")):
+        return {}
+
+    async def run(active_fetcher):
+        jobs = {
+            "kripto": active_fetcher.crypto_prices(by_type.get("kripto", [])) if by_type.get("kripto") else None,
+            "fon": active_fetcher.fund_prices(by_type.get("fon", [])) if by_type.get("fon") else None,
+            "emtia": active_fetcher.commodity_prices(by_type.get("emtia", [])) if by_type.get("emtia") else None,
+        }
+        jobs = {tur: job for tur, job in jobs.items() if job is not None}
+        results = await asyncio.gather(*jobs.values())
+        return {
+            (symbol, tur): price
+            for tur, prices in zip(jobs, results)
+            for symbol, price in prices.items()
+        }
+
+    if fetcher is not None:
+        updates = await run(fetcher)
+    else:
+        async with AsyncHttpClient() as client:
+            updates = await run(AssetPriceFetcher(client, **fetcher_options))
+
+    db.update_asset_prices(updates, user_id)
+    return updates
+
+
+def run_in_background(coro_factory, callback=None):
+    """
+    Coroutine'i kendi event loop'unda arka plan thread'inde çalıştır
+
+    Args:
+        coro_factory: () -> coroutine
+        callback: Sonuçla (hata durumunda None) çağrılacak fonksiyon
+
+    Returns:
+        threading.Thread
+    """
+    def run():
+        try:
+            result = asyncio.run(coro_factory())
+        except Exception as e:
+            print(f"❌ Async entegrasyon hatası: {e}")
+            result = None
+        if callback:
+            callback(result)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
@@ -4,95 +4,306 @@ Kimlik doğrulama ve JWT Token servisleri
 """
 
 import hashlib
+import hmac
 import jwt
 import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime, timedelta
 from database import Database
 
+# Doğrulanmış token önbelleği: en fazla kayıt ve kayıt ömrü (sn).
+# Ömür, başka süreçlerde (worker) yapılan iptallerin en geç ne kadar sonra
+# görüleceğini belirler; aynı süreçteki iptaller anında uygulanır.
+TOKEN_CACHE_SIZE = 4096
+TOKEN_CACHE_TTL = 60
+
+# PBKDF2 tur sayısı. Değiştirilirse eski hash'ler girişte yeni sayıyla yenilenir.
+PBKDF2_ITERATIONS = 100000
+# "salt$hash" biçimindeki eski kayıtların tur sayısı
+LEGACY_PBKDF2_ITERATIONS = 100000
+PASSWORD_HASH_PREFIX = "pbkdf2_sha256"
+# Hash hesaplayan havuzun boyutu; aynı anda en fazla bu kadar giriş CPU kullanır
+AUTH_WORKERS = 4
+
+_auth_executors = {}
+_auth_executors_lock = threading.Lock()
+
+
+def _pbkdf2(password: str, salt: str, iterations: int) -> str:
+    """PBKDF2-SHA256 hex özeti (süreç havuzunda çalışabilmesi için modül seviyesinde)"""
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations).hex()
+
+
+def get_auth_executor(kind: str = "thread"):
+    """
+    Paylaşılan hash havuzunu getir (ilk kullanımda oluşturulur)
+    
+    Args:
+        kind: "thread" (varsayılan; hashlib hesap sırasında GIL'i bırakır) veya
+            "process" (sunucuda CPU'yu tamamen ayırmak için)
+    """
+    with _auth_executors_lock:
+        executor = _auth_executors.get(kind)
+        if executor is None:
+            if kind == "process":
+                executor = ProcessPoolExecutor(max_workers=AUTH_WORKERS)
+            else:
+                executor = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix="auth")
+            _auth_executors[kind] = executor
+        return executor
+
+
+def _then(future: Future, fn) -> Future:
+    """
+    future tamamlanınca fn(sonuç) çalıştır ve sonucunu yeni bir Future olarak ver
+    
+    fn, future'ı tamamlayan thread'de çalışır; hata olursa yeni Future'a aktarılır.
+    """
+    chained = Future()
+    
+    def done(completed):
+        try:
+            chained.set_result(fn(completed.result()))
+        except Exception as e:
+            chained.set_exception(e)
+    
+    future.add_done_callback(done)
+    return chained
+
 class AuthService:
-    def __init__(self, db: Database, secret_key=None):
+    def __init__(self, db: Database, secret_key=None, iterations=PBKDF2_ITERATIONS, executor=None):
         self.db = db
         self.secret_key = secret_key or secrets.token_hex(32)
         self.algorithm = "HS256"
         self.token_expiry = 7  # 7 gün
+        self.iterations = iterations
+        self.executor = executor or get_auth_executor()
+        
+        # sha256(token) -> (user_id, jti, geçerlilik sonu - monotonic)
+        self._token_cache = OrderedDict()
+        self._token_cache_lock = threading.Lock()
+    
+    # ========== ŞİFRE HASH ==========
+    
+    def hash_password_async(self, password: str) -> Future:
+        """Şifreyi havuzda hash'le (PBKDF2); Future sonucu saklanacak hash metnidir"""
+        salt = secrets.token_hex(32)
+        iterations = self.iterations
+        return _then(
+            self.executor.submit(_pbkdf2, password, salt, iterations),
+            lambda digest: f"{PASSWORD_HASH_PREFIX}${iterations}${salt}${digest}"
+        )
+    
+    def verify_password_async(self, password: str, password_hash: str) -> Future:
+        """Şifreyi havuzda doğrula; Future sonucu bool"""
+        try:
+            iterations, salt, stored_hash = self._parse_hash(password_hash)
+        except ValueError:
+            future = Future()
+            future.set_result(False)
+            return future
+        
+        return _then(
+            self.executor.submit(_pbkdf2, password, salt, iterations),
+            lambda digest: hmac.compare_digest(digest, stored_hash)
+        )
     
     def hash_password(self, password: str) -> str:
         """Şifreyi hash'le (PBKDF2)"""
-        salt = secrets.token_hex(32)
-        pwd_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
-        return f"{salt}${pwd_hash.hex()}"
+        return self.hash_password_async(password).result()
     
     def verify_password(self, password: str, password_hash: str) -> bool:
         """Şifreyi doğrula"""
+        return self.verify_password_async(password, password_hash).result()
+    
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Hash güncel tur sayısıyla mı üretilmiş"""
         try:
-            salt, stored_hash = password_hash.split('$')
-            pwd_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
-            return pwd_hash.hex() == stored_hash
-        except:
+            return self._parse_hash(password_hash)[0] != self.iterations
+        except ValueError:
             return False
     
-    def register_user(self, username: str, email: str, password: str) -> dict:
-        """Yeni kullanıcı kaydı"""
+    @staticmethod
+    def _parse_hash(password_hash: str):
+        """
+        Saklanan hash'i çöz
+        
+        Returns:
+            tuple: (tur sayısı, salt, hex özet)
+        """
+        parts = password_hash.split('$')
+        if len(parts) == 4 and parts[0] == PASSWORD_HASH_PREFIX:
+            return int(parts[1]), parts[2], parts[3]
+        if len(parts) == 2:
+            return LEGACY_PBKDF2_ITERATIONS, parts[0], parts[1]
+        raise ValueError("Bilinmeyen şifre hash biçimi")
+    
+    def _rehash_in_background(self, user_id: int, password: str):
+        """Girişte doğrulanan şifreyi güncel tur sayısıyla yeniden hash'le ve kaydet"""
+        def store(new_hash):
+            with self.db.get_connection() as conn:
+                conn.execute(
+                    "UPDATE users SET password_hash = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                    (new_hash, user_id)
+                )
+        
+        def report(future):
+            if future.exception() is not None:
+                print(f"⚠️ Şifre yeniden hash hatası: {future.exception()}")
+        
+        _then(self.hash_password_async(password), store).add_done_callback(report)
+    
+    # ========== KAYIT / GİRİŞ ==========
+    
+    def register_user_async(self, username: str, email: str, password: str) -> Future:
+        """Yeni kullanıcı kaydı (hash havuzda); Future sonucu register_user ile aynı sözlük"""
         # Validasyon
+        error = None
         if len(username) < 3:
-            return {"success": False, "error": "Kullanıcı adı en az 3 karakter olmalı"}
-        if len(password) < 6:
-            return {"success": False, "error": "Şifre en az 6 karakter olmalı"}
-        if '@' not in email:
-            return {"success": False, "error": "Geçersiz email"}
-        
-        password_hash = self.hash_password(password)
-        user_id = self.db.create_user(username, email, password_hash)
-        
-        if user_id:
-            # Varsayılan ayarları yükle
-            from config import DEFAULT_SETTINGS
-            self.db.update_settings(DEFAULT_SETTINGS.copy(), user_id)
-            return {"success": True, "user_id": user_id, "message": "Kayıt başarılı"}
-        else:
-            return {"success": False, "error": "Bu kullanıcı adı veya email zaten kullanılıyor"}
+            error = "Kullanıcı adı en az 3 karakter olmalı"
+        elif len(password) < 6:
+            error = "Şifre en az 6 karakter olmalı"
+        elif '@' not in email:
+            error = "Geçersiz email"
+        if error:
+            future = Future()
+            future.set_result({"success": False, "error": error})
+            return future
+        
+        def create(password_hash):
+            user_id = self.db.create_user(username, email, password_hash)
+            
+            if user_id:
+                # Varsayılan ayarları yükle
+                from config import DEFAULT_SETTINGS
+                self.db.update_settings(DEFAULT_SETTINGS.copy(), user_id)
+                return {"success": True, "user_id": user_id, "message": "Kayıt başarılı"}
+            else:
+                return {"success": False, "error": "Bu kullanıcı adı veya email zaten kullanılıyor"}
+        
+        return _then(self.hash_password_async(password), create)
     
-    def login_user(self, username: str, password: str) -> dict:
-        """Kullanıcı girişi"""
+    def register_user(self, username: str, email: str, password: str) -> dict:
+        """Yeni kullanıcı kaydı"""
+        return self.register_user_async(username, email, password).result()
+    
+    def login_user_async(self, username: str, password: str) -> Future:
+        """
+        Kullanıcı girişi (şifre doğrulama havuzda); Future sonucu login_user ile aynı sözlük
+        
+        Şifre farklı bir tur sayısıyla saklanmışsa giriş sonrası arka planda yenilenir.
+        """
         user = self.db.get_user(username)
         
         if not user:
-            return {"success": False, "error": "Kullanıcı adı veya şifre yanlış"}
+            future = Future()
+            future.set_result({"success": False, "error": "Kullanıcı adı veya şifre yanlış"})
+            return future
         
-        if not self.verify_password(password, user['password_hash']):
-            return {"success": False, "error": "Kullanıcı adı veya şifre yanlış"}
-        
-        if not user['is_active']:
-            return {"success": False, "error": "Hesap deaktif edilmiş"}
+        def finish(is_valid):
+            if not is_valid:
+                return {"success": False, "error": "Kullanıcı adı veya şifre yanlış"}
+            
+            if not user['is_active']:
+                return {"success": False, "error": "Hesap deaktif edilmiş"}
+            
+            if self.needs_rehash(user['password_hash']):
+                self._rehash_in_background(user['id'], password)
+            
+            token = self.create_token(user['id'])
+            return {
+                "success": True,
+                "user_id": user['id'],
+                "username": user['username'],
+                "token": token,
+                "message": "Giriş başarılı"
+            }
         
-        token = self.create_token(user['id'])
-        return {
-            "success": True,
-            "user_id": user['id'],
-            "username": user['username'],
-            "token": token,
-            "message": "Giriş başarılı"
-        }
+        return _then(self.verify_password_async(password, user['password_hash']), finish)
+    
+    def login_user(self, username: str, password: str) -> dict:
+        """Kullanıcı girişi"""
+        return self.login_user_async(username, password).result()
+    
+    # ========== TOKEN ==========
     
     def create_token(self, user_id: int) -> str:
-        """JWT token oluştur"""
+        """JWT token oluştur ve oturum olarak kaydet (iptal edilebilir)"""
+        token_id = secrets.token_hex(16)
+        expires_at = datetime.utcnow() + timedelta(days=self.token_expiry)
         payload = {
             'user_id': user_id,
+            'jti': token_id,
             'iat': datetime.utcnow(),
-            'exp': datetime.utcnow() + timedelta(days=self.token_expiry)
+            'exp': expires_at
         }
         token = jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
+        self.db.create_session(user_id, token_id, expires_at)
         return token
     
     def verify_token(self, token: str) -> dict:
-        """Token doğrula"""
+        """
+        Token doğrula
+        
+        Başarılı doğrulamalar token özetiyle TOKEN_CACHE_TTL süresince (ve en
+        geç token'ın exp anına kadar) önbellekte tutulur; aynı token ile gelen
+        tekrar istekler imza kontrolü ve veritabanı sorgusu yapmaz.
+        """
+        digest = hashlib.sha256(token.encode()).digest()
+        now = time.monotonic()
+        
+        with self._token_cache_lock:
+            cached = self._token_cache.get(digest)
+            if cached is not None:
+                if cached[2] > now:
+                    self._token_cache.move_to_end(digest)
+                    return {"success": True, "user_id": cached[0]}
+                del self._token_cache[digest]
+        
         try:
             payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            return {"success": True, "user_id": payload['user_id']}
         except jwt.ExpiredSignatureError:
             return {"success": False, "error": "Token süresi dolmuş"}
         except jwt.InvalidTokenError:
             return {"success": False, "error": "Geçersiz token"}
+        
+        # jti içermeyen eski token'lar oturum tablosuna bağlı değildir
+        token_id = payload.get('jti')
+        if token_id is not None and not self.db.session_exists(token_id):
+            return {"success": False, "error": "Token iptal edilmiş"}
+        
+        valid_until = now + min(TOKEN_CACHE_TTL, payload['exp'] - time.time())
+        with self._token_cache_lock:
+            self._token_cache[digest] = (payload['user_id'], token_id, valid_until)
+            self._token_cache.move_to_end(digest)
+            while len(self._token_cache) > TOKEN_CACHE_SIZE:
+                self._token_cache.popitem(last=False)
+        
+        return {"success": True, "user_id": payload['user_id']}
+    
+    def revoke_token(self, token: str) -> bool:
+        """Tek bir token'ı iptal et (oturum kaydını sil, önbellekten çıkar)"""
+        try:
+            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm],
+                                 options={"verify_exp": False})
+        except jwt.InvalidTokenError:
+            return False
+        
+        if payload.get('jti') is not None:
+            self.db.delete_sessions(token_id=payload['jti'])
+        with self._token_cache_lock:
+            self._token_cache.pop(hashlib.sha256(token.encode()).digest(), None)
+        return True
+    
+    def invalidate_user_tokens(self, user_id: int):
+        """Kullanıcının tüm oturumlarını iptal et ve önbellekteki token'larını at"""
+        self.db.delete_sessions(user_id=user_id)
+        with self._token_cache_lock:
+            for digest in [d for d, entry in self._token_cache.items() if entry[0] == user_id]:
+                del self._token_cache[digest]
     
     def change_password(self, user_id: int, old_password: str, new_password: str) -> dict:
         """Şifre değiştir"""
@@ -113,9 +324,14 @@ class AuthService:
                 UPDATE users SET password_hash = ?, updated_at = CURRENT_TIMESTAMP 
                 WHERE id = ?
             ''', (new_hash, user_id))
-            conn.commit()
         
-        return {"success": True, "message": "Şifre başarıyla değiştirildi"}
+        # Eski şifreyle alınmış token'lar geçersiz; istemci yeni token ile devam eder
+        self.invalidate_user_tokens(user_id)
+        return {
+            "success": True,
+            "token": self.create_token(user_id),
+            "message": "Şifre başarıyla değiştirildi"
+        }
     
     def get_user_info(self, user_id: int) -> dict:
         """Kullanıcı bilgisi getir"""
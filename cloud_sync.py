@@ -4,11 +4,20 @@ Bulut Senkronizasyonu Modülü (Cloud Sync)
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import threading
+import uuid
 from datetime import datetime
 from database import Database
 
+# Tek istekte gönderilen/alınan en fazla değişiklik
+SYNC_BATCH_SIZE = 500
+# Sunucuya açık tutulan en fazla bağlantı (keep-alive havuzu)
+HTTP_POOL_SIZE = 4
+# /api/pull/transactions sayfa boyutu
+PULL_PAGE_SIZE = 2000
+
 class CloudSync:
     def __init__(self, db: Database, cloud_url="http://localhost:5000"):
         self.db = db
@@ -18,9 +27,20 @@ class CloudSync:
         self.token = None
         self.sync_interval = 300  # 5 dakika
         self.last_sync = None
+        
+        # Tek oturum: TCP/TLS bağlantıları istekler arasında yeniden kullanılır.
+        # requests gzip yanıtlarını kendisi açar (Accept-Encoding varsayılan olarak gönderilir).
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # (url, parametreler) -> (ETag, veri, ek başlıklar); 304 yanıtında önbellekten döner
+        self._pull_cache = {}
     
     def set_credentials(self, user_id: int, token: str, cloud_url: str = None):
         """Bulut senkronizasyon kimlik bilgilerini ayarla"""
+        if user_id != self.user_id:
+            self._pull_cache.clear()
         self.user_id = user_id
         self.token = token
         if cloud_url:
@@ -33,6 +53,7 @@ class CloudSync:
         self.enabled = False
         self.user_id = None
         self.token = None
+        self._pull_cache.clear()
         print("❌ Bulut senkronizasyonu devre dışı bırakıldı")
     
     def get_headers(self):
@@ -43,70 +64,178 @@ class CloudSync:
         }
     
     def sync_all_data(self):
-        """Tüm verileri senkronize et"""
+        """
+        Değişen verileri senkronize et (delta)
+        
+        Önce son gönderimden beri yerelde değişen satırlar gönderilir, ardından
+        son çekmeden beri sunucuda (başka cihazlarda) değişen satırlar alınır.
+        İlk senkronizasyonda sıra tersinedir: önce sunucudaki veri alınır,
+        sonra yalnızca sunucuda olmayan yerel satırlar gönderilir.
+        """
         if not self.enabled or not self.user_id or not self.token:
             return {"success": False, "error": "Senkronizasyon yapılandırılmamış"}
         
         try:
-            #print("\n☁️ Bulut senkronizasyonu başlıyor...")
+            device_id = self._get_device_id()
             
-            # Portföy
-            portfolio = self.db.get_portfolio(self.user_id)
-            result = self._sync_data("portfolio", portfolio)
-            if not result["success"]:
-                return result
+            if self.db.get_sync_state("push_seq", user_id=self.user_id) is None:
+                pulled_rows = {}
+                result = self._pull_changes(device_id, pulled_rows)
+                if not result["success"]:
+                    return result
+                pulled = result["count"]
+                
+                result = self._push_snapshot(device_id, pulled_rows)
+                if not result["success"]:
+                    return result
+                pushed = result["count"]
+            else:
+                result = self._push_changes(device_id)
+                if not result["success"]:
+                    return result
+                pushed = result["count"]
+                
+                result = self._pull_changes(device_id)
+                if not result["success"]:
+                    return result
+                pulled = result["count"]
             
-            # İşlemler
-            transactions = self.db.get_transactions(self.user_id)
-            result = self._sync_data("transactions", transactions)
+            self.last_sync = datetime.now()
+            return {
+                "success": True,
+                "message": f"{pushed} değişiklik gönderildi, {pulled} değişiklik alındı"
+            }
+        
+        except Exception as e:
+            print(f"❌ Senkronizasyon hatası: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def _get_device_id(self) -> str:
+        """Bu kurulumun kalıcı cihaz kimliği (kendi değişikliklerini geri çekmemek için)"""
+        device_id = self.db.get_sync_state("device_id", user_id=self.user_id)
+        if not device_id:
+            device_id = uuid.uuid4().hex
+            self.db.set_sync_state("device_id", device_id, user_id=self.user_id)
+        return device_id
+    
+    def _push_snapshot(self, device_id: str, pulled_rows: dict) -> dict:
+        """
+        İlk senkronizasyon: yerel satırları idempotent upsert olarak gönder
+        
+        Sunucudaki hiçbir satır silinmez. Az önce sunucudan alınan değeriyle
+        aynı olan satırlar tekrar gönderilmez (diğer cihazlara geri dönmesin).
+        
+        Args:
+            device_id: Bu cihazın kimliği
+            pulled_rows: {(tablo, anahtar): veri} - ilk çekmede uygulanan satırlar
+        """
+        current_seq = self.db.get_sync_seq(self.user_id)
+        changes = [
+            change for change in self.db.get_sync_snapshot(self.user_id)
+            if pulled_rows.get((change["tablo"], change["anahtar"])) != change["veri"]
+        ]
+        
+        for start in range(0, len(changes), SYNC_BATCH_SIZE):
+            result = self._post_changes(changes[start:start + SYNC_BATCH_SIZE], device_id)
             if not result["success"]:
                 return result
+        
+        self.db.set_sync_state("push_seq", current_seq, user_id=self.user_id)
+        return {"success": True, "count": len(changes)}
+    
+    def _push_changes(self, device_id: str) -> dict:
+        """Yerel değişiklikleri gönder ve gönderim yüksek su işaretini ilerlet"""
+        since = int(self.db.get_sync_state("push_seq", 0, user_id=self.user_id))
+        count = 0
+        while True:
+            batch = self.db.get_sync_changes(since, self.user_id, limit=SYNC_BATCH_SIZE)
+            if not batch["changes"]:
+                break
             
-            # Temettüler
-            dividends = self.db.get_dividends(self.user_id)
-            result = self._sync_data("dividends", dividends)
+            result = self._post_changes(batch["changes"], device_id)
             if not result["success"]:
                 return result
             
-            # Ayarlar
-            settings = self.db.get_settings(self.user_id)
-            result = self._sync_data("settings", settings)
-            if not result["success"]:
-                return result
+            count += len(batch["changes"])
+            since = batch["seq"]
+            self.db.set_sync_state("push_seq", since, user_id=self.user_id)
             
-            self.last_sync = datetime.now()
-            #print("✅ Bulut senkronizasyonu tamamlandı")
-            return {"success": True, "message": "Tüm veriler senkronize edildi"}
+            if not batch["has_more"]:
+                break
         
-        except Exception as e:
-            print(f"❌ Senkronizasyon hatası: {e}")
-            return {"success": False, "error": str(e)}
+        return {"success": True, "count": count}
     
-    def _sync_data(self, data_type: str, data: list) -> dict:
-        """Veri türünü senkronize et"""
+    def _post_changes(self, changes: list, device_id: str) -> dict:
+        """Bir değişiklik grubunu sunucuya gönder"""
         try:
-            url = f"{self.cloud_url}/api/sync/{data_type}"
+            url = f"{self.cloud_url}/api/sync/changes"
             payload = {
-                "user_id": self.user_id,
-                "data": data,
+                "device_id": device_id,
+                "changes": changes,
                 "timestamp": datetime.now().isoformat()
             }
             
-            response = requests.post(url, json=payload, headers=self.get_headers(), timeout=10)
+            response = self.session.post(url, json=payload, headers=self.get_headers(), timeout=30)
             
             if response.status_code in [200, 201]:
-                print(f"  ✅ {data_type}: {len(data)} öğe senkronize edildi")
                 return {"success": True}
-            else:
-                print(f"  ❌ {data_type} senkronizasyon hatası: {response.status_code}")
-                return {"success": False, "error": f"HTTP {response.status_code}"}
+            
+            print(f"  ❌ Değişiklik gönderme hatası: {response.status_code}")
+            return {"success": False, "error": f"HTTP {response.status_code}"}
+        
+        except Exception as e:
+            print(f"  ❌ Değişiklik gönderme hatası: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def _pull_changes(self, device_id: str, pulled_rows: dict = None) -> dict:
+        """
+        Sunucudaki yeni değişiklikleri al ve yerelde uygula
+        
+        Args:
+            device_id: Bu cihazın kimliği (kendi değişiklikleri geri gelmez)
+            pulled_rows: Verilirse uygulanan satırlar {(tablo, anahtar): veri} olarak eklenir
+        """
+        since = int(self.db.get_sync_state("pull_seq", 0, user_id=self.user_id))
+        count = 0
+        
+        try:
+            while True:
+                url = f"{self.cloud_url}/api/sync/changes"
+                params = {"since": since, "device_id": device_id, "limit": SYNC_BATCH_SIZE}
+                response = self.session.get(url, params=params, headers=self.get_headers(), timeout=30)
+                
+                if response.status_code != 200:
+                    print(f"  ❌ Değişiklik çekme hatası: {response.status_code}")
+                    return {"success": False, "error": f"HTTP {response.status_code}"}
+                
+                data = response.json()
+                changes = data.get("changes", [])
+                if changes:
+                    # Çekilen değişiklikler tekrar gönderilmesin diye yerel günlüğe yazılmaz
+                    self.db.apply_sync_changes(changes, self.user_id, record=False, update_positions=True)
+                    count += len(changes)
+                    if pulled_rows is not None:
+                        pulled_rows.update(((c.get("tablo"), c.get("anahtar")), c.get("veri")) for c in changes)
+                
+                since = data.get("seq", since)
+                self.db.set_sync_state("pull_seq", since, user_id=self.user_id)
+                
+                if not data.get("has_more"):
+                    break
+            
+            return {"success": True, "count": count}
         
         except Exception as e:
-            print(f"  ❌ {data_type} senkronizasyon hatası: {e}")
+            print(f"  ❌ Değişiklik çekme hatası: {e}")
             return {"success": False, "error": str(e)}
     
     def pull_data(self, data_type: str = "all") -> dict:
-        """Buluttan verileri çek"""
+        """
+        Buluttan verileri çek
+        
+        Sunucu veriyi değişmediyse 304 döner ve önbellekteki kopya kullanılır.
+        İşlemler cursor sayfalama ile parça parça alınır.
+        """
         if not self.enabled or not self.user_id or not self.token:
             return {"success": False, "error": "Senkronizasyon yapılandırılmamış"}
         
@@ -114,20 +243,54 @@ class CloudSync:
             print(f"\n☁️ {data_type} verileri buluttan çekiliyor...")
             
             url = f"{self.cloud_url}/api/pull/{data_type}"
-            response = requests.get(url, headers=self.get_headers(), timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                print(f"✅ {data_type} verileri başarıyla çekildi")
-                return {"success": True, "data": data}
+            if data_type == "transactions":
+                data = []
+                cursor = 0
+                while cursor is not None:
+                    page, headers = self._get_cached(url, {"cursor": cursor, "limit": PULL_PAGE_SIZE})
+                    data.extend(page)
+                    cursor = headers.get("X-Next-Cursor")
             else:
-                print(f"❌ Veri çekme hatası: {response.status_code}")
-                return {"success": False, "error": f"HTTP {response.status_code}"}
+                data, _ = self._get_cached(url)
+            
+            print(f"✅ {data_type} verileri başarıyla çekildi")
+            return {"success": True, "data": data}
         
+        except requests.HTTPError as e:
+            print(f"❌ Veri çekme hatası: {e.response.status_code}")
+            return {"success": False, "error": f"HTTP {e.response.status_code}"}
         except Exception as e:
             print(f"❌ Veri çekme hatası: {e}")
             return {"success": False, "error": str(e)}
     
+    def _get_cached(self, url: str, params: dict = None):
+        """
+        ETag/If-None-Match ile koşullu GET
+        
+        Returns:
+            tuple: (JSON veri, önbelleğe alınan ek başlıklar)
+        """
+        cache_key = (url, tuple(sorted((params or {}).items())))
+        cached = self._pull_cache.get(cache_key)
+        
+        headers = self.get_headers()
+        if cached:
+            headers["If-None-Match"] = cached[0]
+        
+        response = self.session.get(url, params=params, headers=headers, timeout=30)
+        if response.status_code == 304 and cached:
+            return cached[1], cached[2]
+        response.raise_for_status()
+        
+        data = response.json()
+        extra = {}
+        if "X-Next-Cursor" in response.headers:
+            extra["X-Next-Cursor"] = response.headers["X-Next-Cursor"]
+        etag = response.headers.get("ETag")
+        if etag:
+            self._pull_cache[cache_key] = (etag, data, extra)
+        return data, extra
+    
     def merge_data(self, cloud_data: dict, conflict_resolution: str = "cloud"):
         """Bulut verilerini yerel verilerle birleştir"""
         if conflict_resolution == "cloud":
@@ -171,7 +334,7 @@ class CloudSync:
         """Bulut bağlantısını test et"""
         try:
             url = f"{self.cloud_url}/api/health"
-            response = requests.get(url, timeout=5)
+            response = self.session.get(url, timeout=5)
             is_ok = response.status_code == 200
             status = "✅" if is_ok else "❌"
             print(f"{status} Bulut bağlantısı: {'başarılı' if is_ok else 'başarısız'}")
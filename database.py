@@ -6,10 +6,138 @@ import sqlite3
 import json
 import os
 import sys
+import threading
 from datetime import datetime
 from config import DEFAULT_SETTINGS
 from contextlib import contextmanager
 
+# Bağlantı başına önbelleğe alınan hazır ifade (prepared statement) sayısı
+CACHED_STATEMENTS = 256
+# Başka bir yazıcı kilit tutarken beklenecek süre (ms)
+BUSY_TIMEOUT_MS = 5000
+# Pozisyon defterinde kaç işlemde bir ara durum (checkpoint) saklanacağı
+POSITION_CHECKPOINT_INTERVAL = 50
+DEFAULT_COMMISSION_RATE = 0.0004
+# Akış (streaming) sorgularında tek seferde okunan satır sayısı
+STREAM_BATCH_SIZE = 500
+
+# Delta senkronizasyonuna katılan tablolar: satır anahtarı ve aktarılan sütunlar.
+# İşlem/temettü satırları cihazlar arası sabit bir sync_id ile tanımlanır.
+SYNC_TABLES = {
+    'transactions': {
+        'anahtar': 'sync_id',
+        'sutunlar': ('sync_id', 'sembol', 'tip', 'adet', 'fiyat', 'toplam', 'komisyon', 'tarih'),
+    },
+    'dividends': {
+        'anahtar': 'sync_id',
+        'sutunlar': ('sync_id', 'sembol', 'tutar', 'adet', 'hisse_basi_tutar', 'tarih'),
+    },
+    'portfolios': {
+        'anahtar': 'sembol',
+        'sutunlar': ('sembol', 'adet', 'ort_maliyet', 'guncel_fiyat'),
+    },
+    'settings': {
+        'anahtar': 'setting_key',
+        'sutunlar': ('setting_key', 'setting_value'),
+    },
+}
+
+
+def _sync_log_triggers(table, key, update_of=None, assign_sync_id=False):
+    """
+    Tablo değişikliklerini sync_log'a yazan trigger'ların SQL'i
+    
+    sync_log her satır anahtarı için tek kayıt tutar; her değişiklik kaydı
+    yeniden yazarak ona yeni, artan bir seq (satır sürümü) verir.
+    """
+    # INSERT OR REPLACE yerine DELETE + INSERT: dıştaki ifadenin ON CONFLICT
+    # kuralı trigger içindeki çakışma çözümünü geçersiz kılabilir
+    log = (
+        "DELETE FROM sync_log WHERE user_id = {user} AND tablo = '{table}' AND anahtar = {key}; "
+        "INSERT INTO sync_log (user_id, tablo, anahtar, islem) VALUES ({user}, '{table}', {key}, '{op}')"
+    )
+    columns = f" OF {', '.join(update_of)}" if update_of else ""
+    
+    if assign_sync_id:
+        insert_body = f"""
+            UPDATE {table} SET sync_id = lower(hex(randomblob(16))) WHERE id = NEW.id AND sync_id IS NULL;
+            DELETE FROM sync_log WHERE user_id = NEW.user_id AND tablo = '{table}'
+                AND anahtar = (SELECT sync_id FROM {table} WHERE id = NEW.id);
+            INSERT INTO sync_log (user_id, tablo, anahtar, islem)
+                SELECT NEW.user_id, '{table}', sync_id, 'upsert' FROM {table} WHERE id = NEW.id;"""
+    else:
+        insert_body = log.format(user="NEW.user_id", table=table, key=f"NEW.{key}", op="upsert") + ";"
+    
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_sync_insert AFTER INSERT ON {table}
+            BEGIN {insert_body} END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_sync_update AFTER UPDATE{columns} ON {table}
+            WHEN NEW.{key} IS NOT NULL
+            BEGIN {log.format(user="NEW.user_id", table=table, key=f"NEW.{key}", op="upsert")}; END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_sync_delete AFTER DELETE ON {table}
+            WHEN OLD.{key} IS NOT NULL
+            BEGIN {log.format(user="OLD.user_id", table=table, key=f"OLD.{key}", op="delete")}; END""",
+    ]
+
+
+# Şema geçişleri: (sürüm, açıklama, SQL ifadeleri). Her geçiş bir kez çalışır ve
+# sürüm PRAGMA user_version ile veritabanı dosyasında saklanır. Yeni geçişler
+# listenin sonuna artan sürüm numarasıyla eklenmelidir.
+SCHEMA_MIGRATIONS = [
+    (1, "İşlem, temettü ve varlık sorguları için index'ler", [
+        "CREATE INDEX IF NOT EXISTS idx_transactions_user_tarih ON transactions(user_id, tarih)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_user_sembol_tarih ON transactions(user_id, sembol, tarih)",
+        "CREATE INDEX IF NOT EXISTS idx_dividends_user_tarih ON dividends(user_id, tarih)",
+        "CREATE INDEX IF NOT EXISTS idx_dividends_user_sembol_tarih ON dividends(user_id, sembol, tarih)",
+        "CREATE INDEX IF NOT EXISTS idx_assets_user_tur ON assets(user_id, tur)",
+        "ANALYZE",
+    ]),
+    (2, "Delta senkronizasyonu: değişiklik günlüğü ve satır kimlikleri", [
+        '''CREATE TABLE IF NOT EXISTS sync_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            tablo TEXT NOT NULL,
+            anahtar TEXT NOT NULL,
+            islem TEXT NOT NULL CHECK(islem IN ('upsert', 'delete')),
+            kaynak TEXT,
+            UNIQUE(user_id, tablo, anahtar)
+        )''',
+        "CREATE INDEX IF NOT EXISTS idx_sync_log_user_seq ON sync_log(user_id, seq)",
+        '''CREATE TABLE IF NOT EXISTS sync_state (
+            user_id INTEGER NOT NULL,
+            anahtar TEXT NOT NULL,
+            deger TEXT,
+            PRIMARY KEY (user_id, anahtar)
+        )''',
+        "ALTER TABLE transactions ADD COLUMN sync_id TEXT",
+        "UPDATE transactions SET sync_id = lower(hex(randomblob(16))) WHERE sync_id IS NULL",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_sync_id ON transactions(user_id, sync_id)",
+        "ALTER TABLE dividends ADD COLUMN sync_id TEXT",
+        "UPDATE dividends SET sync_id = lower(hex(randomblob(16))) WHERE sync_id IS NULL",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_dividends_sync_id ON dividends(user_id, sync_id)",
+        *_sync_log_triggers('transactions', 'sync_id', assign_sync_id=True),
+        *_sync_log_triggers('dividends', 'sync_id', assign_sync_id=True),
+        # Sadece fiyat güncellemeleri (guncel_fiyat) senkronizasyon gerektirmez
+        *_sync_log_triggers('portfolios', 'sembol', update_of=('adet', 'ort_maliyet')),
+        *_sync_log_triggers('settings', 'setting_key'),
+        # Mevcut satırlar günlüğe bir kez eklenir (sunucudaki ilk çekme için)
+        "INSERT OR IGNORE INTO sync_log (user_id, tablo, anahtar, islem) SELECT user_id, 'transactions', sync_id, 'upsert' FROM transactions",
+        "INSERT OR IGNORE INTO sync_log (user_id, tablo, anahtar, islem) SELECT user_id, 'dividends', sync_id, 'upsert' FROM dividends",
+        "INSERT OR IGNORE INTO sync_log (user_id, tablo, anahtar, islem) SELECT user_id, 'portfolios', sembol, 'upsert' FROM portfolios",
+        "INSERT OR IGNORE INTO sync_log (user_id, tablo, anahtar, islem) SELECT user_id, 'settings', setting_key, 'upsert' FROM settings",
+    ]),
+    (3, "Fiyat geçmişi: price_ticks tablosu", [
+        '''CREATE TABLE IF NOT EXISTS price_ticks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sembol TEXT NOT NULL,
+            fiyat REAL NOT NULL,
+            zaman TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )''',
+        "CREATE INDEX IF NOT EXISTS idx_price_ticks_sembol_zaman ON price_ticks(sembol, zaman)",
+    ]),
+]
+
+
 class Database:
     def __init__(self, db_name="portfolio.db", json_file="portfoy_data.json"):
         # Exe'nin çalıştığı dizini belirle
@@ -32,6 +160,10 @@ class Database:
         self.json_file = os.path.join(app_dir, json_file)
         self.connection = None
         
+        # Thread başına tek bağlantı (UI ve arka plan fiyat thread'leri ayrı bağlantı kullanır).
+        # Thread sonlandığında bağlantısı thread-local ile birlikte serbest bırakılır.
+        self._local = threading.local()
+        
         print(f"[DB] Database konumu: {self.db_name}")
         
         # Veritabanını başlat
@@ -51,20 +183,78 @@ class Database:
         except Exception as e:
             print(f"[WARN] JSON geçişi başarısız: {e}")
     
-    @contextmanager
-    def get_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_name)
+    def _open_connection(self):
+        """Yeni bir SQLite bağlantısı aç ve performans ayarlarını uygula"""
+        conn = sqlite3.connect(self.db_name, cached_statements=CACHED_STATEMENTS)
         conn.row_factory = sqlite3.Row
+        
+        # WAL: okuyucular yazıcıyı beklemez; NORMAL: WAL ile güvenli, commit başına fsync yok
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        return conn
+    
+    @contextmanager
+    def get_connection(self, immediate=False):
+        """
+        Context manager for database connections
+        
+        Her thread kendi kalıcı bağlantısını yeniden kullanır. İç içe
+        çağrılar (örn. bir işlem içinden get_settings) aynı bağlantıyı ve
+        transaction'ı paylaşır; commit/rollback en dıştaki blokta yapılır.
+        Bu yüzden metotlar conn.commit() çağırmaz: iç içe kullanıldıklarında
+        ara commit dış transaction'ın atomikliğini bozar.
+        
+        Args:
+            immediate: Yazma kilidini baştan al (BEGIN IMMEDIATE). Birden fazla
+                süreç aynı dosyaya yazarken, okuyup sonra yazan transaction'ın
+                WAL'de SQLITE_BUSY ile düşmesini önler; kilit busy_timeout kadar beklenir.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open_connection()
+            self._local.conn = conn
+            self._local.depth = 0
+        
+        self._local.depth += 1
         try:
+            if immediate and not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
             yield conn
-            conn.commit()
+            if self._local.depth == 1:
+                conn.commit()
         except Exception as e:
-            conn.rollback()
-            print(f"Database error: {e}")
+            if self._local.depth == 1:
+                conn.rollback()
+                print(f"Database error: {e}")
             raise
         finally:
+            self._local.depth -= 1
+    
+    def reset_after_fork(self):
+        """
+        Fork edilen çocuk süreçte ebeveynden kalan bağlantıları bırak
+        
+        SQLite bağlantıları süreçler arasında paylaşılamaz; çocuk süreç kendi
+        bağlantılarını ilk kullanımda açar. Eski bağlantılar kapatılmaz, çünkü
+        kapatmak ebeveynin dosya kilitlerini etkileyebilir.
+        """
+        self._local = threading.local()
+    
+    def checkpoint(self):
+        """WAL içeriğini ana veritabanı dosyasına yaz (dosya kopyalamadan önce)"""
+        try:
+            with self.get_connection() as conn:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except Exception as e:
+            print(f"[WARN] WAL checkpoint hatası: {e}")
+    
+    def close(self):
+        """Bu thread'in bağlantısını kapat"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
             conn.close()
+            self._local.conn = None
     
     def init_db(self):
         """Veritabanını başlat - tüm tabloları oluştur"""
@@ -247,6 +437,20 @@ class Database:
                     )
                 ''')
                 
+                # Pozisyon defteri ara durumları (sembol bazlı artımlı yeniden hesaplama için)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS position_checkpoints (
+                        user_id INTEGER NOT NULL,
+                        sembol TEXT NOT NULL,
+                        tarih TIMESTAMP NOT NULL,
+                        txn_id INTEGER NOT NULL,
+                        adet INTEGER NOT NULL,
+                        toplam_maliyet REAL NOT NULL,
+                        komisyon_orani REAL NOT NULL,
+                        PRIMARY KEY (user_id, sembol, tarih, txn_id)
+                    ) WITHOUT ROWID
+                ''')
+                
                 # Index'ler ekle (performans için)
                 cursor.execute('''
                     CREATE INDEX IF NOT EXISTS idx_price_alerts_user_active 
@@ -258,13 +462,30 @@ class Database:
                     ON price_alerts(symbol)
                 ''')
                 
-                conn.commit()
+                self._run_migrations(cursor)
+                
                 print(f"[OK] Veritabanı başarıyla oluşturuldu: {self.db_name}")
         except Exception as e:
             print(f"[ERROR] Veritabanı oluşturma hatası: {e}")
             print(f"   Database path: {self.db_name}")
             raise
     
+    def _run_migrations(self, cursor):
+        """Uygulanmamış şema geçişlerini sırayla çalıştır"""
+        current_version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        
+        for version, description, statements in SCHEMA_MIGRATIONS:
+            if version <= current_version:
+                continue
+            
+            print(f"[DB] Şema geçişi v{version}: {description}")
+            for statement in statements:
+                cursor.execute(statement)
+            
+            # PRAGMA parametre almaz; sürüm tam sayı olduğu için doğrudan yazılır
+            cursor.execute(f"PRAGMA user_version = {int(version)}")
+            current_version = version
+    
     def _db_has_data(self):
         """Veritabanında veri olup olmadığını kontrol et"""
         try:
@@ -307,53 +528,30 @@ class Database:
                     cursor.execute("SELECT id FROM users WHERE username = ?", (default_username,))
                     user_id = cursor.fetchone()[0]
                 
-                # Portföy verileri
-                for stock in json_data.get('portfoy', []):
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO portfolios 
-                        (user_id, sembol, adet, ort_maliyet, guncel_fiyat)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (user_id, stock['sembol'], stock['adet'], 
-                          stock['ort_maliyet'], stock['guncel_fiyat']))
-                
-                # İşlem verileri
-                for trans in json_data.get('islemler', []):
-                    cursor.execute('''
-                        INSERT INTO transactions 
-                        (user_id, sembol, tip, adet, fiyat, toplam, tarih)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (user_id, trans['sembol'], trans['tip'], 
-                          trans['adet'], trans['fiyat'], trans['toplam'], 
-                          trans['tarih']))
-                
-                # Temettü verileri
-                for div in json_data.get('temettüler', []):
-                    cursor.execute('''
-                        INSERT INTO dividends 
-                        (user_id, sembol, tutar, adet, hisse_basi_tutar, tarih)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (user_id, div['sembol'], div['tutar'], 
-                          div['adet'], div['hisse_basi_tutar'], div['tarih']))
+                # Portföy, işlem ve temettü verileri (aynı transaction içinde toplu)
+                self.bulk_upsert_portfolio(json_data.get('portfoy', []), user_id)
+                self.bulk_add_transactions(json_data.get('islemler', []), user_id, update_positions=False)
+                self.bulk_add_dividends(json_data.get('temettüler', []), user_id)
                 
                 # Ayarlar
-                for key, value in json_data.get('ayarlar', DEFAULT_SETTINGS).items():
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO settings 
-                        (user_id, setting_key, setting_value)
-                        VALUES (?, ?, ?)
-                    ''', (user_id, key, json.dumps(value)))
-                
-                conn.commit()
-                
-                # Yedek JSON dosyasını oluştur
-                backup_name = f"portfoy_data_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-                import shutil
-                shutil.copy(self.json_file, backup_name)
-                
-                #print(f"✅ {len(json_data.get('portfoy', []))} hisse başarıyla geçirildi")
-                #print(f"✅ {len(json_data.get('islemler', []))} işlem başarıyla geçirildi")
-                #print(f"✅ JSON yedek: {backup_name}")
-                #print("="*60 + "\n")
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO settings 
+                    (user_id, setting_key, setting_value)
+                    VALUES (?, ?, ?)
+                ''', [
+                    (user_id, key, json.dumps(value))
+                    for key, value in json_data.get('ayarlar', DEFAULT_SETTINGS).items()
+                ])
+            
+            # Yedek JSON dosyası, geçiş commit edildikten sonra oluşturulur
+            backup_name = f"portfoy_data_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            import shutil
+            shutil.copy(self.json_file, backup_name)
+            
+            #print(f"✅ {len(json_data.get('portfoy', []))} hisse başarıyla geçirildi")
+            #print(f"✅ {len(json_data.get('islemler', []))} işlem başarıyla geçirildi")
+            #print(f"✅ JSON yedek: {backup_name}")
+            #print("="*60 + "\n")
         
         except Exception as e:
             print(f"❌ Geçiş hatası: {e}")
@@ -375,13 +573,43 @@ class Database:
                 return None
     
     def get_user(self, username):
-        """Kullanıcı bilgisi getir"""
+        """Kullanıcı bilgisi getir (kullanıcı adı veya int kullanıcı ID ile)"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
+            if isinstance(username, int):
+                cursor.execute("SELECT * FROM users WHERE id = ?", (username,))
+            else:
+                cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
             row = cursor.fetchone()
             return dict(row) if row else None
     
+    def create_session(self, user_id, token_id, expires_at):
+        """Verilen token kimliği (jti) için oturum kaydı oluştur, süresi dolanları temizle"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM sessions WHERE user_id = ? AND expires_at < ?",
+                (user_id, datetime.utcnow())
+            )
+            cursor.execute('''
+                INSERT INTO sessions (user_id, token, expires_at)
+                VALUES (?, ?, ?)
+            ''', (user_id, token_id, expires_at))
+    
+    def session_exists(self, token_id):
+        """Token kimliğinin oturumu hâlâ geçerli mi (iptal edilmemiş)"""
+        with self.get_connection() as conn:
+            row = conn.execute("SELECT 1 FROM sessions WHERE token = ?", (token_id,)).fetchone()
+            return row is not None
+    
+    def delete_sessions(self, user_id=None, token_id=None):
+        """Oturumları iptal et (kullanıcının tümü veya tek bir token)"""
+        with self.get_connection() as conn:
+            if token_id is not None:
+                conn.execute("DELETE FROM sessions WHERE token = ?", (token_id,))
+            else:
+                conn.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+    
     # ========== PORTFÖY İŞLEMLERİ ==========
     
     def get_portfolio(self, user_id=1):
@@ -404,9 +632,38 @@ class Database:
                 (user_id, sembol, adet, ort_maliyet, guncel_fiyat)
                 VALUES (?, ?, ?, ?, ?)
             ''', (user_id, symbol, adet, ort_maliyet, guncel_fiyat))
-            conn.commit()
             return True
     
+    def update_portfolio_prices(self, prices, user_id=1):
+        """
+        Güncel fiyatları tek transaction'da yaz ve fiyat geçmişine ekle
+        
+        Args:
+            prices: {sembol: fiyat}
+            user_id: Kullanıcı ID
+        
+        Returns:
+            int: Güncellenen portföy satırı sayısı
+        """
+        if not prices:
+            return 0
+        
+        now = datetime.now().isoformat(sep=' ', timespec='seconds')
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                UPDATE portfolios
+                SET guncel_fiyat = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE sembol = ? AND user_id = ?
+            ''', [(price, symbol, user_id) for symbol, price in prices.items()])
+            updated = cursor.rowcount
+            
+            cursor.executemany(
+                "INSERT INTO price_ticks (sembol, fiyat, zaman) VALUES (?, ?, ?)",
+                [(symbol, price, now) for symbol, price in prices.items()]
+            )
+            return updated
+    
     def delete_portfolio(self, symbol, user_id=1):
         """Hisseyi portföyden ve ilgili işlemlerini sil"""
         with self.get_connection() as conn:
@@ -417,110 +674,150 @@ class Database:
             cursor.execute("DELETE FROM transactions WHERE user_id = ? AND sembol = ?", (user_id, symbol))
             # İlgili temettüleri sil
             cursor.execute("DELETE FROM dividends WHERE user_id = ? AND sembol = ?", (user_id, symbol))
-            conn.commit()
+            cursor.execute("DELETE FROM position_checkpoints WHERE user_id = ? AND sembol = ?", (user_id, symbol))
             return True
     
 
     def recalculate_portfolio_from_transactions(self, user_id=1):
-        """Portföyü işlemlerden yeniden hesapla - SATIŞ DÜZELTİLMİŞ"""
-        #print("\n" + "="*60)
-        #print("Portföy yeniden hesaplanıyor (komisyon dahil)...")
-        #print("="*60)
-        
+        """Portföyü işlemlerden tamamen yeniden hesapla (tüm semboller, sıfırdan)"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            commission_rate = self._get_commission_rate(user_id)
             
-            settings = self.get_settings(user_id)
-            commission_rate = settings.get("komisyon_orani", 0.0004)
-            
-            try:
-                if isinstance(commission_rate, str):
-                    commission_rate = commission_rate.replace(',', '.')
-                commission_rate = float(commission_rate)
-            except:
-                commission_rate = 0.0004
+            cursor.execute("DELETE FROM position_checkpoints WHERE user_id = ?", (user_id,))
             
-            # Mevcut fiyatları al
             cursor.execute('''
-                SELECT sembol, guncel_fiyat FROM portfolios WHERE user_id = ?
+                SELECT DISTINCT sembol FROM transactions WHERE user_id = ?
             ''', (user_id,))
-            current_prices = {row['sembol']: row['guncel_fiyat'] for row in cursor.fetchall()}
+            symbols = [row['sembol'] for row in cursor.fetchall()]
             
-            # Portföyü temizle
-            cursor.execute("DELETE FROM portfolios WHERE user_id = ?", (user_id,))
+            # İşlemi kalmamış semboller portföyden çıkar
+            placeholders = ','.join('?' * len(symbols))
+            cursor.execute(
+                f"DELETE FROM portfolios WHERE user_id = ? AND sembol NOT IN ({placeholders})",
+                (user_id, *symbols)
+            )
             
-            # İşlemleri tarihe göre getir
+            for symbol in symbols:
+                self._replay_symbol(cursor, user_id, symbol, None, commission_rate)
+    
+    def recalculate_symbol_position(self, symbol, from_date=None, user_id=1):
+        """
+        Tek sembolün pozisyonunu artımlı olarak yeniden hesapla
+        
+        Sadece bu sembolün from_date ve sonrasındaki işlemleri, ondan önceki
+        son ara durumdan (checkpoint) başlanarak yeniden oynatılır.
+        
+        Args:
+            symbol: Hisse sembolü
+            from_date: Değişen ilk işlemin tarihi (None = sembolün tüm geçmişi)
+            user_id: Kullanıcı ID
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            self._replay_symbol(cursor, user_id, symbol, from_date, self._get_commission_rate(user_id))
+    
+    def _get_commission_rate(self, user_id):
+        """Ayarlardaki komisyon oranını sayı olarak al"""
+        commission_rate = self.get_settings(user_id).get("komisyon_orani", DEFAULT_COMMISSION_RATE)
+        try:
+            if isinstance(commission_rate, str):
+                commission_rate = commission_rate.replace(',', '.')
+            return float(commission_rate)
+        except (TypeError, ValueError):
+            return DEFAULT_COMMISSION_RATE
+    
+    def _replay_symbol(self, cursor, user_id, symbol, from_date, commission_rate):
+        """
+        Sembolün işlemlerini son geçerli ara durumdan itibaren oynat ve
+        portföy satırını güncelle (çağıranın transaction'ı içinde çalışır)
+        """
+        adet = 0
+        toplam_maliyet = 0.0
+        after_tarih, after_id = None, None
+        
+        if from_date is not None:
             cursor.execute('''
-                SELECT sembol, tip, adet, fiyat, komisyon, tarih FROM transactions 
-                WHERE user_id = ? 
-                ORDER BY tarih ASC
-            ''', (user_id,))
+                SELECT c.tarih, c.txn_id, c.adet, c.toplam_maliyet, c.komisyon_orani
+                FROM position_checkpoints c
+                JOIN transactions t ON t.id = c.txn_id AND t.user_id = c.user_id AND t.sembol = c.sembol
+                WHERE c.user_id = ? AND c.sembol = ? AND c.tarih < ?
+                ORDER BY c.tarih DESC, c.txn_id DESC
+                LIMIT 1
+            ''', (user_id, symbol, from_date))
+            checkpoint = cursor.fetchone()
             
-            temp_portfolio = {}
+            # Komisyon oranı değiştiyse ara durum geçersizdir
+            if checkpoint and checkpoint['komisyon_orani'] == commission_rate:
+                after_tarih, after_id = checkpoint['tarih'], checkpoint['txn_id']
+                adet = checkpoint['adet']
+                toplam_maliyet = checkpoint['toplam_maliyet']
+        
+        if after_tarih is None:
+            cursor.execute('''
+                DELETE FROM position_checkpoints WHERE user_id = ? AND sembol = ?
+            ''', (user_id, symbol))
+            cursor.execute('''
+                SELECT id, tip, adet, fiyat, komisyon, tarih FROM transactions
+                WHERE user_id = ? AND sembol = ?
+                ORDER BY tarih ASC, id ASC
+            ''', (user_id, symbol))
+        else:
+            cursor.execute('''
+                DELETE FROM position_checkpoints
+                WHERE user_id = ? AND sembol = ? AND (tarih > ? OR (tarih = ? AND txn_id > ?))
+            ''', (user_id, symbol, after_tarih, after_tarih, after_id))
+            cursor.execute('''
+                SELECT id, tip, adet, fiyat, komisyon, tarih FROM transactions
+                WHERE user_id = ? AND sembol = ? AND (tarih > ? OR (tarih = ? AND id > ?))
+                ORDER BY tarih ASC, id ASC
+            ''', (user_id, symbol, after_tarih, after_tarih, after_id))
+        
+        checkpoints = []
+        for count, row in enumerate(cursor.fetchall(), 1):
+            islem_adet = row['adet']
+            tip = row['tip']
             
-            for row in cursor.fetchall():
-                # SQLite Row nesnesini dict'e dönüştür
-                row_dict = dict(row)
-                
-                symbol = row_dict['sembol']
-                adet = row_dict['adet']
-                fiyat = row_dict['fiyat']
-                tip = row_dict['tip']
+            if tip == 'Alım':
+                islem_tutari = islem_adet * row['fiyat']
+                stored_komisyon = row['komisyon']
+                komisyon = stored_komisyon if stored_komisyon and stored_komisyon > 0 else islem_tutari * commission_rate
                 
-                # Komisyon değerini kontrol et
-                stored_komisyon = row_dict.get('komisyon', 0)
-                
-                if symbol not in temp_portfolio:
-                    temp_portfolio[symbol] = {'adet': 0, 'toplam_maliyet': 0}
-                
-                if tip == 'Alım':
-                    islem_tutari = adet * fiyat
-                    komisyon = stored_komisyon if stored_komisyon and stored_komisyon > 0 else islem_tutari * commission_rate
-                    toplam_maliyet = islem_tutari + komisyon
-                    
-                    temp_portfolio[symbol]['adet'] += adet
-                    temp_portfolio[symbol]['toplam_maliyet'] += toplam_maliyet
-                    
-                    #print(f"  ✅ {symbol} ALIM: {adet} x {fiyat:.2f}₺ + {komisyon:.2f}₺ kom. = {toplam_maliyet:.2f}₺")
+                adet += islem_adet
+                toplam_maliyet += islem_tutari + komisyon
+            
+            elif tip == 'Satış':
+                if adet < islem_adet:
+                    print(f"  ⚠️ {symbol} SATIŞ HATASI: Yetersiz adet! (Portföyde: {adet}, Satış: {islem_adet})")
+                    continue
                 
-                elif tip == 'Satış':
-                    # ✅ SATIŞ KONTROLÜ GÜÇLENDİRİLDİ
-                    if symbol not in temp_portfolio:
-                        print(f"  ⚠️ {symbol} SATIŞ HATASI: Portföyde bu hisse yok!")
-                        continue
-                        
-                    if temp_portfolio[symbol]['adet'] < adet:
-                        print(f"  ⚠️ {symbol} SATIŞ HATASI: Yetersiz adet! (Portföyde: {temp_portfolio[symbol]['adet']}, Satış: {adet})")
-                        continue
-                    
-                    # ✅ SATIŞ İŞLEMİ
-                    ortalama_maliyet = temp_portfolio[symbol]['toplam_maliyet'] / temp_portfolio[symbol]['adet']
-                    satis_maliyeti = adet * ortalama_maliyet
-                    
-                    temp_portfolio[symbol]['toplam_maliyet'] -= satis_maliyeti
-                    temp_portfolio[symbol]['adet'] -= adet
-                    
-                    #print(f"  ❌ {symbol} SATIŞ: {adet} adet x {ortalama_maliyet:.2f}₺ = {satis_maliyeti:.2f}₺")
-                    #print(f"     → Kalan: {temp_portfolio[symbol]['adet']} adet, Maliyet: {temp_portfolio[symbol]['toplam_maliyet']:.2f}₺")
-            
-            # Portföyü kaydet
-            for symbol, data in temp_portfolio.items():
-                if data['adet'] > 0:
-                    ort_maliyet = data['toplam_maliyet'] / data['adet']
-                    guncel_fiyat = current_prices.get(symbol, ort_maliyet)
-                    
-                    cursor.execute('''
-                        INSERT INTO portfolios 
-                        (user_id, sembol, adet, ort_maliyet, guncel_fiyat)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (user_id, symbol, data['adet'], ort_maliyet, guncel_fiyat))
-                    
-                    #print(f"  💼 {symbol}: {data['adet']} adet, Ort.Maliyet: {ort_maliyet:.2f}₺")
-                #else:
-                    #print(f"  🗑️ {symbol}: Portföyden çıkarıldı (adet: 0)")
+                ortalama_maliyet = toplam_maliyet / adet
+                toplam_maliyet -= islem_adet * ortalama_maliyet
+                adet -= islem_adet
             
-            conn.commit()
-            #print("="*60 + "\n")
+            if count % POSITION_CHECKPOINT_INTERVAL == 0:
+                checkpoints.append((user_id, symbol, row['tarih'], row['id'], adet, toplam_maliyet, commission_rate))
+        
+        if checkpoints:
+            cursor.executemany('''
+                INSERT OR REPLACE INTO position_checkpoints
+                (user_id, sembol, tarih, txn_id, adet, toplam_maliyet, komisyon_orani)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', checkpoints)
+        
+        # Portföy satırını güncelle (güncel fiyat korunur)
+        if adet > 0:
+            ort_maliyet = toplam_maliyet / adet
+            cursor.execute('''
+                INSERT INTO portfolios (user_id, sembol, adet, ort_maliyet, guncel_fiyat)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(user_id, sembol) DO UPDATE SET
+                    adet = excluded.adet,
+                    ort_maliyet = excluded.ort_maliyet,
+                    updated_at = CURRENT_TIMESTAMP
+            ''', (user_id, symbol, adet, ort_maliyet, ort_maliyet))
+        else:
+            cursor.execute("DELETE FROM portfolios WHERE user_id = ? AND sembol = ?", (user_id, symbol))
     
     # ========== İŞLEM İŞLEMLERİ ==========
     
@@ -536,6 +833,59 @@ class Database:
             ''', (user_id,))
             return [dict(row) for row in cursor.fetchall()]
     
+    def iter_transactions(self, user_id=1, batch_size=STREAM_BATCH_SIZE):
+        """İşlemleri get_transactions ile aynı sırada, belleğe almadan satır satır getir"""
+        return self._iter_rows('''
+            SELECT sembol, tip, adet, fiyat, toplam, komisyon, tarih 
+            FROM transactions 
+            WHERE user_id = ?
+            ORDER BY tarih DESC
+        ''', (user_id,), batch_size)
+    
+    def get_transactions_page(self, user_id=1, after_id=0, limit=1000):
+        """
+        İşlemleri id sırasıyla sayfa sayfa getir (cursor sayfalama)
+        
+        Args:
+            user_id: Kullanıcı ID
+            after_id: Önceki sayfanın son işlem id'si (ilk sayfa için 0)
+            limit: Sayfa boyutu
+        
+        Returns:
+            tuple: (işlemler, sonraki cursor veya son sayfaysa None)
+        """
+        with self.get_connection() as conn:
+            rows = conn.execute('''
+                SELECT id, sembol, tip, adet, fiyat, toplam, komisyon, tarih 
+                FROM transactions 
+                WHERE user_id = ? AND id > ?
+                ORDER BY id
+                LIMIT ?
+            ''', (user_id, after_id, limit + 1)).fetchall()
+        
+        page = [dict(row) for row in rows[:limit]]
+        next_cursor = page[-1]['id'] if len(rows) > limit else None
+        return page, next_cursor
+    
+    def _iter_rows(self, sql, params, batch_size):
+        """
+        Sorgu sonucunu parça parça üret
+        
+        Akış süresince ayrı bir bağlantı kullanılır; böylece okuma tek bir tutarlı
+        anlık görüntüden yapılır ve iş parçacığının ortak bağlantısı meşgul edilmez.
+        """
+        conn = self._open_connection()
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            conn.close()
+    
     # ========== İŞLEM İŞLEMLERİ - DÜZELTİLMİŞ ==========
 
     def add_transaction(self, *args, **kwargs):
@@ -552,6 +902,9 @@ class Database:
             add_transaction(user_id=1, sembol="THYAO", tip="Alış", ...)
         """
         
+        # Pozisyon defteri güncellensin mi? (toplu aktarımlar sonunda tek seferde hesaplar)
+        update_positions = kwargs.pop('update_positions', True)
+        
         # Format 1: Dictionary (eski format)
         if len(args) == 1 and isinstance(args[0], dict):
             transaction_data = args[0]
@@ -608,8 +961,12 @@ class Database:
                 (user_id, sembol, tip, adet, fiyat, toplam, komisyon, tarih)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             ''', (user_id, sembol, tip, adet, fiyat, toplam, komisyon, tarih))
-            conn.commit()
-            return cursor.lastrowid
+            transaction_id = cursor.lastrowid
+            
+            if update_positions:
+                self._replay_symbol(cursor, user_id, sembol, tarih, self._get_commission_rate(user_id))
+            
+            return transaction_id
     
     # ========== TEMETTÜ İŞLEMLERİ ==========
     
@@ -625,6 +982,15 @@ class Database:
             ''', (user_id,))
             return [dict(row) for row in cursor.fetchall()]
     
+    def iter_dividends(self, user_id=1, batch_size=STREAM_BATCH_SIZE):
+        """Temettüleri get_dividends ile aynı sırada, belleğe almadan satır satır getir"""
+        return self._iter_rows('''
+            SELECT sembol, tutar, adet, hisse_basi_tutar, tarih 
+            FROM dividends 
+            WHERE user_id = ?
+            ORDER BY tarih DESC
+        ''', (user_id,), batch_size)
+    
     def add_dividend(self, *args, **kwargs):
         """
         Temettü ekle - Esnek format desteği
@@ -707,7 +1073,6 @@ class Database:
                 (user_id, sembol, tutar, adet, hisse_basi_tutar, tarih)
                 VALUES (?, ?, ?, ?, ?, ?)
             ''', (user_id, sembol, tutar, adet, hisse_basi_tutar, tarih))
-            conn.commit()
             return cursor.lastrowid
     
     # ========== AYAR İŞLEMLERİ ==========
@@ -735,13 +1100,19 @@ class Database:
         """Ayarları güncelle"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            old_commission_rate = self._get_commission_rate(user_id) if 'komisyon_orani' in new_settings else None
+            
             for key, value in new_settings.items():
                 cursor.execute('''
                     INSERT OR REPLACE INTO settings 
                     (user_id, setting_key, setting_value)
                     VALUES (?, ?, ?)
                 ''', (user_id, key, json.dumps(value)))
-            conn.commit()
+            
+            # Komisyon oranı maliyetleri etkiler - pozisyon defterini yeniden kur
+            if old_commission_rate is not None and self._get_commission_rate(user_id) != old_commission_rate:
+                self.recalculate_portfolio_from_transactions(user_id)
+            
             return True
     
     # ========== FİYAT ALARMLARI İŞLEMLERİ ==========
@@ -765,7 +1136,6 @@ class Database:
                     alert_data.get('active', True),
                     alert_data.get('triggered', False)
                 ))
-                conn.commit()
                 return cursor.lastrowid
         except Exception as e:
             print(f"Alarm ekleme hatası: {e}")
@@ -877,7 +1247,6 @@ class Database:
                 '''
                 
                 cursor.execute(query, values)
-                conn.commit()
                 
                 return cursor.rowcount > 0
         except Exception as e:
@@ -893,12 +1262,38 @@ class Database:
                     DELETE FROM price_alerts 
                     WHERE id = ? AND user_id = ?
                 ''', (alert_id, user_id))
-                conn.commit()
                 return cursor.rowcount > 0
         except Exception as e:
             print(f"Alarm silme hatası: {e}")
             return False
-    
+
+    def mark_price_alerts_triggered(self, triggered, user_id=1):
+        """
+        Tetiklenen alarmları tek transaction'da pasif ve tetiklenmiş olarak işaretle
+
+        Args:
+            triggered: [(alert_id, tetiklenme fiyatı, tetiklenme zamanı), ...]
+            user_id: Kullanıcı ID
+
+        Returns:
+            int: Güncellenen alarm sayısı
+        """
+        if not triggered:
+            return 0
+
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.executemany('''
+                    UPDATE price_alerts
+                    SET triggered = 1, triggered_at = ?, triggered_price = ?, active = 0
+                    WHERE id = ? AND user_id = ?
+                ''', [(triggered_at, price, alert_id, user_id) for alert_id, price, triggered_at in triggered])
+                return cursor.rowcount
+        except Exception as e:
+            print(f"Alarm tetikleme kaydı hatası: {e}")
+            return 0
+
     # ========== VARLIK TÜRÜ İŞLEMLERİ ==========
     
     def add_asset(self, asset_data, user_id=1):
@@ -913,7 +1308,6 @@ class Database:
                 ''', (user_id, asset_data['sembol'], asset_data['tur'], 
                       asset_data['ad'], asset_data['adet'], asset_data['ort_maliyet'],
                       asset_data['guncel_fiyat'], asset_data.get('para_birimi', 'TRY')))
-                conn.commit()
                 return cursor.lastrowid
             except Exception as e:
                 print(f"Asset ekleme hatası: {e}")
@@ -941,6 +1335,29 @@ class Database:
             ''', (user_id,))
             return [dict(row) for row in cursor.fetchall()]
     
+    def update_asset_prices(self, prices, user_id=1):
+        """
+        Varlık fiyatlarını tek transaction'da güncelle
+        
+        Args:
+            prices: {(sembol, tür): fiyat}
+            user_id: Kullanıcı ID
+        
+        Returns:
+            int: Güncellenen varlık sayısı
+        """
+        if not prices:
+            return 0
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                UPDATE assets
+                SET guncel_fiyat = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE user_id = ? AND sembol = ? AND tur = ?
+            ''', [(price, user_id, symbol, tur) for (symbol, tur), price in prices.items()])
+            return cursor.rowcount
+    
     def delete_asset(self, symbol, asset_type, user_id=1):
         """Varlığı sil"""
         with self.get_connection() as conn:
@@ -949,7 +1366,6 @@ class Database:
                 DELETE FROM assets 
                 WHERE user_id = ? AND sembol = ? AND tur = ?
             ''', (user_id, symbol, asset_type))
-            conn.commit()
             return True
     
     # ========== GELİŞMİŞ İŞLEMLER ==========
@@ -993,7 +1409,6 @@ class Database:
                   f'Hisse Bölünmesi: {old_adet} x {old_cost:.2f}₺ -> {int(new_adet)} x {new_cost:.2f}₺',
                   datetime.now().isoformat()))
             
-            conn.commit()
             return True
     
     def apply_rights_issue(self, symbol, rights_ratio, new_share_price, user_id=1):
@@ -1039,7 +1454,6 @@ class Database:
                   f'Bedelli Sermaye Artırımı: {new_shares:.0f} hisse x {new_share_price:.2f}₺',
                   datetime.now().isoformat()))
             
-            conn.commit()
             return True
     
     # ========== PORTFÖY HEDEFLERİ ==========
@@ -1055,7 +1469,6 @@ class Database:
             ''', (user_id, goal_data['hedef_ad'], goal_data['hedef_tutar'],
                   goal_data['hedef_tarihi'], goal_data.get('aylik_yatirim'),
                   goal_data.get('notlar')))
-            conn.commit()
             return cursor.lastrowid
     
     def get_goals(self, user_id=1):
@@ -1077,7 +1490,6 @@ class Database:
                 DELETE FROM portfolio_goals 
                 WHERE id = ? AND user_id = ?
             ''', (goal_id, user_id))
-            conn.commit()
             return True
     
     # ========== VERGİ KAYITLARI ==========
@@ -1094,7 +1506,6 @@ class Database:
                   tax_data.get('satig_zararlar', 0), tax_data.get('temettü', 0),
                   tax_data.get('faiz', 0), tax_data.get('vergi_serbest', 0),
                   tax_data.get('notlar')))
-            conn.commit()
             return True
     
     def get_tax_records(self, year=None, user_id=1):
@@ -1116,6 +1527,412 @@ class Database:
             
             return [dict(row) for row in cursor.fetchall()]
     
+    # ========== TOPLU VERİ AKTARIMI ==========
+    
+    @staticmethod
+    def _validate_bulk_rows(rows, normalize, label):
+        """
+        Satırları toplu doğrula; hatalı satır varsa hiçbir şey yazmadan ValueError at
+        
+        Returns:
+            list: Normalize edilmiş satırlar
+        """
+        normalized = []
+        errors = []
+        for index, row in enumerate(rows):
+            try:
+                normalized.append(normalize(row))
+            except (KeyError, TypeError, ValueError) as e:
+                errors.append(f"{index + 1}. satır: {e}")
+        
+        if errors:
+            more = f" (+{len(errors) - 5} satır daha)" if len(errors) > 5 else ""
+            raise ValueError(f"Geçersiz {label} verisi: " + "; ".join(errors[:5]) + more)
+        
+        return normalized
+    
+    @staticmethod
+    def _normalize_transaction_row(data):
+        """İşlem sözlüğünü (add_transaction Format 1) sütun değerlerine dönüştür"""
+        adet = data['adet']
+        fiyat = data['fiyat']
+        row = (
+            data['sembol'],
+            data['tip'],
+            adet,
+            fiyat,
+            data.get('toplam') or adet * fiyat,
+            data.get('komisyon') or 0,
+            data['tarih'],
+        )
+        if not all(row[:3]) or not fiyat or not row[6]:
+            raise ValueError("Eksik işlem bilgisi!")
+        return row
+    
+    @staticmethod
+    def _normalize_dividend_row(data):
+        """Temettü sözlüğünü (add_dividend Format 1) sütun değerlerine dönüştür"""
+        row = (
+            data['sembol'],
+            data['tutar'],
+            data.get('adet', 0),
+            data.get('hisse_basi_tutar', 0),
+            data['tarih'],
+        )
+        if not row[0] or row[1] is None or not row[4]:
+            raise ValueError("Eksik temettü bilgisi!")
+        return row
+    
+    def bulk_add_transactions(self, transactions, user_id=1, update_positions=True):
+        """
+        İşlemleri tek transaction içinde toplu ekle (executemany)
+        
+        Tüm satırlar önce doğrulanır; biri bile hatalıysa hiçbir satır yazılmaz.
+        
+        Args:
+            transactions: İşlem sözlükleri listesi (add_transaction Format 1 alanları)
+            user_id: Kullanıcı ID
+            update_positions: Etkilenen sembollerin pozisyonunu en eski işlem tarihinden yeniden hesapla
+        
+        Returns:
+            int: Eklenen işlem sayısı
+        """
+        rows = self._validate_bulk_rows(transactions, self._normalize_transaction_row, "işlem")
+        if not rows:
+            return 0
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT INTO transactions 
+                (user_id, sembol, tip, adet, fiyat, toplam, komisyon, tarih)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(user_id, *row) for row in rows])
+            
+            if update_positions:
+                first_dates = {}
+                for row in rows:
+                    symbol, tarih = row[0], row[6]
+                    if symbol not in first_dates or tarih < first_dates[symbol]:
+                        first_dates[symbol] = tarih
+                
+                commission_rate = self._get_commission_rate(user_id)
+                for symbol, tarih in first_dates.items():
+                    self._replay_symbol(cursor, user_id, symbol, tarih, commission_rate)
+        
+        return len(rows)
+    
+    def bulk_add_dividends(self, dividends, user_id=1):
+        """
+        Temettüleri tek transaction içinde toplu ekle (executemany)
+        
+        Args:
+            dividends: Temettü sözlükleri listesi (add_dividend Format 1 alanları)
+            user_id: Kullanıcı ID
+        
+        Returns:
+            int: Eklenen temettü sayısı
+        """
+        rows = self._validate_bulk_rows(dividends, self._normalize_dividend_row, "temettü")
+        if not rows:
+            return 0
+        
+        with self.get_connection() as conn:
+            conn.executemany('''
+                INSERT INTO dividends 
+                (user_id, sembol, tutar, adet, hisse_basi_tutar, tarih)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(user_id, *row) for row in rows])
+        
+        return len(rows)
+    
+    def bulk_add_price_alerts(self, alerts, user_id=1):
+        """Fiyat alarmlarını tek transaction içinde toplu ekle"""
+        rows = self._validate_bulk_rows(
+            alerts,
+            lambda a: (
+                a['symbol'],
+                a['target_price'],
+                a['condition'],
+                a.get('note', ''),
+                a.get('created_at', datetime.now()),
+                a.get('active', True),
+                a.get('triggered', False)
+            ),
+            "alarm"
+        )
+        if not rows:
+            return 0
+        
+        with self.get_connection() as conn:
+            conn.executemany('''
+                INSERT INTO price_alerts 
+                (user_id, symbol, target_price, condition, note, created_at, active, triggered)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(user_id, *row) for row in rows])
+        
+        return len(rows)
+    
+    @staticmethod
+    def _normalize_portfolio_row(item):
+        """Portföy sözlüğünü sütun değerlerine dönüştür"""
+        return (item['sembol'], item['adet'], item['ort_maliyet'], item.get('guncel_fiyat', item['ort_maliyet']))
+    
+    def validate_portfolio_rows(self, items):
+        """
+        Portföy satırlarını yazmadan doğrula
+        
+        Returns:
+            list: Normalize edilmiş satırlar (hatalı satır varsa ValueError)
+        """
+        return self._validate_bulk_rows(items, self._normalize_portfolio_row, "portföy")
+    
+    def bulk_upsert_portfolio(self, items, user_id=1):
+        """Portföy satırlarını tek transaction içinde toplu ekle/güncelle"""
+        rows = self.validate_portfolio_rows(items)
+        if not rows:
+            return 0
+        
+        with self.get_connection() as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO portfolios 
+                (user_id, sembol, adet, ort_maliyet, guncel_fiyat)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(user_id, *row) for row in rows])
+        
+        return len(rows)
+    
+    # ========== DELTA SENKRONİZASYON ==========
+    
+    def get_sync_state(self, key, default=None, user_id=1):
+        """Senkronizasyon durum değerini getir (yüksek su işareti, cihaz kimliği vb.)"""
+        with self.get_connection() as conn:
+            row = conn.execute(
+                "SELECT deger FROM sync_state WHERE user_id = ? AND anahtar = ?", (user_id, key)
+            ).fetchone()
+            return row['deger'] if row else default
+    
+    def set_sync_state(self, key, value, user_id=1):
+        """Senkronizasyon durum değerini kaydet"""
+        with self.get_connection() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO sync_state (user_id, anahtar, deger) VALUES (?, ?, ?)
+            ''', (user_id, key, None if value is None else str(value)))
+    
+    def get_sync_seq(self, user_id=1):
+        """Kullanıcının en son değişiklik sıra numarası"""
+        with self.get_connection() as conn:
+            row = conn.execute("SELECT MAX(seq) FROM sync_log WHERE user_id = ?", (user_id,)).fetchone()
+            return row[0] or 0
+    
+    def get_data_version(self, user_id=1):
+        """
+        Kullanıcı verisinin sürüm etiketi (ETag için)
+        
+        Değişiklik günlüğü guncel_fiyat güncellemelerini içermediği için
+        portföy fiyatlarının toplamı da sürüme katılır.
+        
+        Returns:
+            str: Veri değiştiğinde değişen sürüm metni
+        """
+        with self.get_connection() as conn:
+            seq = conn.execute("SELECT MAX(seq) FROM sync_log WHERE user_id = ?", (user_id,)).fetchone()[0]
+            prices = conn.execute(
+                "SELECT COUNT(*), TOTAL(guncel_fiyat) FROM portfolios WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            return f"{seq or 0}-{prices[0]}-{prices[1]:.6f}"
+    
+    def get_sync_changes(self, since_seq=0, user_id=1, exclude_source=None, limit=1000):
+        """
+        since_seq sonrasında değişen satırları getir
+        
+        Args:
+            since_seq: Yüksek su işareti (bu seq'ten sonraki değişiklikler)
+            user_id: Kullanıcı ID
+            exclude_source: Bu kaynaktan (cihazdan) gelen değişiklikleri atla
+            limit: En fazla değişiklik sayısı
+        
+        Returns:
+            dict: {'changes': [...], 'seq': son seq, 'has_more': bool}
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            query = "SELECT seq, tablo, anahtar, islem FROM sync_log WHERE user_id = ? AND seq > ?"
+            params = [user_id, since_seq]
+            if exclude_source:
+                query += " AND (kaynak IS NULL OR kaynak != ?)"
+                params.append(exclude_source)
+            query += " ORDER BY seq LIMIT ?"
+            params.append(limit + 1)
+            
+            log = [dict(row) for row in cursor.execute(query, params).fetchall()]
+            has_more = len(log) > limit
+            log = log[:limit]
+            
+            # Upsert satırlarının güncel içeriğini tablo başına tek sorguda al
+            keys_by_table = {}
+            for entry in log:
+                if entry['islem'] == 'upsert':
+                    keys_by_table.setdefault(entry['tablo'], []).append(entry['anahtar'])
+            
+            rows = {}
+            for table, keys in keys_by_table.items():
+                spec = SYNC_TABLES[table]
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    cursor.execute(
+                        f"SELECT {', '.join(spec['sutunlar'])} FROM {table} "
+                        f"WHERE user_id = ? AND {spec['anahtar']} IN ({','.join('?' * len(chunk))})",
+                        (user_id, *chunk)
+                    )
+                    for row in cursor.fetchall():
+                        rows[(table, str(row[spec['anahtar']]))] = dict(row)
+            
+            changes = []
+            for entry in log:
+                data = rows.get((entry['tablo'], entry['anahtar']))
+                islem = entry['islem'] if data is not None or entry['islem'] == 'delete' else 'delete'
+                changes.append({
+                    'seq': entry['seq'],
+                    'tablo': entry['tablo'],
+                    'anahtar': entry['anahtar'],
+                    'islem': islem,
+                    'veri': data if islem == 'upsert' else None
+                })
+            
+            return {
+                'changes': changes,
+                'seq': log[-1]['seq'] if log else since_seq,
+                'has_more': has_more
+            }
+    
+    def get_sync_snapshot(self, user_id=1):
+        """Senkronize edilen tüm satırları upsert değişiklikleri olarak getir (ilk senkronizasyon)"""
+        changes = []
+        with self.get_connection() as conn:
+            for table, spec in SYNC_TABLES.items():
+                cursor = conn.execute(
+                    f"SELECT {', '.join(spec['sutunlar'])} FROM {table} WHERE user_id = ?", (user_id,)
+                )
+                for row in cursor.fetchall():
+                    data = dict(row)
+                    changes.append({
+                        'tablo': table,
+                        'anahtar': str(data[spec['anahtar']]),
+                        'islem': 'upsert',
+                        'veri': data
+                    })
+        return changes
+    
+    def apply_sync_changes(self, changes, user_id=1, source=None, record=True,
+                           replace_all=False, update_positions=False):
+        """
+        Uzak değişiklikleri idempotent olarak uygula
+        
+        Aynı değişiklik birden fazla kez uygulanabilir; satırlar anahtarlarıyla
+        upsert edilir veya silinir.
+        
+        Args:
+            changes: [{'tablo', 'anahtar', 'islem', 'veri'}, ...]
+            user_id: Kullanıcı ID
+            source: Değişikliğin geldiği cihaz (günlükte işaretlenir, o cihaza geri gönderilmez)
+            record: False ise uygulanan değişiklikler yerel günlüğe yazılmaz (istemci çekmesi)
+            replace_all: True ise önce senkronize tabloların tüm satırları silinir. Bu silme
+                günlüğe yazılmaz: diğer cihazlara silme kaydı (tombstone) olarak gitmez
+            update_positions: Değişen işlemlerin sembollerinin pozisyonunu yeniden hesapla
+        
+        Returns:
+            int: Uygulanan değişiklik sayısı
+        """
+        # Yazma kilidi baştan alınır: günlükte before_seq sonrası sadece bu çağrının kayıtları olur
+        with self.get_connection(immediate=True) as conn:
+            cursor = conn.cursor()
+            before_seq = cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM sync_log").fetchone()[0]
+            
+            if replace_all:
+                for table in SYNC_TABLES:
+                    cursor.execute(f"DELETE FROM {table} WHERE user_id = ?", (user_id,))
+                # Toplu silmenin trigger'larla oluşturduğu silme kayıtları diğer cihazlarda
+                # yerel verileri sildirirdi; yalnızca bu kopya değiştirilir
+                cursor.execute(
+                    "DELETE FROM sync_log WHERE seq > ? AND user_id = ? AND islem = 'delete'",
+                    (before_seq, user_id)
+                )
+            
+            affected_symbols = {}
+            
+            def touch(symbol, tarih):
+                if symbol and (symbol not in affected_symbols or tarih < affected_symbols[symbol]):
+                    affected_symbols[symbol] = tarih
+            
+            # Transaction anahtarlarının eski sembol/tarihi tek seferde (parça parça) okunur
+            if update_positions:
+                keys = [c['anahtar'] for c in changes if c.get('tablo') == 'transactions']
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    cursor.execute(
+                        f"SELECT sembol, tarih FROM transactions WHERE user_id = ? "
+                        f"AND sync_id IN ({', '.join('?' * len(chunk))})",
+                        (user_id, *chunk)
+                    )
+                    for old in cursor.fetchall():
+                        touch(old['sembol'], old['tarih'])
+            
+            # Ardışık aynı biçimli değişiklikler tek executemany ile yazılır; sıra korunur
+            batch_sql = None
+            batch_params = []
+            
+            def flush():
+                if batch_params:
+                    cursor.executemany(batch_sql, batch_params)
+                    batch_params.clear()
+            
+            applied = 0
+            for change in changes:
+                table = change.get('tablo')
+                spec = SYNC_TABLES.get(table)
+                if spec is None:
+                    continue
+                key_column = spec['anahtar']
+                
+                if change.get('islem') == 'delete':
+                    sql = f"DELETE FROM {table} WHERE user_id = ? AND {key_column} = ?"
+                    params = (user_id, change['anahtar'])
+                else:
+                    data = change.get('veri') or {}
+                    columns = [c for c in spec['sutunlar'] if c in data]
+                    if key_column not in columns:
+                        continue
+                    updates = ', '.join(f"{c} = excluded.{c}" for c in columns if c != key_column)
+                    sql = (
+                        f"INSERT INTO {table} (user_id, {', '.join(columns)}) "
+                        f"VALUES (?, {', '.join('?' * len(columns))}) "
+                        f"ON CONFLICT(user_id, {key_column}) DO UPDATE SET {updates}"
+                    )
+                    params = (user_id, *[data[c] for c in columns])
+                    if update_positions and table == 'transactions':
+                        touch(data.get('sembol'), data.get('tarih'))
+                
+                if sql != batch_sql:
+                    flush()
+                    batch_sql = sql
+                batch_params.append(params)
+                applied += 1
+            flush()
+            
+            if affected_symbols:
+                commission_rate = self._get_commission_rate(user_id)
+                for symbol, tarih in affected_symbols.items():
+                    self._replay_symbol(cursor, user_id, symbol, tarih, commission_rate)
+            
+            # Uygulama sırasında trigger'ların yazdığı günlük kayıtları
+            if not record:
+                cursor.execute("DELETE FROM sync_log WHERE seq > ?", (before_seq,))
+            elif source:
+                cursor.execute("UPDATE sync_log SET kaynak = ? WHERE seq > ?", (source, before_seq))
+            
+            return applied
+    
     # ========== VERİ YÖNETİMİ ==========
     
     def export_data(self, filename, user_id=1):
@@ -1154,18 +1971,16 @@ class Database:
             with open(filename, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
-            for trans in data.get('islemler', []):
-                self.add_transaction(trans, user_id)
-            
-            for div in data.get('temettüler', []):
-                self.add_dividend(div, user_id)
-            
-            # Price alerts varsa ekle
-            for alert in data.get('price_alerts', []):
-                self.add_price_alert(alert, user_id)
-            
-            self.update_settings(data.get('ayarlar', {}), user_id)
-            self.recalculate_portfolio_from_transactions(user_id)
+            # Tüm aktarım tek transaction: ya hepsi yazılır ya hiçbiri
+            with self.get_connection():
+                self.bulk_add_transactions(data.get('islemler', []), user_id, update_positions=False)
+                self.bulk_add_dividends(data.get('temettüler', []), user_id)
+                
+                # Price alerts varsa ekle
+                self.bulk_add_price_alerts(data.get('price_alerts', []), user_id)
+                
+                self.update_settings(data.get('ayarlar', {}), user_id)
+                self.recalculate_portfolio_from_transactions(user_id)
             return True
         except Exception as e:
             print(f"Import hatası: {e}")
@@ -1180,7 +1995,7 @@ class Database:
             cursor.execute("DELETE FROM dividends WHERE user_id = ?", (user_id,))
             cursor.execute("DELETE FROM settings WHERE user_id = ?", (user_id,))
             cursor.execute("DELETE FROM price_alerts WHERE user_id = ?", (user_id,))
-            conn.commit()
+            cursor.execute("DELETE FROM position_checkpoints WHERE user_id = ?", (user_id,))
             return True
     
     # ========== ÖRNEK VERİ ==========
@@ -1222,6 +2037,5 @@ class Database:
                 VALUES (?, ?, ?, ?, ?)
             ''', (user_id, "THYAO", 275.00, "above", "Kar al seviyesi"))
             
-            conn.commit()
             self.recalculate_portfolio_from_transactions(user_id)
             return True
\ No newline at end of file
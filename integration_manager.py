@@ -25,6 +25,23 @@ class IntegrationManager:
         self.tefas_integration = TEFASIntegration(db)
         self.commodity_integration = CommodityIntegration(db)
     
+    def refresh_all_assets(self, user_id: int, callback=None, asset_types=None):
+        """
+        Kripto, fon ve emtia fiyatlarını async katmanla tek geçişte yenile
+        
+        Varlıklar bir kez okunur, fiyatlar tek sembol->fiyat haritasında
+        toplanır ve tek UPDATE transaction'ı ile yazılır.
+        
+        Args:
+            user_id: Kullanıcı ID
+            callback: {(sembol, tür): fiyat} sonucuyla çağrılır (hata durumunda None)
+            asset_types: Sadece bu türler (None ise hepsi)
+        """
+        from async_integration import refresh_all_assets, run_in_background
+        return run_in_background(
+            lambda: refresh_all_assets(self.db, user_id, asset_types=asset_types), callback
+        )
+    
     def get_all_services(self) -> dict:
         """Tüm servisleri döndür"""
         return {
@@ -39,64 +56,32 @@ class IntegrationManager:
     
     def sync_crypto_prices(self, user_id: int, callback=None):
         """Kripto fiyatlarını senkronize et"""
-        def update_prices():
-            assets = self.db.get_assets_by_type('kripto', user_id)
-            
-            for asset in assets:
-                self.crypto_service.get_crypto_price(asset['sembol'].lower(), 
-                    callback=lambda price_data: self._update_asset_price(user_id, asset['sembol'], 'kripto', price_data))
-            
-            if callback:
-                callback()
-        
-        import threading
-        threading.Thread(target=update_prices, daemon=True).start()
+        return self._sync_prices(user_id, 'kripto', callback)
     
     def sync_commodity_prices(self, user_id: int, callback=None):
         """Emtia fiyatlarını senkronize et"""
-        def update_prices():
-            assets = self.db.get_assets_by_type('emtia', user_id)
-            
-            for asset in assets:
-                self.commodity_service.get_commodity_price(asset['sembol'],
-                    callback=lambda price_data: self._update_asset_price(user_id, asset['sembol'], 'emtia', price_data))
-            
-            if callback:
-                callback()
-        
-        import threading
-        threading.Thread(target=update_prices, daemon=True).start()
+        return self._sync_prices(user_id, 'emtia', callback)
     
     def sync_fund_prices(self, user_id: int, callback=None):
         """Fon fiyatlarını senkronize et"""
-        def update_prices():
-            assets = self.db.get_assets_by_type('fon', user_id)
-            
-            for asset in assets:
-                self.tefas_service.get_fund_price(asset['sembol'],
-                    callback=lambda price_data: self._update_asset_price(user_id, asset['sembol'], 'fon', price_data))
-            
-            if callback:
-                callback()
-        
-        import threading
-        threading.Thread(target=update_prices, daemon=True).start()
+        return self._sync_prices(user_id, 'fon', callback)
+    
+    def _sync_prices(self, user_id: int, asset_type: str, callback=None):
+        """Tek tür için toplu yenileme; callback tüm fiyatlar yazıldıktan sonra çağrılır"""
+        return self.refresh_all_assets(
+            user_id,
+            callback=(lambda result: callback()) if callback else None,
+            asset_types=(asset_type,)
+        )
     
     def _update_asset_price(self, user_id: int, symbol: str, asset_type: str, price_data: dict):
-        """Varlık fiyatını güncelle"""
+        """Tek varlığın fiyatını güncelle (varlık listesini yeniden okumadan)"""
         if price_data:
             try:
                 # price_data yapısı API'ye göre farklılık gösterebilir
-                # Burada standart bir yapı kullanıyoruz
                 guncel_fiyat = price_data.get('fiyat', 0) or price_data.get('price', 0)
-                
-                # Veritabanında güncelle
-                assets = self.db.get_assets_by_type(asset_type, user_id)
-                asset = next((a for a in assets if a['sembol'] == symbol.upper()), None)
-                
-                if asset:
-                    asset['guncel_fiyat'] = guncel_fiyat
-                    self.db.add_asset(asset, user_id)
+                if guncel_fiyat:
+                    self.db.update_asset_prices({(symbol.upper(), asset_type): guncel_fiyat}, user_id)
             
             except Exception as e:
                 print(f"Fiyat güncellemesi hatası: {e}")
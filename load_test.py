@@ -0,0 +1,234 @@
+# load_test.py
+"""
+Bulut sunucusu yük testi - çok sayıda eşzamanlı senkronizasyon istemcisi
+Komut: python load_test.py --spawn --clients 50 --duration 30
+       python load_test.py --url http://localhost:5000 --clients 20
+
+Her sanal istemci kendi kullanıcısıyla giriş yapar ve CloudSync'in yaptığı
+istek döngüsünü tekrarlar: değişiklik gönderme, değişiklik çekme, ETag'li
+tam çekme ve sayfalı işlem çekme. Sonunda uç nokta başına p50/p99 gecikme
+raporlanır.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import random
+from collections import defaultdict
+
+import requests
+
+# Her döngüde gönderilen yeni işlem sayısı
+CHANGES_PER_PUSH = 5
+# Sunucunun ayağa kalkması için beklenecek en uzun süre (sn)
+STARTUP_TIMEOUT = 30
+SYMBOLS = ("THYAO", "ASELS", "GARAN", "KCHOL", "SISE", "TUPRS", "BIMAS", "EREGL")
+
+
+class LatencyRecorder:
+    """Uç nokta başına gecikme ve hata sayaçlarını thread-safe topla"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint, seconds, ok):
+        with self._lock:
+            self.samples[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def report(self, elapsed):
+        """Uç nokta başına istek sayısı, hata, p50/p99 ve istek/sn tablosunu yazdır"""
+        print("\n" + "=" * 78)
+        print(f"{'Uç nokta':<34}{'İstek':>8}{'Hata':>7}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+        print("-" * 78)
+        for endpoint in sorted(self.samples):
+            samples = sorted(self.samples[endpoint])
+            print(
+                f"{endpoint:<34}{len(samples):>8}{self.errors[endpoint]:>7}"
+                f"{_percentile(samples, 50) * 1000:>10.1f}{_percentile(samples, 99) * 1000:>10.1f}"
+                f"{len(samples) / elapsed:>9.1f}"
+            )
+        print("=" * 78)
+
+
+def _percentile(sorted_samples, p):
+    """Sıralı örneklerden en yakın sıra yöntemiyle yüzdelik"""
+    if not sorted_samples:
+        return 0.0
+    index = max(0, min(len(sorted_samples) - 1, int(round(p / 100 * len(sorted_samples))) - 1))
+    return sorted_samples[index]
+
+
+def _random_transaction():
+    """Rastgele bir alım işlemi değişikliği üret"""
+    adet = random.randint(1, 100)
+    fiyat = round(random.uniform(10, 500), 2)
+    sync_id = uuid.uuid4().hex
+    return {
+        "tablo": "transactions",
+        "anahtar": sync_id,
+        "islem": "upsert",
+        "veri": {
+            "sync_id": sync_id,
+            "sembol": random.choice(SYMBOLS),
+            "tip": "Alım",
+            "adet": adet,
+            "fiyat": fiyat,
+            "toplam": adet * fiyat,
+            "komisyon": 0,
+            "tarih": f"2024-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}"
+        }
+    }
+
+
+class SyncClient(threading.Thread):
+    """Tek bir cihazın senkronizasyon döngüsünü taklit eden istemci"""
+
+    def __init__(self, base_url, index, recorder, stop_event, think_time):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.recorder = recorder
+        self.stop_event = stop_event
+        self.think_time = think_time
+        self.username = f"load_{index}_{uuid.uuid4().hex[:8]}"
+        self.device_id = uuid.uuid4().hex
+        self.session = requests.Session()
+        self.headers = {}
+        self.pull_seq = 0
+        self.etag = None
+
+    def _call(self, endpoint, method, path, **kwargs):
+        """İsteği gönder ve gecikmeyi kaydet"""
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=60, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        self.recorder.record(endpoint, time.perf_counter() - start, ok)
+        return response
+
+    def login(self):
+        """Kullanıcı oluştur ve token al"""
+        credentials = {"username": self.username, "password": "load-test-pw", "email": f"{self.username}@example.com"}
+        self._call("POST /api/auth/register", "POST", "/api/auth/register", json=credentials)
+        response = self._call("POST /api/auth/login", "POST", "/api/auth/login", json=credentials)
+        if response is None or response.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['token']}"}
+        return True
+
+    def cycle(self):
+        """CloudSync.sync_all_data + pull_data döngüsünün bir turu"""
+        self._call(
+            "POST /api/sync/changes", "POST", "/api/sync/changes", headers=self.headers,
+            json={"device_id": self.device_id, "changes": [_random_transaction() for _ in range(CHANGES_PER_PUSH)]}
+        )
+
+        response = self._call(
+            "GET /api/sync/changes", "GET", "/api/sync/changes", headers=self.headers,
+            params={"since": self.pull_seq, "device_id": self.device_id, "limit": 500}
+        )
+        if response is not None and response.status_code == 200:
+            self.pull_seq = response.json().get("seq", self.pull_seq)
+
+        headers = dict(self.headers)
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        response = self._call("GET /api/pull/all", "GET", "/api/pull/all", headers=headers)
+        if response is not None and response.status_code == 200:
+            self.etag = response.headers.get("ETag")
+
+        self._call(
+            "GET /api/pull/transactions?cursor", "GET", "/api/pull/transactions", headers=self.headers,
+            params={"cursor": 0, "limit": 1000}
+        )
+
+    def run(self):
+        if not self.login():
+            return
+        while not self.stop_event.is_set():
+            self.cycle()
+            if self.think_time:
+                self.stop_event.wait(random.uniform(0, self.think_time))
+
+
+def _spawn_server(port, workers, threads):
+    """Geçici veritabanıyla yerel bir üretim modu sunucusu başlat"""
+    db_file = os.path.join(tempfile.mkdtemp(prefix="hissetakip_load_"), "load.db")
+    env = dict(os.environ, DATABASE_FILE=db_file)
+    server_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
+    process = subprocess.Popen(
+        [sys.executable, server_path, "--prod", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--threads", str(threads)],
+        env=env
+    )
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        try:
+            if requests.get(base_url + "/api/health", timeout=1).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.25)
+
+    process.terminate()
+    raise RuntimeError("Sunucu başlatılamadı")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HisseTakip Cloud Server yük testi")
+    parser.add_argument("--url", default="http://localhost:5000", help="Hedef sunucu (--spawn yoksa)")
+    parser.add_argument("--spawn", action="store_true", help="Geçici veritabanıyla yerel sunucu başlat")
+    parser.add_argument("--port", type=int, default=5055, help="--spawn için port")
+    parser.add_argument("--workers", type=int, default=4, help="--spawn için worker sayısı")
+    parser.add_argument("--threads", type=int, default=8, help="--spawn için worker başına thread")
+    parser.add_argument("--clients", type=int, default=20, help="Eşzamanlı istemci sayısı")
+    parser.add_argument("--duration", type=float, default=30, help="Test süresi (sn)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Turlar arası en fazla bekleme (sn)")
+    args = parser.parse_args()
+
+    process = None
+    base_url = args.url.rstrip("/")
+    if args.spawn:
+        process, base_url = _spawn_server(args.port, args.workers, args.threads)
+
+    recorder = LatencyRecorder()
+    stop_event = threading.Event()
+    clients = [SyncClient(base_url, i, recorder, stop_event, args.think_time) for i in range(args.clients)]
+
+    print(f"🔥 {args.clients} istemci, {args.duration:.0f} sn: {base_url}")
+    try:
+        start = time.perf_counter()
+        for client in clients:
+            client.start()
+        stop_event.wait(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        for client in clients:
+            client.join(timeout=60)
+        elapsed = time.perf_counter() - start
+        if process is not None:
+            # SIGTERM: gunicorn devam eden istekleri bitirip kapanır
+            process.terminate()
+            process.wait(timeout=60)
+
+    recorder.report(elapsed)
+
+
+if __name__ == "__main__":
+    main()
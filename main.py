@@ -3,11 +3,9 @@
 import config
 import customtkinter as ctk
 from tkinter import filedialog
-from datetime import datetime
 import threading
 import sys
 import os
-import time
 from PIL import Image  # <--- EKLENDİ: Resim işlemleri için gerekli
 
 def get_app_path():
@@ -49,13 +47,15 @@ CACHE_DIR = os.path.join(app_dir, "cache")
 LOG_DIR = os.path.join(app_dir, "logs")
 
 from database import Database
-from api_service import APIService
 from auth_service import AuthService
 from cloud_sync import CloudSync
 from credentials_manager import CredentialsManager
 from config import COLORS, DEFAULT_SETTINGS, FONT_SIZES
 from ui_utils import showinfo, showerror, askyesno
-from integration_manager import IntegrationManager
+from utils.portfolio_model import PortfolioModel
+from utils.lazy_loader import PageRegistry, LazyService
+from utils.quote_bus import QuoteBus
+from utils.market_calendar import BistCalendar, RefreshSchedule
 
 # Settings ve Backup Manager
 try:
@@ -73,24 +73,14 @@ except ImportError as e:
     print(f"Price Alert Manager import hatası: {e}")
     PriceAlertManager = None
 
-# Sayfalar
+# Sayfalar: giriş sayfası hemen, diğerleri (matplotlib, pandas, yfinance) ilk açılışta
+# veya arka planda ısıtılarak utils.lazy_loader.PageRegistry ile yüklenir
 from pages.auth_page import AuthPage
-from pages.dashboard_page import DashboardPage
-from pages.portfolio_page import PortfolioPage
-from pages.transactions_page import TransactionsPage
-from pages.analysis_page import AnalysisPage
-from settings import SettingsPage
-from pages.financials_page import FinancialsPage
-from pages.stock_history_page import StockHistoryPage
-from pages.advanced_transactions_page import AdvancedTransactionsPage
-from pages.advanced_analysis_page import AdvancedAnalysisPage
-
-# Price Alert Page
-try:
-    from pages.price_alert_page import PriceAlertPage
-except ImportError as e:
-    print(f"Price Alert Page import hatası: {e}")
-    PriceAlertPage = None
+
+# Giriş ekranı çizildikten sonra arka plan ısıtmasının başlama gecikmesi (ms)
+WARMUP_DELAY_MS = 300
+# Girişten hemen sonra gerekenler; giriş ekranı açıkken ısıtılır
+LOGIN_WARMUP_PAGES = ("dashboard",)
 
 
 class HisseTakipProgrami(ctk.CTk):
@@ -111,11 +101,24 @@ class HisseTakipProgrami(ctk.CTk):
         # Veritabanı ve Servisler
         self.db = Database()
         self.auth = AuthService(self.db)
-        self.api = APIService()
         self.cloud_sync = CloudSync(self.db)
-        self.integration_manager = IntegrationManager(self.db)
         self.credentials_manager = CredentialsManager()
         
+        # Ağır servisler ve sayfa modülleri ilk kullanımda oluşturulur
+        self._api_service = LazyService(self._create_api_service)
+        self._integration_service = LazyService(self._create_integration_manager)
+        self.pages = PageRegistry()
+        
+        # Ortak fiyat veri yolu: portföy ve alarm sembolleri tur başına tek çekimde alınır
+        self.quote_bus = QuoteBus(fetch=lambda symbols: self.api.get_price_snapshot(symbols, use_cache=False))
+        self.quote_bus.subscribe(self.on_quotes)
+        self.market_schedule = None
+        self._asset_refresh_running = threading.Event()
+        
+        # Gözlemlenebilir portföy: fiyat olayları Tk ana döngüsüne aktarılır
+        self.portfolio_model = PortfolioModel(self.db, dispatcher=lambda fn: self.after(0, fn))
+        self.current_page_instance = None
+        
         # Kullanıcı oturumu
         self.current_user_id = None
         self.current_token = None
@@ -156,6 +159,35 @@ class HisseTakipProgrami(ctk.CTk):
         # Kapatma protokolü
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+    # ========== GECİKMELİ SERVİSLER ==========
+    
+    @property
+    def api(self):
+        """APIService (pandas/isyatirimhisse/yfinance) - ilk erişimde oluşturulur"""
+        return self._api_service.get()
+    
+    @property
+    def integration_manager(self):
+        """IntegrationManager - ilk erişimde oluşturulur"""
+        return self._integration_service.get()
+    
+    def _create_api_service(self):
+        from api_service import APIService
+        return APIService()
+    
+    def _create_integration_manager(self):
+        from integration_manager import IntegrationManager
+        return IntegrationManager(self.db)
+    
+    def warm_up_login(self):
+        """Giriş ekranı açıkken girişten hemen sonra gerekecekleri arka planda yükle"""
+        return self.pages.warm(LOGIN_WARMUP_PAGES, services=[self._api_service])
+    
+    def warm_up_remaining(self):
+        """Girişten sonra kalan sayfa ve servisleri arka planda yükle"""
+        remaining = [name for name in self.pages.registry if name not in LOGIN_WARMUP_PAGES]
+        return self.pages.warm(remaining, services=[self._integration_service])
+    
     def show_auth_page(self):
         """Auth sayfasını göster"""
         for widget in self.winfo_children():
@@ -167,6 +199,8 @@ class HisseTakipProgrami(ctk.CTk):
         auth_page = AuthPage(self.auth_frame, self.auth)
         auth_page.on_login_success = self.on_login_success
         auth_page.create()
+        
+        self.after(WARMUP_DELAY_MS, self.warm_up_login)
     
     def on_login_success(self, result):
         """Başarılı giriş sonrası"""
@@ -188,6 +222,8 @@ class HisseTakipProgrami(ctk.CTk):
         if not self.db.get_portfolio(self.current_user_id):
             self.db.add_sample_data(self.current_user_id)
         
+        self.portfolio_model.load(self.current_user_id)
+        
         self.apply_settings()
         
         if self.backup_manager:
@@ -216,11 +252,14 @@ class HisseTakipProgrami(ctk.CTk):
         if self.alert_manager:
             self.start_price_alert_monitoring()
         
+        self.quote_bus.start()
+        
         if self.settings_manager and self.settings_manager.get("cloud_sync_enabled", False):
             self.cloud_sync.start_auto_sync()
 
         self.setup_keyboard_shortcuts()
         self.check_data_loaded()
+        self.after(WARMUP_DELAY_MS, self.warm_up_remaining)
         
     def check_data_loaded(self):
         """Verilerin yüklenip yüklenmediğini kontrol et"""
@@ -243,32 +282,12 @@ class HisseTakipProgrami(ctk.CTk):
         if not self.alert_manager:
             return
         
-        class PriceProvider:
-            def __init__(self, api_service, db, user_id):
-                self.api = api_service
-                self.db = db
-                self.user_id = user_id
-            
-            def get_current_prices(self, symbols):
-                prices = {}
-                import yfinance as yf
-                for symbol in symbols:
-                    try:
-                        stock = yf.Ticker(symbol + ".IS")
-                        hist = stock.history(period="1d")
-                        if not hist.empty:
-                            prices[symbol] = float(hist['Close'].iloc[-1])
-                    except Exception as e:
-                        print(f"Fiyat alma hatası ({symbol}): {e}")
-                return prices
-        
-        provider = PriceProvider(self.api, self.db, self.current_user_id)
-        
         interval = 30
         if self.settings_manager:
             interval = self.settings_manager.get("alert_check_interval", 30)
         
-        self.alert_manager.start_monitoring(provider, interval=interval)
+        # Alarmlar kendi döngüsünde fiyat çekmez; ortak veri yolunun turlarını kontrol eder
+        self.alert_manager.attach_to_bus(self.quote_bus, interval=interval, schedule=self.get_market_schedule())
     
     def get_font_size(self, size_type="normal"):
         if self.settings_manager:
@@ -296,82 +315,114 @@ class HisseTakipProgrami(ctk.CTk):
         except Exception as e:
             print(f"Otomatik yedekleme hatası: {e}")
 
+    def get_market_schedule(self):
+        """BIST takvimine göre seans içi sık, kapanış sonrası tek çekim yapan plan"""
+        if self.market_schedule is None:
+            extra_holidays = []
+            if self.settings_manager:
+                extra_holidays = self.settings_manager.get("market_holidays", []) or []
+            try:
+                calendar = BistCalendar(extra_holidays=extra_holidays)
+            except ValueError as e:
+                print(f"❌ Tatil günü ayarı hatası: {e}")
+                calendar = BistCalendar()
+            self.market_schedule = RefreshSchedule(calendar)
+        return self.market_schedule
+    
     def start_auto_update(self):
+        """Portföy sembollerini ve kripto/fon/emtia varlıklarını ortak fiyat veri yoluna kaydet"""
         self.auto_update_running = True
         
-        def update_loop():
-            while self.auto_update_running:
-                try:
-                    if self.settings_manager:
-                        interval = self.settings_manager.get_update_interval()
-                    else:
-                        interval = 300
-                    
-                    if not isinstance(interval, (int, float)) or interval <= 0:
-                        interval = 300
-                    
-                    for _ in range(int(interval)):
-                        if not self.auto_update_running:
-                            return
-                        time.sleep(1)
-                    
-                    if not self.auto_update_running:
-                        return
-                    
-                    if self.settings_manager:
-                        update_after_hours = self.settings_manager.get("update_after_hours", False)
-                        if isinstance(update_after_hours, str):
-                            update_after_hours = update_after_hours.lower() in ['true', '1', 'yes', 'on']
-                    else:
-                        update_after_hours = False
-                    
-                    if not update_after_hours:
-                        now = datetime.now()
-                        if now.weekday() >= 5 or now.hour < 10 or now.hour >= 18:
-                            continue
-                    
-                    self.after(0, self.auto_update_prices)
-                
-                except Exception as e:
-                    print(f"Güncelleme döngüsü hatası: {e}")
-                    time.sleep(60)
+        if self.settings_manager:
+            update_after_hours = self.settings_manager.get("update_after_hours", False)
+            if isinstance(update_after_hours, str):
+                update_after_hours = update_after_hours.lower() in ['true', '1', 'yes', 'on']
+        else:
+            update_after_hours = False
+        
+        # Seans dışı güncelleme kapalıysa gece ve tatillerde hiç çekim yapılmaz
+        self.quote_bus.add_source(
+            'portfolio',
+            self.portfolio_model.symbols,
+            interval=self.get_update_interval,
+            enabled=lambda: self.auto_update_running,
+            schedule=None if update_after_hours else self.get_market_schedule()
+        )
         
-        threading.Thread(target=update_loop, daemon=True).start()
+        # Varlık fiyatları BIST çekimine girmez (CoinGecko/TEFAS/yfinance); aynı turda
+        # ayrı yenilenir. Kripto 7/24 işlem gördüğü için seans planına bağlanmaz.
+        self.quote_bus.add_source(
+            'assets',
+            None,
+            interval=self.get_update_interval,
+            enabled=lambda: self.auto_update_running,
+            refresh=self.refresh_asset_prices
+        )
     
-    def auto_update_prices(self):
+    def refresh_asset_prices(self):
+        """
+        Kripto, fon ve emtia varlıklarının fiyatlarını arka planda yenile
+        
+        Önceki yenileme sürerken yeni tur başlatılmaz.
+        """
+        if not self.current_user_id or self._asset_refresh_running.is_set():
+            return
+        self._asset_refresh_running.set()
+        
+        def on_done(updates):
+            self._asset_refresh_running.clear()
+            if updates:
+                print(f"✅ {len(updates)} varlık fiyatı güncellendi")
+        
         try:
-            portfolio = self.db.get_portfolio(self.current_user_id)
-            if not portfolio:
-                return
-            
-            import yfinance as yf
-            updated_count = 0
-            
-            for stock in portfolio:
-                try:
-                    ticker = yf.Ticker(f"{stock['sembol']}.IS")
-                    hist = ticker.history(period="1d")
-                    
-                    if not hist.empty:
-                        new_price = float(hist['Close'].iloc[-1])
-                        
-                        with self.db.get_connection() as conn:
-                            cursor = conn.cursor()
-                            cursor.execute('''
-                                UPDATE portfolios 
-                                SET guncel_fiyat = ?, updated_at = CURRENT_TIMESTAMP
-                                WHERE sembol = ? AND user_id = ?
-                            ''', (new_price, stock['sembol'], self.current_user_id))
-                        updated_count += 1
-                except Exception as e:
-                    print(f"Fiyat güncellemesi hatası ({stock['sembol']}): {e}")
-            
-            if updated_count > 0:
-                self.refresh_current_page()
-                print(f"✅ {updated_count} hisse fiyatı güncellendi")
+            self.integration_manager.refresh_all_assets(self.current_user_id, callback=on_done)
+        except Exception:
+            self._asset_refresh_running.clear()
+            raise
+    
+    def get_update_interval(self):
+        """Otomatik güncelleme aralığı (saniye)"""
+        if self.settings_manager:
+            interval = self.settings_manager.get_update_interval()
+        else:
+            interval = 300
         
-        except Exception as e:
-            print(f"Otomatik fiyat güncelleme hatası: {e}")
+        if not isinstance(interval, (int, float)) or interval <= 0:
+            interval = 300
+        return interval
+    
+    def on_quotes(self, snapshot):
+        """
+        Veri yolu abonesi: gelen fiyatları portföye yaz (veri yolu thread'inde çalışır)
+        
+        Args:
+            snapshot: utils.quote_bus.QuoteSnapshot
+        """
+        # Model sadece portföydeki ve fiyatı değişen sembolleri tek transaction'da yazar
+        updated_count = self.portfolio_model.update_prices(snapshot.prices)
+        
+        if updated_count > 0:
+            if not getattr(self.current_page_instance, 'live_updates', False):
+                self.after(0, self.refresh_current_page)
+            print(f"✅ {updated_count} hisse fiyatı güncellendi")
+    
+    def auto_update_prices(self):
+        """
+        Portföy ve varlık fiyatlarını hemen güncelle
+        
+        Ağ çekimi Tk thread'ini bloklamaz: veri yolu turu arka planda çalışır,
+        sonuç on_quotes ile tek transaction'da yazılır ve arayüz bir kez bilgilendirilir.
+        Portföyde hisse olmasa da tur çalışır (kayıtlı varlık kaynağı yenilenir).
+        """
+        symbols = self.portfolio_model.symbols()
+        
+        def run():
+            try:
+                self.quote_bus.tick(force=True, extra_symbols=symbols)
+            except Exception as e:
+                print(f"Otomatik fiyat güncelleme hatası: {e}")
+        
+        threading.Thread(target=run, daemon=True).start()
     
     def refresh_current_page(self):
         if hasattr(self, 'active_page'):
@@ -522,12 +573,8 @@ class HisseTakipProgrami(ctk.CTk):
 
     def shortcut_refresh_prices(self, event=None):
         try:
-            if hasattr(self, 'portfolio_page') and self.portfolio_page:
-                if hasattr(self.portfolio_page, 'update_all_prices'):
-                    self.portfolio_page.update_all_prices()
-            else:
-                self.show_page("portfolio")
-                self.after(200, lambda: self.shortcut_refresh_prices())
+            # Açık sayfa (dashboard/portföy) model olayıyla yerinde güncellenir
+            self.auto_update_prices()
         except Exception as e:
             print(f"❌ Fiyat güncelleme hatası: {e}")
 
@@ -754,23 +801,37 @@ class HisseTakipProgrami(ctk.CTk):
                 self.loading_label.pack(expand=True)
             return
 
+        # Sayfa yeniden kurulurken portföyde yapısal değişiklik olmuş olabilir (işlem, silme, içe aktarma)
+        self.portfolio_model.load(self.current_user_id)
+        
         page_instance = None
         
         try:
+            page_class = self.pages.get(page_name) if page_name in self.pages.registry else None
+            if page_class is None and page_name != "price_alerts":
+                error_label = ctk.CTkLabel(
+                    self.main_frame, 
+                    text=f"⚠️ Sayfa modülü yüklenemedi:\n\n{self.pages.error(page_name) or page_name}", 
+                    font=ctk.CTkFont(size=14),
+                    text_color=COLORS["warning"]
+                )
+                error_label.pack(expand=True)
+                return
+            
             if page_name == "dashboard":
-                page_instance = DashboardPage(
+                page_instance = page_class(
                     self.main_frame, self.db, self.api, self.current_theme, 
                     self.currency_cache, self.index_cache
                 )
             elif page_name == "portfolio":
-                page_instance = PortfolioPage(self.main_frame, self.db, self.api, self.current_theme)
+                page_instance = page_class(self.main_frame, self.db, self.api, self.current_theme)
                 self.portfolio_page = page_instance
             elif page_name == "transactions":
-                page_instance = TransactionsPage(self.main_frame, self.db, self.api, self.current_theme)
+                page_instance = page_class(self.main_frame, self.db, self.api, self.current_theme)
             elif page_name == "analysis":
-                page_instance = AnalysisPage(self.main_frame, self.db, self.api, self.current_theme)
+                page_instance = page_class(self.main_frame, self.db, self.api, self.current_theme)
             elif page_name == "price_alerts":
-                if PriceAlertPage and self.alert_manager:
+                if page_class and self.alert_manager:
                     app_callbacks = {
                         'get_settings_manager': lambda: self.settings_manager,
                         'get_backup_manager': lambda: self.backup_manager,
@@ -779,7 +840,7 @@ class HisseTakipProgrami(ctk.CTk):
                         'show_shortcuts_help': self.show_shortcuts_help,
                         'reload_shortcuts': self.reload_shortcuts
                     }
-                    page_instance = PriceAlertPage(self.main_frame, self.db, app_callbacks)
+                    page_instance = page_class(self.main_frame, self.db, app_callbacks)
                 else:
                     error_label = ctk.CTkLabel(
                         self.main_frame, 
@@ -790,13 +851,13 @@ class HisseTakipProgrami(ctk.CTk):
                     error_label.pack(expand=True)
                     return
             elif page_name == "financial":
-                page_instance = FinancialsPage(self.main_frame, self.db, self.api, self.current_theme)
+                page_instance = page_class(self.main_frame, self.db, self.api, self.current_theme)
             elif page_name == "history":
-                page_instance = StockHistoryPage(self.main_frame, self.db, self.api, self.current_theme)
+                page_instance = page_class(self.main_frame, self.db, self.api, self.current_theme)
             elif page_name == "adv_transactions":
-                page_instance = AdvancedTransactionsPage(self.main_frame, self.db, self.current_theme)
+                page_instance = page_class(self.main_frame, self.db, self.current_theme)
             elif page_name == "adv_analysis":
-                page_instance = AdvancedAnalysisPage(self.main_frame, self.db, self.current_theme)
+                page_instance = page_class(self.main_frame, self.db, self.current_theme, api=self.api)
             elif page_name == "settings":
                 app_callbacks = {
                     'toggle_theme': self.toggle_theme,
@@ -808,8 +869,9 @@ class HisseTakipProgrami(ctk.CTk):
                     'get_api_service': lambda: self.api,
                     'user_id': self.current_user_id
                 }
-                page_instance = SettingsPage(self.main_frame, self.db, app_callbacks)
+                page_instance = page_class(self.main_frame, self.db, app_callbacks)
             
+            self.current_page_instance = page_instance
             if page_instance:
                 page_instance.create()
         
@@ -853,6 +915,7 @@ class HisseTakipProgrami(ctk.CTk):
     def reload_app(self):
         try:
             self.auto_update_running = False
+            self.quote_bus.stop()
             if self.alert_manager:
                 self.alert_manager.stop_monitoring()
             
@@ -882,6 +945,7 @@ class HisseTakipProgrami(ctk.CTk):
     def on_closing(self):
         try:
             self.auto_update_running = False
+            self.quote_bus.stop()
             if self.alert_manager:
                 self.alert_manager.stop_monitoring()
             
@@ -897,6 +961,10 @@ class HisseTakipProgrami(ctk.CTk):
             self.destroy()
 
 if __name__ == "__main__":
+    # Monte Carlo süreç havuzu: dondurulmuş sürümde çocuk süreçlerin arayüzü yeniden açmaması için
+    import multiprocessing
+    multiprocessing.freeze_support()
+    
     try:
         app = HisseTakipProgrami()
         app.mainloop()
@@ -6,6 +6,8 @@ Gelişmiş Analiz Sayfası - Monte Carlo, Hedef Analizi, Vergi Optimizasyonu
 import matplotlib
 matplotlib.use('TkAgg')
 
+import os
+import threading
 import customtkinter as ctk
 from tkinter import ttk, messagebox
 from datetime import datetime
@@ -16,12 +18,19 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from ui_utils import showinfo, showerror
 
+# Çok varlıklı simülasyonda kovaryans tahmini için kullanılan geçmiş (gün)
+PORTFOLIO_MC_HISTORY_DAYS = 365
+
+
 class AdvancedAnalysisPage:
-    def __init__(self, parent, db, theme):
+    def __init__(self, parent, db, theme, api=None):
         self.parent = parent
         self.db = db
         self.theme = theme
+        self.api = api
         self.current_user_id = 1
+        self.mc_cancel_event = None
+        self.mc_canvas = None
     
     def get_bg_color(self):
         """Tema rengine göre arka plan rengi döndür"""
@@ -114,7 +123,7 @@ class AdvancedAnalysisPage:
         self.mc_sims_entry.insert(0, "10000")
         
         # Hesapla butonu
-        calc_btn = ctk.CTkButton(
+        self.mc_calc_btn = ctk.CTkButton(
             left_panel,
             text="🔢 Hesapla",
             command=self.run_monte_carlo,
@@ -123,7 +132,24 @@ class AdvancedAnalysisPage:
             fg_color=COLORS["primary"],
             hover_color=COLORS["primary"]
         )
-        calc_btn.pack(fill="x", padx=15, pady=15)
+        self.mc_calc_btn.pack(fill="x", padx=15, pady=(15, 5))
+        
+        # Portföyden (çok varlıklı, korelasyonlu) simülasyon butonu
+        self.mc_portfolio_btn = ctk.CTkButton(
+            left_panel,
+            text="📊 Portföyümü Simüle Et",
+            command=self.run_portfolio_monte_carlo,
+            width=180,
+            height=40,
+            fg_color=COLORS["success"],
+            hover_color=COLORS["success"]
+        )
+        self.mc_portfolio_btn.pack(fill="x", padx=15, pady=(5, 15))
+        
+        # İlerleme çubuğu
+        self.mc_progress = ctk.CTkProgressBar(left_panel, width=180)
+        self.mc_progress.pack(fill="x", padx=15, pady=(0, 15))
+        self.mc_progress.set(0)
         
         # Sağ panel - Sonuçlar
         right_panel = ctk.CTkFrame(frame, fg_color=self.get_bg_color(), corner_radius=8)
@@ -144,7 +170,11 @@ class AdvancedAnalysisPage:
             font=ctk.CTkFont(size=11),
             text_color=("gray60", "gray40")
         )
-        self.mc_results_label.pack(fill="both", expand=True, padx=15, pady=15, anchor="nw")
+        self.mc_results_label.pack(fill="x", padx=15, pady=15, anchor="nw")
+        
+        # Günlük persentil bantları grafiği
+        self.mc_chart_frame = ctk.CTkFrame(right_panel, fg_color="transparent")
+        self.mc_chart_frame.pack(fill="both", expand=True, padx=15, pady=(0, 15))
     
     def create_goal_analysis_tab(self):
         """Hedef Analizi sekmesi"""
@@ -322,25 +352,184 @@ class AdvancedAnalysisPage:
         self.tax_results_label.pack(fill="both", expand=True, padx=15, pady=15, anchor="nw")
     
     def run_monte_carlo(self):
-        """Monte Carlo simülasyonu çalıştır"""
+        """Monte Carlo simülasyonunu arka planda çalıştır"""
         try:
             current_value = float(self.mc_value_entry.get())
             daily_return = float(self.mc_return_entry.get())
             std_dev = float(self.mc_std_entry.get())
             days = int(self.mc_days_entry.get())
             simulations = int(self.mc_sims_entry.get())
+        except ValueError:
+            showerror("Hata", "Lütfen geçerli sayı değerleri girin")
+            return
+        
+        if days <= 0 or simulations <= 0:
+            showerror("Hata", "Gün ve simülasyon sayısı pozitif olmalıdır")
+            return
+        
+        # Önceki simülasyon sürüyorsa iptal et
+        if self.mc_cancel_event is not None:
+            self.mc_cancel_event.set()
+        cancel_event = threading.Event()
+        self.mc_cancel_event = cancel_event
+        
+        self._set_mc_running(True)
+        
+        def on_progress(progress):
+            self.parent.after(0, lambda: self._update_mc_progress(progress, cancel_event))
+        
+        def on_done(result):
+            self.parent.after(0, lambda: self._show_monte_carlo_result(result, cancel_event))
+        
+        # Simülasyon çalıştır
+        AdvancedAnalysisService.monte_carlo_simulation_async(
+            current_value,
+            daily_return,
+            std_dev,
+            days,
+            simulations,
+            callback=on_done,
+            progress_callback=on_progress,
+            cancel_event=cancel_event,
+            workers=os.cpu_count() or 1
+        )
+    
+    def run_portfolio_monte_carlo(self):
+        """Portföydeki tüm varlıkları birlikte (korelasyonlu) simüle et"""
+        try:
+            days = int(self.mc_days_entry.get())
+            simulations = int(self.mc_sims_entry.get())
+        except ValueError:
+            showerror("Hata", "Lütfen geçerli sayı değerleri girin")
+            return
+        
+        if days <= 0 or simulations <= 0:
+            showerror("Hata", "Gün ve simülasyon sayısı pozitif olmalıdır")
+            return
+        
+        if self.mc_cancel_event is not None:
+            self.mc_cancel_event.set()
+        cancel_event = threading.Event()
+        self.mc_cancel_event = cancel_event
+        
+        self._set_mc_running(True)
+        self.mc_results_label.configure(text="Portföy fiyat geçmişi yükleniyor...")
+        
+        def on_progress(progress):
+            # İlk %20 veri yükleme için ayrıldı
+            self.parent.after(0, lambda: self._update_mc_progress(0.2 + 0.8 * progress, cancel_event))
+        
+        def worker():
+            result = None
+            error = None
+            try:
+                result = self._simulate_portfolio(days, simulations, on_progress, cancel_event)
+            except Exception as e:
+                error = str(e)
             
-            # Simülasyon çalıştır
-            result = AdvancedAnalysisService.monte_carlo_simulation(
-                current_value,
-                daily_return,
-                std_dev,
-                days,
-                simulations
-            )
+            if error:
+                self.parent.after(0, lambda: self._show_portfolio_mc_error(error, cancel_event))
+            else:
+                self.parent.after(0, lambda: self._show_monte_carlo_result(result, cancel_event))
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _simulate_portfolio(self, days, simulations, progress_callback, cancel_event):
+        """
+        Portföy verilerini yükle ve çok varlıklı simülasyonu çalıştır (worker thread)
+        
+        Returns:
+            dict: Simülasyon sonuçları
+        """
+        from utils.metrics import PortfolioMetrics
+        
+        portfolio = [
+            stock for stock in (self.db.get_portfolio(self.current_user_id) or [])
+            if stock.get('adet', 0) > 0
+        ]
+        if not portfolio:
+            raise ValueError("Portföyde simüle edilecek varlık yok")
+        
+        # Kovaryans PortfolioMetrics'in paylaşılan fiyat matrisinden tahmin edilir
+        metrics = PortfolioMetrics(portfolio, [], self.api)
+        matrix = metrics.get_price_matrix(PORTFOLIO_MC_HISTORY_DAYS)
+        if matrix is None or matrix.num_observations < 20:
+            raise ValueError("Simülasyon için yeterli fiyat geçmişi bulunamadı")
+        
+        values_by_symbol = {}
+        for stock in portfolio:
+            value = stock['adet'] * (stock.get('guncel_fiyat') or stock['ort_maliyet'])
+            values_by_symbol[stock['sembol']] = values_by_symbol.get(stock['sembol'], 0) + value
+        
+        values = np.array([values_by_symbol[symbol] for symbol in matrix.symbols])
+        static_value = sum(values_by_symbol.values()) - values.sum()
+        
+        # Fiyat geçmişi yüklenirken iptal edildiyse süreç havuzunu hiç açma
+        if cancel_event.is_set():
+            return None
+        
+        if progress_callback:
+            progress_callback(0)
+        
+        result = AdvancedAnalysisService.portfolio_monte_carlo(
+            list(matrix.symbols),
+            values,
+            matrix.returns,
+            days,
+            simulations,
+            static_value=static_value,
+            # Süreç havuzu dondurulmuş sürümde de güvenli: main.py freeze_support() çağırır
+            workers=os.cpu_count() or 1,
+            progress_callback=progress_callback,
+            cancel_event=cancel_event
+        )
+        if result:
+            result['gecmissiz_semboller'] = [s for s in values_by_symbol if s not in matrix.symbols]
+        return result
+    
+    def _show_portfolio_mc_error(self, message, cancel_event):
+        """Çok varlıklı simülasyon hatasını göster (UI thread)"""
+        if cancel_event is not self.mc_cancel_event:
+            return
+        self.mc_cancel_event = None
+        self._set_mc_running(False)
+        self.mc_results_label.configure(text=f"Simülasyon çalıştırılamadı:\n{message}")
+    
+    def _set_mc_running(self, running):
+        """Simülasyon butonlarının durumunu ayarla"""
+        try:
+            state = "disabled" if running else "normal"
+            self.mc_calc_btn.configure(state=state, text="⏳ Hesaplanıyor..." if running else "🔢 Hesapla")
+            self.mc_portfolio_btn.configure(state=state)
+            if running:
+                self.mc_progress.set(0)
+        except Exception:
+            pass  # Sayfa kapatılmış olabilir
+    
+    def _update_mc_progress(self, progress, cancel_event):
+        """İlerleme çubuğunu güncelle (UI thread)"""
+        if cancel_event is not self.mc_cancel_event:
+            return
+        try:
+            self.mc_progress.set(progress)
+        except Exception:
+            pass  # Sayfa kapatılmış olabilir
+    
+    def _show_monte_carlo_result(self, result, cancel_event):
+        """Simülasyon sonucunu göster (UI thread)"""
+        if cancel_event is not self.mc_cancel_event:
+            return  # Yerini yeni bir simülasyona bırakmış
+        self.mc_cancel_event = None
+        
+        try:
+            self._set_mc_running(False)
             
-            if result:
-                text = f"""
+            if not result:
+                showerror("Hata", "Monte Carlo simülasyonu tamamlanamadı")
+                return
+            
+            self.mc_progress.set(1)
+            text = f"""
 Monte Carlo Simülasyonu Sonuçları
 ═════════════════════════════════════
 
@@ -353,6 +542,7 @@ Standart Sapma: {result['std_sapma']:,.2f}₺
 
 En Kötü Senaryo: {result['min_degeri']:,.2f}₺
 En İyi Senaryo: {result['max_degeri']:,.2f}₺
+Zarar Olasılığı: %{result['kayip_olasiligi']:.1f}
 
 Güven Aralıkları:
   5. Persentil: {result['percentil_5']:,.2f}₺
@@ -361,14 +551,57 @@ Güven Aralıkları:
   95. Persentil: {result['percentil_95']:,.2f}₺
 
 Toplam Simülasyon: {result['simulasyon_sayisi']:,}
-                """
-                
-                self.mc_results_label.configure(text=text)
-        
-        except ValueError:
-            showerror("Hata", "Lütfen geçerli sayı değerleri girin")
+            """
+            
+            if 'varlik_katkilari' in result:
+                text += self._format_tail_contributions(result)
+            
+            self.mc_results_label.configure(text=text)
+            self._draw_monte_carlo_bands(result['gunluk_bantlar'])
         except Exception as e:
-            showerror("Hata", str(e))
+            print(f"❌ Monte Carlo sonuç gösterme hatası: {e}")
+    
+    def _format_tail_contributions(self, result):
+        """Varlık bazlı kuyruk kaybı katkılarını metne dönüştür"""
+        text = f"""
+Kuyruk Riski (en kötü %{result['kuyruk_esigi']})
+───────────────────────────────────────
+VaR: {result['var']:,.2f}₺
+CVaR (Beklenen Kayıp): {result['cvar']:,.2f}₺
+
+Varlık Bazlı Kuyruk Kaybı Katkısı:
+"""
+        for item in result['varlik_katkilari']:
+            text += f"  {item['sembol']:<8} {item['kuyruk_kaybi']:>14,.2f}₺  (%{item['katki_yuzde']:.1f})\n"
+        
+        if result.get('gecmissiz_semboller'):
+            text += f"\nFiyat geçmişi olmadığı için sabit alınanlar: {', '.join(result['gecmissiz_semboller'])}\n"
+        
+        return text
+    
+    def _draw_monte_carlo_bands(self, bands):
+        """Günlük persentil bantlarını çiz"""
+        if self.mc_canvas is not None:
+            self.mc_canvas.get_tk_widget().destroy()
+            plt.close(self.mc_canvas.figure)
+            self.mc_canvas = None
+        
+        fig, ax = plt.subplots(figsize=(7, 3.5), dpi=90)
+        days = np.arange(len(bands[50]))
+        
+        ax.fill_between(days, bands[5], bands[95], color=COLORS["primary"], alpha=0.15, label="%5 - %95")
+        ax.fill_between(days, bands[25], bands[75], color=COLORS["primary"], alpha=0.35, label="%25 - %75")
+        ax.plot(days, bands[50], color=COLORS["primary"], linewidth=2, label="Medyan")
+        
+        ax.set_xlabel("Gün")
+        ax.set_ylabel("Portföy Değeri (₺)")
+        ax.grid(True, alpha=0.3)
+        ax.legend(loc="upper left", fontsize=8)
+        fig.tight_layout()
+        
+        self.mc_canvas = FigureCanvasTkAgg(fig, self.mc_chart_frame)
+        self.mc_canvas.draw()
+        self.mc_canvas.get_tk_widget().pack(fill="both", expand=True)
     
     def run_goal_analysis(self):
         """Hedef analizi çalıştır"""
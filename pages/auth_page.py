@@ -5,7 +5,6 @@ Giriş ve Kayıt Sayfası
 
 import customtkinter as ctk
 from tkinter import messagebox
-import threading
 from auth_service import AuthService
 from database import Database
 from credentials_manager import CredentialsManager
@@ -93,14 +92,20 @@ class AuthPage:
                 messagebox.showerror("Hata", "Lütfen tüm alanları doldurun")
                 return
             
-            # Asenkron giriş
-            def login_thread():
-                result = self.auth.login_user(username, password)
-                if result['success'] and remember_var.get():
+            # Asenkron giriş: şifre doğrulama auth havuzunda, sonuç ana döngüye aktarılır
+            remember = remember_var.get()
+            login_btn.configure(state="disabled")
+            
+            def login_done(future):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"success": False, "error": str(e)}
+                if result['success'] and remember:
                     self.credentials_manager.save_credentials(username, password)
-                self.parent.after(0, lambda: self._handle_login_result(result))
+                self.parent.after(0, lambda: self._handle_login_result(result, login_btn))
             
-            threading.Thread(target=login_thread, daemon=True).start()
+            self.auth.login_user_async(username, password).add_done_callback(login_done)
         
         login_btn = ctk.CTkButton(
             parent,
@@ -178,12 +183,17 @@ class AuthPage:
                 messagebox.showerror("Hata", "Şifreler uyuşmuyor")
                 return
             
-            # Asenkron kayıt
-            def register_thread():
-                result = self.auth.register_user(username, email, password)
-                self.parent.after(0, lambda: self._handle_register_result(result))
+            # Asenkron kayıt: şifre hash'i auth havuzunda
+            register_btn.configure(state="disabled")
+            
+            def register_done(future):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"success": False, "error": str(e)}
+                self.parent.after(0, lambda: self._handle_register_result(result, register_btn))
             
-            threading.Thread(target=register_thread, daemon=True).start()
+            self.auth.register_user_async(username, email, password).add_done_callback(register_done)
         
         register_btn = ctk.CTkButton(
             parent,
@@ -225,8 +235,10 @@ class AuthPage:
         self.frame.destroy()
         self.create()
     
-    def _handle_login_result(self, result):
+    def _handle_login_result(self, result, button=None):
         """Giriş sonucunu işle"""
+        if button is not None and button.winfo_exists():
+            button.configure(state="normal")
         if result['success']:
             messagebox.showinfo("Başarılı", "Giriş başarılı! Uygulama yüklenecek...")
             # Callback çağır (eğer varsa)
@@ -235,8 +247,10 @@ class AuthPage:
         else:
             messagebox.showerror("Giriş Hatası", result.get('error', 'Bilinmeyen hata'))
     
-    def _handle_register_result(self, result):
+    def _handle_register_result(self, result, button=None):
         """Kayıt sonucunu işle"""
+        if button is not None and button.winfo_exists():
+            button.configure(state="normal")
         if result['success']:
             messagebox.showinfo("Başarılı", "Kayıt başarılı! Lütfen giriş yapın.")
             self._switch_to_login()
@@ -7,6 +7,7 @@ import customtkinter as ctk
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 from datetime import datetime
+import math
 import random
 import threading
 from config import COLORS
@@ -31,6 +32,15 @@ class DashboardPage:
         self.market_timer = None
         self.currency_container = None
         self.index_container = None
+        
+        # Canlı fiyat güncellemesi: yerinde güncellenecek widget ve grafik nesneleri
+        self.live_updates = True
+        self.kpi_widgets = {}
+        self.pie_chart = None
+        self.perf_chart = None
+        self.quick_stats_frame = None
+        self.ranking_frame = None
+        self._unsubscribe = None
     
     def create(self):
         self.main_container = ctk.CTkFrame(self.parent, fg_color="transparent")
@@ -52,6 +62,11 @@ class DashboardPage:
         self.create_indices_row()
         self.create_stats_row()
         self.create_charts_row()
+        
+        model = self.get_portfolio_model()
+        if model:
+            self._unsubscribe = model.subscribe(self.on_portfolio_change)
+            self.main_container.bind("<Destroy>", lambda e: self._unsubscribe(), add="+")
     
     # ========== HEADER & CLOCK ==========
     
@@ -273,8 +288,6 @@ class DashboardPage:
                     showerror("Hata", "İşlem kaydedilemedi!")
                     return
                 
-                self.db.recalculate_portfolio_from_transactions(user_id)
-                
                 showinfo("Başarılı", f"✅ Alım işlemi kaydedildi: {sembol}")
                 dialog.destroy()
                 self.refresh_dashboard()
@@ -601,8 +614,6 @@ class DashboardPage:
                     showerror("Hata", "İşlem kaydedilemedi!")
                     return
                 
-                self.db.recalculate_portfolio_from_transactions(user_id)
-                
                 showinfo("Başarılı", 
                         f"✅ Satış işlemi tamamlandı: {sembol}\n\n"
                         f"📊 {miktar} adet x {fiyat:.2f}₺\n"
@@ -739,29 +750,21 @@ class DashboardPage:
                 total = len(portfolio)
                 updated = 0
                 
-                import yfinance as yf
+                self.parent.after(0, lambda: [pbar.set(0.3), status.configure(text=f"{total} hisse için fiyatlar alınıyor...")])
+                prices = self.api.update_all_prices([stock['sembol'] for stock in portfolio])
+                self.parent.after(0, lambda: [pbar.set(0.8), status.configure(text="Kaydediliyor...")])
                 
-                for i, stock in enumerate(portfolio):
-                    self.parent.after(0, lambda p=(i+1)/total, s=stock['sembol'], idx=i+1: [pbar.set(p), status.configure(text=f"{s} ({idx}/{total})")])
-                    
-                    try:
-                        ticker = yf.Ticker(f"{stock['sembol']}.IS")
-                        hist = ticker.history(period="1d")
-                        
-                        if not hist.empty:
-                            price = float(hist['Close'].iloc[-1])
-                            
-                            with self.db.get_connection() as conn:
-                                conn.cursor().execute('UPDATE portfolios SET guncel_fiyat=?, updated_at=CURRENT_TIMESTAMP WHERE sembol=? AND user_id=?', (price, stock['sembol'], user_id))
-                            
-                            updated += 1
-                    
-                    except Exception as e:
-                        print(f"Hata ({stock['sembol']}): {e}")
+                model = self.get_portfolio_model()
+                if model:
+                    # Model tek transaction'da yazar; sayfa olayla yerinde güncellenir
+                    model.update_prices(prices)
+                    updated = len(prices)
+                else:
+                    updated = self.db.update_portfolio_prices(prices, user_id)
+                    self.parent.after(2000, self.refresh_dashboard)
                 
                 self.parent.after(0, lambda: [status.configure(text=f"✅ {updated}/{total} güncellendi"), pbar.set(1)])
                 self.parent.after(1800, progress.destroy)
-                self.parent.after(2000, self.refresh_dashboard)
             
             except Exception as e:
                 self.parent.after(0, lambda: [status.configure(text=f"❌ {e}"), progress.after(2000, progress.destroy)])
@@ -1102,7 +1105,8 @@ class DashboardPage:
         top_frame = ctk.CTkFrame(content, fg_color="transparent")
         top_frame.grid(row=0, column=0, sticky="ew")
         
-        ctk.CTkLabel(top_frame, text=kpi["icon"], font=ctk.CTkFont(size=22)).pack(side="left", padx=(0, 8))
+        icon_label = ctk.CTkLabel(top_frame, text=kpi["icon"], font=ctk.CTkFont(size=22))
+        icon_label.pack(side="left", padx=(0, 8))
         ctk.CTkLabel(top_frame, text=kpi["title"], font=ctk.CTkFont(size=11), text_color=("gray50", "gray60")).pack(side="left")
         
         value_frame = ctk.CTkFrame(content, fg_color="transparent")
@@ -1112,9 +1116,12 @@ class DashboardPage:
         value_label.pack(expand=True, anchor="center")
         
         if kpi["title"] in ["Bugün", "Toplam K/Z"]:
-            ctk.CTkLabel(content, text=kpi["subtitle"], font=ctk.CTkFont(size=13, weight="bold"), text_color=kpi["color"]).grid(row=2, column=0, sticky="s", pady=(0, 5))
+            subtitle_label = ctk.CTkLabel(content, text=kpi["subtitle"], font=ctk.CTkFont(size=13, weight="bold"), text_color=kpi["color"])
         else:
-            ctk.CTkLabel(content, text=kpi["subtitle"], font=ctk.CTkFont(size=11), text_color=("gray60", "gray50")).grid(row=2, column=0, sticky="s", pady=(0, 5))
+            subtitle_label = ctk.CTkLabel(content, text=kpi["subtitle"], font=ctk.CTkFont(size=11), text_color=("gray60", "gray50"))
+        subtitle_label.grid(row=2, column=0, sticky="s", pady=(0, 5))
+        
+        self.kpi_widgets[kpi["title"]] = {"icon": icon_label, "value": value_label, "subtitle": subtitle_label}
     
     # ========== STATS ROW ==========
     
@@ -1128,6 +1135,7 @@ class DashboardPage:
         
         quick_stats = ctk.CTkFrame(stats_container, corner_radius=8, fg_color=("gray85", "gray17"))
         quick_stats.grid(row=0, column=0, sticky="nsew", padx=(0, 3))
+        self.quick_stats_frame = quick_stats
         self.create_quick_stats(quick_stats)
         
         recent = ctk.CTkFrame(stats_container, corner_radius=8, fg_color=("gray85", "gray17"))
@@ -1228,6 +1236,7 @@ class DashboardPage:
         
         rank_frame = ctk.CTkFrame(charts_container, corner_radius=10, fg_color=("gray90", "gray13"))
         rank_frame.grid(row=0, column=2, sticky="nsew", padx=2)
+        self.ranking_frame = rank_frame
         self.create_ranking(rank_frame)
     
     def create_pie_chart(self, parent):
@@ -1254,6 +1263,7 @@ class DashboardPage:
                 at.set_color('white')
             
             ax.axis('equal')
+            self.pie_chart = {"labels": labels, "wedges": wedges, "texts": texts, "autotexts": autotexts}
         else:
             ax.text(0.5, 0.5, 'Portföyde hisse yok', ha='center', va='center', transform=ax.transAxes, fontsize=11, color='gray')
             ax.axis('off')
@@ -1267,6 +1277,9 @@ class DashboardPage:
         bg = '#2b2b2b' if self.theme == "dark" else '#ebebeb'
         cw.configure(bg=bg, highlightthickness=0)
         cw.pack(fill="both", expand=True, padx=5, pady=(0, 5))
+        
+        if self.pie_chart:
+            self.pie_chart["canvas"] = canvas
     
     def create_performance_chart(self, parent):
         ctk.CTkLabel(parent, text="📈 Performans (%)", font=ctk.CTkFont(size=13, weight="bold")).pack(pady=10, padx=12, anchor="w")
@@ -1291,10 +1304,11 @@ class DashboardPage:
             
             colors = [COLORS["success"] if p >= 0 else COLORS["danger"] for p in performances]
             bars = ax.barh(symbols, performances, color=colors, height=0.6)
+            self.perf_chart = {"ax": ax, "bars": {}}
             
-            for bar, perf in zip(bars, performances):
+            for symbol, bar, perf in zip(symbols, bars, performances):
                 width = bar.get_width()
-                ax.text(width + (0.5 if width > 0 else -0.5), bar.get_y() + bar.get_height()/2, f'{perf:.1f}%', ha='left' if width > 0 else 'right', va='center', fontsize=8, weight='bold', color=COLORS["success"] if perf >= 0 else COLORS["danger"])
+                self.perf_chart["bars"][symbol] = bar, ax.text(width + (0.5 if width > 0 else -0.5), bar.get_y() + bar.get_height()/2, f'{perf:.1f}%', ha='left' if width > 0 else 'right', va='center', fontsize=8, weight='bold', color=COLORS["success"] if perf >= 0 else COLORS["danger"])
             
             ax.axvline(x=0, color='gray', linestyle='--', linewidth=1, alpha=0.5)
             ax.set_xlabel('Performans (%)', fontsize=9, weight='bold')
@@ -1320,6 +1334,9 @@ class DashboardPage:
         bg = '#2b2b2b' if self.theme == "dark" else '#ebebeb'
         cw.configure(bg=bg, highlightthickness=0)
         cw.pack(fill="both", expand=True, padx=5, pady=(0, 5))
+        
+        if self.perf_chart:
+            self.perf_chart["canvas"] = canvas
     
     def create_ranking(self, parent):
         ctk.CTkLabel(parent, text="🏆 Sıralama", font=ctk.CTkFont(size=13, weight="bold")).pack(pady=10, padx=12, anchor="w")
@@ -1377,6 +1394,98 @@ class DashboardPage:
             ctk.CTkLabel(c, text=symbol, font=ctk.CTkFont(size=10, weight="bold")).pack(side="left", padx=5, fill="x", expand=True)
             ctk.CTkLabel(c, text=f"{perf:+.2f}%", font=ctk.CTkFont(size=10, weight="bold"), text_color=color).pack(side="right")
     
+    # ========== CANLI GÜNCELLEME ==========
+    
+    def on_portfolio_change(self, change):
+        """Portföy modelinden gelen fiyat olayında sadece etkilenen öğeleri güncelle"""
+        if change.yapisal or not self.main_container.winfo_exists():
+            # Yapısal değişikliklerde sayfa show_page ile yeniden kurulur
+            return
+        
+        portfolio = self.get_portfolio_model().get_portfolio()
+        self._patch_kpis(portfolio)
+        self._patch_pie_chart(portfolio)
+        self._patch_performance_chart(portfolio, change.semboller)
+        
+        for frame, builder in ((self.quick_stats_frame, self.create_quick_stats), (self.ranking_frame, self.create_ranking)):
+            if frame and frame.winfo_exists():
+                for widget in frame.winfo_children():
+                    widget.destroy()
+                builder(frame)
+    
+    def _patch_kpis(self, portfolio):
+        """Fiyata bağlı KPI kartlarını (Portföy Değeri, Toplam K/Z) güncelle"""
+        toplam_yatirim = sum(h["adet"] * h["ort_maliyet"] for h in portfolio)
+        portfoy_deger = sum(h["adet"] * h.get("guncel_fiyat", h["ort_maliyet"]) for h in portfolio)
+        toplam_kar_zarar = portfoy_deger - toplam_yatirim
+        kar_zarar_yuzde = (toplam_kar_zarar / toplam_yatirim * 100) if toplam_yatirim > 0 else 0
+        
+        value_card = self.kpi_widgets.get("Portföy Değeri")
+        if value_card:
+            value_card["value"].configure(text=f"{portfoy_deger:,.0f} ₺")
+        
+        pl_card = self.kpi_widgets.get("Toplam K/Z")
+        if pl_card:
+            color = COLORS["success"] if toplam_kar_zarar >= 0 else COLORS["danger"]
+            pl_card["icon"].configure(text="💎" if toplam_kar_zarar >= 0 else "⚠️")
+            pl_card["value"].configure(text=f"{abs(toplam_kar_zarar):,.0f} ₺", text_color=color)
+            pl_card["subtitle"].configure(text=f"{kar_zarar_yuzde:+.2f}%", text_color=color)
+    
+    def _patch_pie_chart(self, portfolio):
+        """Pasta dilimlerinin açılarını, etiket ve yüzde konumlarını yerinde güncelle"""
+        chart = self.pie_chart
+        if not chart or "canvas" not in chart:
+            return
+        
+        values = {h["sembol"]: h["adet"] * h.get("guncel_fiyat", h["ort_maliyet"]) for h in portfolio}
+        sizes = [values.get(label, 0) for label in chart["labels"]]
+        total = sum(sizes)
+        if total <= 0:
+            return
+        
+        # ax.pie ile aynı geometri: startangle=90, labeldistance=1.1, pctdistance=0.85
+        theta1 = 90.0
+        for wedge, text, autotext, size in zip(chart["wedges"], chart["texts"], chart["autotexts"], sizes):
+            frac = size / total
+            theta2 = theta1 + 360.0 * frac
+            wedge.set_theta1(theta1)
+            wedge.set_theta2(theta2)
+            
+            thetam = math.radians((theta1 + theta2) / 2)
+            x, y = math.cos(thetam), math.sin(thetam)
+            text.set_position((1.1 * x, 1.1 * y))
+            text.set_horizontalalignment('left' if x > 0 else 'right')
+            autotext.set_position((0.85 * x, 0.85 * y))
+            autotext.set_text(f"{frac * 100:.1f}%")
+            theta1 = theta2
+        
+        chart["canvas"].draw_idle()
+    
+    def _patch_performance_chart(self, portfolio, changed):
+        """Sadece fiyatı değişen sembollerin çubuklarını güncelle"""
+        chart = self.perf_chart
+        if not chart or "canvas" not in chart:
+            return
+        
+        for h in portfolio:
+            if h["sembol"] not in changed or h["sembol"] not in chart["bars"]:
+                continue
+            bar, label = chart["bars"][h["sembol"]]
+            guncel = h.get("guncel_fiyat", h["ort_maliyet"])
+            perf = ((guncel - h["ort_maliyet"]) / h["ort_maliyet"] * 100)
+            color = COLORS["success"] if perf >= 0 else COLORS["danger"]
+            
+            bar.set_width(perf)
+            bar.set_color(color)
+            label.set_position((perf + (0.5 if perf > 0 else -0.5), bar.get_y() + bar.get_height()/2))
+            label.set_horizontalalignment('left' if perf > 0 else 'right')
+            label.set_text(f'{perf:.1f}%')
+            label.set_color(color)
+        
+        chart["ax"].relim()
+        chart["ax"].autoscale_view(scaley=False)
+        chart["canvas"].draw_idle()
+    
     # ========== HELPER METHODS ==========
     
     def calculate_daily_change(self):
@@ -1411,6 +1520,13 @@ class DashboardPage:
             root = root.master
         return getattr(root, 'current_user_id', 1)
     
+    def get_portfolio_model(self):
+        """Gözlemlenebilir portföy modelini al"""
+        root = self.parent
+        while root.master:
+            root = root.master
+        return getattr(root, 'portfolio_model', None)
+    
     def get_backup_manager(self):
         """Backup Manager al"""
         root = self.parent
@@ -5,6 +5,7 @@ import yfinance as yf
 from config import COLORS
 import re
 from ui_utils import showinfo, showerror, askyesno
+from utils.virtual_table import ColumnStore, VirtualTable
 import csv
 
 def format_rate_display(rate):
@@ -36,6 +37,14 @@ class PortfolioPage:
         self.search_var = None
         self.sort_combo = None
         
+        # Portföy satırları bellekte sütun olarak tutulur; arama/sıralama DB'ye gitmez
+        self.store = ColumnStore()
+        
+        # Canlı fiyat güncellemesi: özet kartları ve satırlar yerinde güncellenir
+        self.live_updates = True
+        self.summary_labels = {}
+        self._unsubscribe = None
+        
     # YENİ: User ID alma metodu
     def get_user_id(self):
         """Aktif kullanıcı ID'sini al"""
@@ -43,10 +52,16 @@ class PortfolioPage:
         while root.master:
             root = root.master
         return getattr(root, 'current_user_id', 1)
-        
+    
+    def get_portfolio_model(self):
+        """Gözlemlenebilir portföy modelini al"""
+        root = self.parent
+        while root.master:
+            root = root.master
+        return getattr(root, 'portfolio_model', None)
         
     def create(self):
-        self.main_container = ctk.CTkScrollableFrame(self.parent, fg_color="transparent")
+        self.main_container = ctk.CTkFrame(self.parent, fg_color="transparent")
         self.main_container.pack(fill="both", expand=True)
         
         self.create_header()
@@ -56,10 +71,24 @@ class PortfolioPage:
         
         self.create_filter_bar()
         
-        self.list_container = ctk.CTkFrame(self.main_container, fg_color="transparent")
+        # Sanal tablo: sadece görünen satırlar kadar widget oluşturur, kendi kaydırma çubuğu var
+        self.list_container = VirtualTable(
+            self.main_container,
+            headers=["Sembol", "Adet", "Ort.Maliyet", "Güncel Fiyat", "Top.Maliyet", "Güncel Değer", "Kar/Zarar", "İşlemler"],
+            weights=[8, 6, 8, 8, 10, 10, 13, 17],
+            build_row=self._build_row,
+            fill_row=self._fill_row,
+            row_height=46,
+            empty_text="Portföyde hisse yok"
+        )
         self.list_container.pack(fill="both", expand=True)
         
         self.refresh_ui()
+        
+        model = self.get_portfolio_model()
+        if model:
+            self._unsubscribe = model.subscribe(self.on_portfolio_change)
+            self.main_container.bind("<Destroy>", lambda e: self._unsubscribe(), add="+")
 
     def create_header(self):
         header_frame = ctk.CTkFrame(self.main_container, fg_color="transparent")
@@ -71,6 +100,32 @@ class PortfolioPage:
     def refresh_ui(self):
         self.refresh_summary()
         self.refresh_list()
+    
+    def on_portfolio_change(self, change):
+        """Fiyat olayında özet kartlarını ve satırları yeniden kurmadan güncelle"""
+        if not self.main_container or not self.main_container.winfo_exists():
+            return
+        
+        if change.yapisal:
+            self.refresh_ui()
+            return
+        
+        portfolio = self.get_portfolio_model().get_portfolio()
+        total_inv = sum(h["adet"] * h["ort_maliyet"] for h in portfolio)
+        curr_val = sum(h["adet"] * h.get("guncel_fiyat", h["ort_maliyet"]) for h in portfolio)
+        pl = curr_val - total_inv
+        pl_p = (pl / total_inv * 100) if total_inv > 0 else 0
+        
+        if "Güncel Değer" in self.summary_labels:
+            self.summary_labels["Güncel Değer"][0].configure(text=f"{curr_val:,.2f} ₺")
+        if "Kar/Zarar" in self.summary_labels:
+            value_label, subtitle_label = self.summary_labels["Kar/Zarar"]
+            value_label.configure(text=f"{pl:,.2f} ₺", text_color=COLORS["success"] if pl >= 0 else COLORS["danger"])
+            subtitle_label.configure(text=f"{pl_p:+.2f}%")
+        
+        # Sütunlar yeni fiyatlarla hesaplanır; kaydırma konumu korunur ve sadece görünen satırlar yeniden doldurulur
+        self._load_store(portfolio)
+        self.apply_list_view(keep_position=True)
 
     def refresh_summary(self):
         if not self.summary_container or not self.summary_container.winfo_exists():
@@ -78,6 +133,7 @@ class PortfolioPage:
         
         for widget in self.summary_container.winfo_children():
             widget.destroy()
+        self.summary_labels = {}
         
         # USER ID AL
         user_id = self.get_user_id()
@@ -128,11 +184,15 @@ class PortfolioPage:
             ctk.CTkLabel(card, text=t, font=ctk.CTkFont(size=12), 
                         text_color="gray").pack(pady=(12, 5))
             
-            ctk.CTkLabel(card, text=v, font=ctk.CTkFont(size=20, weight="bold"), 
-                        text_color=c).pack(pady=3)
+            value_label = ctk.CTkLabel(card, text=v, font=ctk.CTkFont(size=20, weight="bold"), 
+                        text_color=c)
+            value_label.pack(pady=3)
             
-            ctk.CTkLabel(card, text=s, font=ctk.CTkFont(size=10), 
-                        text_color="gray").pack(pady=(0, 12))
+            subtitle_label = ctk.CTkLabel(card, text=s, font=ctk.CTkFont(size=10), 
+                        text_color="gray")
+            subtitle_label.pack(pady=(0, 12))
+            
+            self.summary_labels[t] = (value_label, subtitle_label)
 
     def create_filter_bar(self):
         filter_frame = ctk.CTkFrame(self.main_container, fg_color="transparent")
@@ -144,13 +204,13 @@ class PortfolioPage:
         self.search_entry = ctk.CTkEntry(filter_frame, placeholder_text="Ara...", 
                                          width=200, textvariable=self.search_var)
         self.search_entry.pack(side="left", padx=(0, 15))
-        self.search_var.trace("w", lambda *args: self.refresh_list())
+        self.search_var.trace("w", lambda *args: self.apply_list_view())
         
         ctk.CTkLabel(filter_frame, text="Sırala:", font=ctk.CTkFont(size=13)).pack(side="left", padx=(0, 5))
         
         self.sort_combo = ctk.CTkComboBox(filter_frame, 
                                           values=["Varsayılan", "Sembol A-Z", "Sembol Z-A", "Kar↓", "Zarar↓"], 
-                                          width=140, command=lambda x: self.refresh_list())
+                                          width=140, command=lambda x: self.apply_list_view())
         self.sort_combo.set("Varsayılan")
         self.sort_combo.pack(side="left")
 
@@ -159,95 +219,95 @@ class PortfolioPage:
         return text.translate(tr_map).upper()
 
     def refresh_list(self):
+        """Portföyü veritabanından yükle, sütunları hesapla ve tabloyu güncelle"""
         if not self.list_container or not self.list_container.winfo_exists():
             return
         
-        for w in self.list_container.winfo_children():
-            w.destroy()
-        
         # USER ID AL
         user_id = self.get_user_id()    
         
-        portfolio = self.db.get_portfolio(user_id)
+        self._load_store(self.db.get_portfolio(user_id))
+        self.apply_list_view()
+    
+    def _load_store(self, portfolio):
+        def profit(h):
+            return (h.get("guncel_fiyat", h["ort_maliyet"]) - h["ort_maliyet"]) * h["adet"]
+        
+        self.store.set_records(portfolio, {
+            "sembol": lambda h: h["sembol"],
+            "arama": lambda h: h["sembol"].upper(),
+            "kar": profit,
+        })
+    
+    def apply_list_view(self, keep_position=False):
+        """Arama ve sıralamayı bellekteki sütunlar üzerinde uygula"""
+        if not self.list_container or not self.list_container.winfo_exists():
+            return
         
+        filters = {}
         if self.search_var and self.search_var.get():
             s = self.search_var.get().upper()
-            portfolio = [h for h in portfolio if s in h["sembol"].upper()]
+            filters["arama"] = lambda value: s in value
         
+        sort_by, reverse = None, False
         if self.sort_combo:
             sort_map = {
                 "Sembol A-Z": ("sembol", False),
                 "Sembol Z-A": ("sembol", True),
-                "Kar↓": (lambda x: (x.get("guncel_fiyat", x["ort_maliyet"]) - x["ort_maliyet"]) * x["adet"], True),
-                "Zarar↓": (lambda x: (x.get("guncel_fiyat", x["ort_maliyet"]) - x["ort_maliyet"]) * x["adet"], False)
+                "Kar↓": ("kar", True),
+                "Zarar↓": ("kar", False)
             }
-            sort_option = self.sort_combo.get()
-            if sort_option in sort_map:
-                key, reverse = sort_map[sort_option]
-                portfolio.sort(key=key if isinstance(key, str) else lambda x: key(x), reverse=reverse)
+            sort_by, reverse = sort_map.get(self.sort_combo.get(), (None, False))
         
-        grid_frame = ctk.CTkFrame(self.list_container, fg_color="transparent")
-        grid_frame.pack(fill="x", expand=True)
+        self.list_container.set_rows(self.store.query(filters, sort_by, reverse), keep_position=keep_position)
 
-        headers = ["Sembol", "Adet", "Ort.Maliyet", "Güncel Fiyat", "Top.Maliyet", "Güncel Değer", "Kar/Zarar", "İşlemler"]
-        weights = [8, 6, 8, 8, 10, 10, 13, 17]
+    def _build_row(self, parent):
+        """Tekrar kullanılacak bir satırın widget'larını oluştur"""
+        row = {
+            "sembol": ctk.CTkLabel(parent, text="", font=ctk.CTkFont(size=14, weight="bold")),
+            "adet": ctk.CTkLabel(parent, text=""),
+            "maliyet": ctk.CTkLabel(parent, text=""),
+            "fiyat": ctk.CTkLabel(parent, text=""),
+            "toplam_maliyet": ctk.CTkLabel(parent, text=""),
+            "deger": ctk.CTkLabel(parent, text=""),
+            "kar": ctk.CTkLabel(parent, text="", font=ctk.CTkFont(size=12, weight="bold")),
+        }
+        for col, key in enumerate(["sembol", "adet", "maliyet", "fiyat", "toplam_maliyet", "deger", "kar"]):
+            row[key].grid(row=0, column=col, sticky="nsew")
         
-        for i, w in enumerate(weights):
-            grid_frame.grid_columnconfigure(i, weight=w)
-
-        header_bg = ctk.CTkFrame(grid_frame, fg_color=("gray75", "gray25"), corner_radius=8, height=40)
-        header_bg.grid(row=0, column=0, columnspan=len(headers), sticky="nsew", pady=(0, 5))
+        btn_frame = ctk.CTkFrame(parent, fg_color="transparent")
+        btn_frame.grid(row=0, column=7, sticky="ew", padx=3)
         
-        for i, h_text in enumerate(headers):
-            ctk.CTkLabel(grid_frame, text=h_text, font=ctk.CTkFont(size=12, weight="bold"), 
-                        bg_color=header_bg.cget("fg_color")).grid(row=0, column=i, sticky="nsew", padx=5)
+        # Butonlar o an satıra bağlı kaydı kullanır (satır widget'ı yeniden kullanılır)
+        ctk.CTkButton(btn_frame, text="Sat", width=40, height=26, 
+                     command=lambda: self.sell_stock(row["kayit"]), 
+                     fg_color=COLORS["warning"]).pack(side="left", padx=2, pady=5)
         
-        if not portfolio:
-            ctk.CTkLabel(grid_frame, text="Portföyde hisse yok", 
-                        text_color="gray").grid(row=1, column=0, columnspan=len(headers), pady=50)
-            return
-
-        for row_idx, stock in enumerate(portfolio, start=1):
-            self.create_row(grid_frame, stock, row_idx)
+        ctk.CTkButton(btn_frame, text="↻", width=28, height=26, 
+                     command=lambda: self.update_price(row["kayit"])).pack(side="left", padx=2, pady=5)
+        
+        ctk.CTkButton(btn_frame, text="✕", width=28, height=26, 
+                     command=lambda: self.delete_stock(row["kayit"]), 
+                     fg_color=COLORS["danger"]).pack(side="left", padx=2, pady=5)
+        return row
 
-    def create_row(self, parent, stock, row_idx):
+    def _fill_row(self, row, stock):
+        """Satır widget'larını verilen hisseyle güncelle"""
         g = stock.get("guncel_fiyat", stock["ort_maliyet"])
         tm = stock["adet"] * stock["ort_maliyet"]
         tv = stock["adet"] * g
         kz = tv - tm
         kz_p = (kz / tm * 100) if tm > 0 else 0
         
-        ctk.CTkLabel(parent, text=stock["sembol"], 
-                    font=ctk.CTkFont(size=14, weight="bold")).grid(row=row_idx, column=0, sticky="nsew", pady=10)
-        
-        ctk.CTkLabel(parent, text=f"{stock['adet']:,}").grid(row=row_idx, column=1, sticky="nsew")
-        
-        ctk.CTkLabel(parent, text=f"{stock['ort_maliyet']:.2f} ₺").grid(row=row_idx, column=2, sticky="nsew")
-        
-        ctk.CTkLabel(parent, text=f"{g:.2f} ₺").grid(row=row_idx, column=3, sticky="nsew")
-        
-        ctk.CTkLabel(parent, text=f"{tm:,.0f} ₺").grid(row=row_idx, column=4, sticky="nsew")
-        
-        ctk.CTkLabel(parent, text=f"{tv:,.0f} ₺").grid(row=row_idx, column=5, sticky="nsew")
+        row["sembol"].configure(text=stock["sembol"])
+        row["adet"].configure(text=f"{stock['adet']:,}")
+        row["maliyet"].configure(text=f"{stock['ort_maliyet']:.2f} ₺")
+        row["fiyat"].configure(text=f"{g:.2f} ₺")
+        row["toplam_maliyet"].configure(text=f"{tm:,.0f} ₺")
+        row["deger"].configure(text=f"{tv:,.0f} ₺")
         
         color = COLORS["success"] if kz >= 0 else COLORS["danger"]
-        kz_label = ctk.CTkLabel(parent, text=f"{kz:,.0f}₺ ({kz_p:+.1f}%)", 
-                                font=ctk.CTkFont(size=12, weight="bold"), text_color=color)
-        kz_label.grid(row=row_idx, column=6, sticky="nsew")
-        
-        btn_frame = ctk.CTkFrame(parent, fg_color="transparent")
-        btn_frame.grid(row=row_idx, column=7, sticky="ew", padx=3)
-        
-        ctk.CTkButton(btn_frame, text="Sat", width=40, height=26, 
-                     command=lambda s=stock: self.sell_stock(s), 
-                     fg_color=COLORS["warning"]).pack(side="left", padx=2, pady=5)
-        
-        ctk.CTkButton(btn_frame, text="↻", width=28, height=26, 
-                     command=lambda s=stock: self.update_price(s)).pack(side="left", padx=2, pady=5)
-        
-        ctk.CTkButton(btn_frame, text="✕", width=28, height=26, 
-                     command=lambda s=stock: self.delete_stock(s), 
-                     fg_color=COLORS["danger"]).pack(side="left", padx=2, pady=5)
+        row["kar"].configure(text=f"{kz:,.0f}₺ ({kz_p:+.1f}%)", text_color=color)
 
     def _create_validated_entry(self, parent, **kwargs):
         entry = ctk.CTkEntry(parent, **kwargs)
@@ -265,7 +325,12 @@ class PortfolioPage:
         return entry
 
     def _trigger_update(self):
-        self.refresh_ui()
+        model = self.get_portfolio_model()
+        if model:
+            # Yapısal değişiklik olayı bu sayfayı da yeniler
+            model.load()
+        else:
+            self.refresh_ui()
         if self.data_changed_callback:
             self.data_changed_callback()
 
@@ -390,9 +455,6 @@ class PortfolioPage:
                     "tarih": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 })
                 
-                # Portföyü yeniden hesapla
-                self.db.recalculate_portfolio_from_transactions()
-                
                 # Bilgilendirme mesajında komisyon göster
                 showinfo("Başarılı", 
                         f"✅ Alım işlemi kaydedildi\n\n"
@@ -473,9 +535,6 @@ class PortfolioPage:
                     "tarih": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 }, user_id=user_id)  # ✅ user_id eklendi
                 
-                # Portföyü yeniden hesapla - USER ID İLE
-                self.db.recalculate_portfolio_from_transactions(user_id)  # ✅ user_id eklendi
-                
                 # Kar/Zarar hesapla - komisyon etkisini dahil et
                 kar_zarar = (fiyat - stock['ort_maliyet']) * adet
                 net_kazanc = kar_zarar - komisyon
@@ -687,17 +746,9 @@ class PortfolioPage:
             h = t.history(period="1d")
             
             if not h.empty:
-                new_price = h['Close'].iloc[-1]
-                # DB'ye güncel fiyatı kaydet
-                with self.db.get_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('''
-                        UPDATE portfolios 
-                        SET guncel_fiyat = ? 
-                        WHERE sembol = ?
-                    ''', (new_price, stock['sembol']))
+                new_price = float(h['Close'].iloc[-1])
+                self._save_prices({stock['sembol']: new_price})
                 showinfo("✓", f"{stock['sembol']}\n{new_price:.2f} ₺")
-                self.refresh_ui()
             else:
                 showerror("Hata", "Fiyat alınamadı!")
         except Exception as e:
@@ -823,24 +874,23 @@ class PortfolioPage:
         if not portfolio:
             return showinfo("Bilgi", "Portföy boş!")
         
-        updated = 0
-        for s in portfolio:
-            try:
-                t = yf.Ticker(f"{s['sembol']}.IS")
-                h = t.history(period="1d")
-                if not h.empty:
-                    new_price = h['Close'].iloc[-1]
-                    # DB'ye güncel fiyatı kaydet
-                    with self.db.get_connection() as conn:
-                        cursor = conn.cursor()
-                        cursor.execute('''
-                            UPDATE portfolios 
-                            SET guncel_fiyat = ? 
-                            WHERE sembol = ? AND user_id = ?
-                        ''', (new_price, s['sembol'], user_id))  # ✅ user_id eklendi
-                    updated += 1
-            except:
-                pass
+        prices = self.api.update_all_prices([s['sembol'] for s in portfolio])
+        
+        try:
+            self._save_prices(prices)
+            updated = len(prices)
+        except Exception as e:
+            print(f"❌ Fiyat kaydetme hatası: {e}")
+            updated = 0
         
         showinfo("✓", f"{updated}/{len(portfolio)} güncellendi!")
+    
+    def _save_prices(self, prices):
+        """Fiyatları model üzerinden tek transaction'da yaz (sayfa olayla güncellenir)"""
+        model = self.get_portfolio_model()
+        if model:
+            model.update_prices(prices)
+            return
+        
+        self.db.update_portfolio_prices(prices, self.get_user_id())
         self.refresh_ui()
\ No newline at end of file
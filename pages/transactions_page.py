@@ -4,6 +4,7 @@ import customtkinter as ctk
 from datetime import datetime
 from config import COLORS
 from ui_utils import askyesno, showinfo, showerror
+from utils.virtual_table import ColumnStore, VirtualTable
 
 def format_rate_display(rate):
     """Komisyon oranını kullanıcıya uygun formatta gösterme"""
@@ -27,6 +28,9 @@ class TransactionsPage:
         self.list_container = None
         self.filter_combo = None
         self.sort_combo = None
+        
+        # İşlem + temettü satırları bellekte sütun olarak tutulur; filtre/sıralama DB'ye gitmez
+        self.store = ColumnStore()
     
     # ✅ YENİ: User ID alma metodu
     def get_user_id(self):
@@ -58,23 +62,30 @@ class TransactionsPage:
         filter_frame.pack(fill="x", pady=(0, 15), padx=5)
         
         ctk.CTkLabel(filter_frame, text="Filtrele:", font=ctk.CTkFont(size=14)).pack(side="left", padx=(0, 10))
-        self.filter_combo = ctk.CTkComboBox(filter_frame, values=["Tümü", "Alım", "Satış", "Temettü"], width=150, command=lambda _: self.display_transactions())
+        self.filter_combo = ctk.CTkComboBox(filter_frame, values=["Tümü", "Alım", "Satış", "Temettü"], width=150, command=lambda _: self.apply_list_view())
         self.filter_combo.set("Tümü")
         self.filter_combo.pack(side="left", padx=(0, 20))
         
         ctk.CTkLabel(filter_frame, text="Sırala:", font=ctk.CTkFont(size=14)).pack(side="left", padx=(0, 10))
-        self.sort_combo = ctk.CTkComboBox(filter_frame, values=["Yeni → Eski", "Eski → Yeni", "Tutar (Yüksek → Düşük)"], width=200, command=lambda _: self.display_transactions())
+        self.sort_combo = ctk.CTkComboBox(filter_frame, values=["Yeni → Eski", "Eski → Yeni", "Tutar (Yüksek → Düşük)"], width=200, command=lambda _: self.apply_list_view())
         self.sort_combo.set("Yeni → Eski")
         self.sort_combo.pack(side="left")
 
     def create_list_container(self):
-        self.list_container = ctk.CTkScrollableFrame(self.main_frame, fg_color="transparent")
+        # Sanal tablo: binlerce işlemde sadece görünen satırlar kadar widget oluşturur
+        self.list_container = VirtualTable(
+            self.main_frame,
+            headers=["Tarih", "Tip", "Sembol", "Adet", "Fiyat", "Toplam", "İşlemler"],
+            weights=[10, 10, 10, 8, 10, 18, 15],
+            build_row=self._build_row,
+            fill_row=self._fill_row,
+            row_height=54,
+            empty_text="Filtreye uygun işlem bulunamadı."
+        )
         self.list_container.pack(fill="both", expand=True, padx=5)
 
     def display_transactions(self):
-        for widget in self.list_container.winfo_children():
-            widget.destroy()
-        
+        """İşlem ve temettüleri veritabanından yükle, sütunları hesapla ve tabloyu güncelle"""
         # ✅ USER ID AL
         user_id = self.get_user_id()
         
@@ -94,52 +105,66 @@ class TransactionsPage:
                 "komisyon": 0
             })
         
+        # ✅ SIRALAMADA TARİH DÜZELTMESİ - tarih bir kez datetime'a çevrilir
+        def get_datetime(transaction):
+            try:
+                tarih_str = transaction.get("tarih", "1970-01-01 00:00:00")
+                return datetime.fromisoformat(tarih_str.replace(" ", "T"))
+            except:
+                return datetime(1970, 1, 1)
+        
+        self.store.set_records(all_transactions, {
+            "tip": lambda t: t.get("tip"),
+            "tarih": get_datetime,
+            "toplam": lambda t: t.get("toplam", 0),
+        })
+        self.apply_list_view()
+
+    def apply_list_view(self, keep_position=False):
+        """Filtre ve sıralamayı bellekteki sütunlar üzerinde uygula"""
+        filters = {}
         filter_type = self.filter_combo.get()
         if filter_type != "Tümü":
-            all_transactions = [t for t in all_transactions if t.get("tip") == filter_type]
+            filters["tip"] = lambda tip: tip == filter_type
         
-        # ✅ SIRALAMADA TARİH DÜZELTMESİ
         sort_option = self.sort_combo.get()
         reverse_sort = sort_option in ["Yeni → Eski", "Tutar (Yüksek → Düşük)"]
+        sort_by = "toplam" if "Tutar" in sort_option else "tarih"
         
-        if "Tutar" in sort_option:
-            # Tutara göre sırala
-            all_transactions.sort(key=lambda x: x.get("toplam", 0), reverse=reverse_sort)
-        else:
-            # Tarihe göre sırala - datetime'a çevirerek
-            def get_datetime(transaction):
-                try:
-                    tarih_str = transaction.get("tarih", "1970-01-01 00:00:00")
-                    return datetime.fromisoformat(tarih_str.replace(" ", "T"))
-                except:
-                    return datetime(1970, 1, 1)
-            
-            all_transactions.sort(key=get_datetime, reverse=reverse_sort)
-        
-        grid_frame = ctk.CTkFrame(self.list_container, fg_color="transparent")
-        grid_frame.pack(fill="x", expand=True)
+        self.list_container.set_rows(self.store.query(filters, sort_by, reverse_sort), keep_position)
 
-        headers = ["Tarih", "Tip", "Sembol", "Adet", "Fiyat", "Toplam", "İşlemler"]
-        weights = [10, 10, 10, 8, 10, 18, 15] 
+    def _build_row(self, parent):
+        """Tekrar kullanılacak bir satırın widget'larını oluştur"""
+        row = {
+            "tarih": ctk.CTkLabel(parent, text="", font=ctk.CTkFont(size=12)),
+            "tip": ctk.CTkLabel(parent, text="", font=ctk.CTkFont(size=13, weight="bold")),
+            "sembol": ctk.CTkLabel(parent, text="", font=ctk.CTkFont(size=13, weight="bold")),
+            "adet": ctk.CTkLabel(parent, text=""),
+            "fiyat": ctk.CTkLabel(parent, text=""),
+        }
+        for col, key in enumerate(["tarih", "tip", "sembol", "adet", "fiyat"]):
+            row[key].grid(row=0, column=col, sticky="nsew")
         
-        for i, w in enumerate(weights): 
-            grid_frame.grid_columnconfigure(i, weight=w)
-
-        header_bg = ctk.CTkFrame(grid_frame, fg_color=("gray75", "gray25"), corner_radius=8, height=40)
-        header_bg.grid(row=0, column=0, columnspan=len(headers), sticky="nsew", pady=(0, 5))
+        total_container = ctk.CTkFrame(parent, fg_color="transparent")
+        total_container.grid(row=0, column=5, sticky="nsew", pady=5)
+        row["toplam"] = ctk.CTkLabel(total_container, text="", font=ctk.CTkFont(size=12, weight="bold"))
+        row["toplam"].pack()
+        row["detay"] = ctk.CTkLabel(total_container, text="", font=ctk.CTkFont(size=9))
         
-        for i, h_text in enumerate(headers):
-            ctk.CTkLabel(grid_frame, text=h_text, font=ctk.CTkFont(size=12, weight="bold"), bg_color=header_bg.cget("fg_color")).grid(row=0, column=i, sticky="nsew", padx=5)
-
-        if not all_transactions:
-            ctk.CTkLabel(grid_frame, text="Filtreye uygun işlem bulunamadı.", text_color="gray").grid(row=1, column=0, columnspan=len(headers), pady=50)
-            return
-
-        for row_idx, transaction in enumerate(all_transactions, start=1):
-            self.create_transaction_row(grid_frame, transaction, row_idx)
-
+        # İşlem butonları - o an satıra bağlı kaydı kullanır
+        btn_frame = ctk.CTkFrame(parent, fg_color="transparent")
+        btn_frame.grid(row=0, column=6, sticky="ew")
+        
+        ctk.CTkButton(btn_frame, text="Düzenle", width=60, height=28, 
+                     command=lambda: self.edit_transaction(row["kayit"]), 
+                     fg_color=COLORS["primary"]).pack(side="left", padx=5)
+        ctk.CTkButton(btn_frame, text="Sil", width=40, height=28, 
+                     command=lambda: self.delete_transaction(row["kayit"]), 
+                     fg_color=COLORS["danger"]).pack(side="left", padx=5)
+        return row
 
-    def create_transaction_row(self, parent, transaction, row_idx):
+    def _fill_row(self, row, transaction):
+        """Satır widget'larını verilen işlemle güncelle"""
         tip = transaction.get("tip", "Bilinmiyor")
         
         # ✅ Renk düzenlemesi - Alım için yeşil, Satış için sarı
@@ -162,63 +187,28 @@ class TransactionsPage:
         brut_tutar = transaction.get("toplam", 0)
         komisyon = transaction.get("komisyon", 0)
         
-        # Her işlem tipi için düzenli gösterim
-        if tip == "Alım":
-            net_tutar = brut_tutar + komisyon
-            
-            if komisyon > 0:
-                total_text = f"{net_tutar:,.2f} ₺"
-                detail_text = f"İşlem: {brut_tutar:,.2f} ₺ | Komisyon: {komisyon:.2f} ₺"
-            else:
-                total_text = f"{brut_tutar:,.2f} ₺"
-                detail_text = None
-                
-        elif tip == "Satış":
-            net_tutar = brut_tutar - komisyon
-            
-            if komisyon > 0:
-                total_text = f"{net_tutar:,.2f} ₺"
-                detail_text = f"İşlem: {brut_tutar:,.2f} ₺ | Komisyon: {komisyon:.2f} ₺"
-            else:
-                total_text = f"{brut_tutar:,.2f} ₺"
-                detail_text = None
-                
-        else:  # Temettü
+        # Alım/Satış'ta komisyon varsa net tutar ve detay gösterilir
+        if tip in ("Alım", "Satış") and komisyon > 0:
+            net_tutar = brut_tutar + komisyon if tip == "Alım" else brut_tutar - komisyon
+            total_text = f"{net_tutar:,.2f} ₺"
+            detail_text = f"İşlem: {brut_tutar:,.2f} ₺ | Komisyon: {komisyon:.2f} ₺"
+        else:
             total_text = f"{brut_tutar:,.2f} ₺"
             detail_text = None
-               
-        # Label'lar
-        ctk.CTkLabel(parent, text=tarih_text, font=ctk.CTkFont(size=12)).grid(row=row_idx, column=0, sticky="nsew", pady=10)
-        ctk.CTkLabel(parent, text=tip, font=ctk.CTkFont(size=13, weight="bold"), text_color=type_color).grid(row=row_idx, column=1, sticky="nsew")
-        ctk.CTkLabel(parent, text=transaction.get("sembol", "-"), font=ctk.CTkFont(size=13, weight="bold")).grid(row=row_idx, column=2, sticky="nsew")
-        ctk.CTkLabel(parent, text=adet_text).grid(row=row_idx, column=3, sticky="nsew")
-        ctk.CTkLabel(parent, text=fiyat_text).grid(row=row_idx, column=4, sticky="nsew")
         
-        # ✅ RENK DÜZELTMESİ - Tüm satırlar aynı renkte
-        total_container = ctk.CTkFrame(parent, fg_color="transparent")
-        total_container.grid(row=row_idx, column=5, sticky="nsew", pady=5)
-        
-        # Ana tutar - type_color ile
-        ctk.CTkLabel(total_container, text=total_text, 
-                    font=ctk.CTkFont(size=12, weight="bold"), 
-                    text_color=type_color).pack()  # ✅ type_color
+        row["tarih"].configure(text=tarih_text)
+        row["tip"].configure(text=tip, text_color=type_color)
+        row["sembol"].configure(text=transaction.get("sembol", "-"))
+        row["adet"].configure(text=adet_text)
+        row["fiyat"].configure(text=fiyat_text)
+        row["toplam"].configure(text=total_text, text_color=type_color)
         
         # Detay varsa göster - AYNI RENKTE
         if detail_text:
-            ctk.CTkLabel(total_container, text=detail_text, 
-                        font=ctk.CTkFont(size=9), 
-                        text_color=type_color).pack()  # ✅ type_color (gri yerine)
-
-        # İşlem butonları
-        btn_frame = ctk.CTkFrame(parent, fg_color="transparent")
-        btn_frame.grid(row=row_idx, column=6, sticky="ew")
-        
-        ctk.CTkButton(btn_frame, text="Düzenle", width=60, height=28, 
-                     command=lambda t=transaction: self.edit_transaction(t), 
-                     fg_color=COLORS["primary"]).pack(side="left", padx=5)
-        ctk.CTkButton(btn_frame, text="Sil", width=40, height=28, 
-                     command=lambda t=transaction: self.delete_transaction(t), 
-                     fg_color=COLORS["danger"]).pack(side="left", padx=5)
+            row["detay"].configure(text=detail_text, text_color=type_color)
+            row["detay"].pack()
+        else:
+            row["detay"].pack_forget()
     
     def delete_transaction(self, transaction):
         tip = transaction.get("tip")
@@ -248,8 +238,9 @@ class TransactionsPage:
                         WHERE tarih = ? AND toplam = ? AND user_id = ?
                     ''', (tarih, transaction.get("toplam"), user_id))  # ✅ user_id eklendi
             
-            # ✅ DÜZELTİLMİŞ - user_id ile
-            self.db.recalculate_portfolio_from_transactions(user_id)
+            # Sadece bu sembolün bu tarihten sonraki pozisyonu yeniden hesaplanır
+            if tip != "Temettü":
+                self.db.recalculate_symbol_position(transaction.get("sembol"), tarih, user_id)
             
             showinfo("Başarılı", "İşlem silindi ve portföy yeniden hesaplandı.")
             self.display_transactions()
@@ -371,8 +362,10 @@ class TransactionsPage:
                             WHERE tarih = ? AND toplam = ? AND user_id = ?
                         ''', (new_symbol, new_adet, new_fiyat, new_toplam, new_komisyon, original_tarih, transaction.get('toplam'), user_id))  # ✅ user_id eklendi
                 
-                # ✅ DÜZELTİLMİŞ - user_id ile
-                self.db.recalculate_portfolio_from_transactions(user_id)
+                # Etkilenen sembol(ler)in pozisyonunu işlem tarihinden itibaren yeniden hesapla
+                if tip != "Temettü":
+                    for affected in {transaction.get('sembol'), new_symbol}:
+                        self.db.recalculate_symbol_position(affected, original_tarih, user_id)
                 
                 # Sembol değişmişse güncel fiyatı çek
                 if tip != "Temettü" and new_symbol != transaction.get('sembol'):
@@ -1,30 +1,58 @@
 # server.py
 """
 Flask Backend API Sunucusu - Bulut Senkronizasyonu için
-Komut: python server.py
+Komut: python server.py              (geliştirme, tek süreç)
+       python server.py --prod       (çok süreçli üretim modu)
 Adres: http://localhost:5000
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from functools import wraps
 import jwt
 import os
 import json
+import zlib
+import argparse
 from datetime import datetime
 from database import Database
-from auth_service import AuthService
+from auth_service import AuthService, PBKDF2_ITERATIONS, get_auth_executor
 
 app = Flask(__name__)
 CORS(app)
 
 # Konfigürasyon
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev_secret_key_change_in_production')
-DATABASE_FILE = 'cloud_portfolio.db'
+DATABASE_FILE = os.environ.get('DATABASE_FILE', 'cloud_portfolio.db')
+
+# zstd sıkıştırma isteğe bağlıdır (pip install zstandard); yoksa gzip kullanılır
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# /api/pull yanıtlarında kaç satırın tek parça olarak serileştirileceği
+STREAM_CHUNK_ROWS = 200
+# İşlem sayfalamasında varsayılan ve en fazla sayfa boyutu
+PULL_PAGE_DEFAULT = 1000
+PULL_PAGE_MAX = 5000
+
+# Üretim modu varsayılanları: süreç (worker) ve süreç başına thread sayısı
+SERVE_WORKERS = min((os.cpu_count() or 1) * 2 + 1, 8)
+SERVE_THREADS = 8
+# Kapanışta devam eden isteklerin tamamlanması için beklenecek süre (sn)
+GRACEFUL_TIMEOUT = 30
 
 # Servisleri başlat
 db = Database(DATABASE_FILE)
-auth = AuthService(db, app.config['SECRET_KEY'])
+# PBKDF2_ITERATIONS değişirse kullanıcı hash'leri ilk girişte yenilenir;
+# AUTH_EXECUTOR=process hash'i ayrı süreçlerde hesaplar
+auth = AuthService(
+    db,
+    app.config['SECRET_KEY'],
+    iterations=int(os.environ.get('PBKDF2_ITERATIONS', PBKDF2_ITERATIONS)),
+    executor=get_auth_executor(os.environ.get('AUTH_EXECUTOR', 'thread'))
+)
 
 # ============ MIDDLEWARE ============
 
@@ -122,30 +150,36 @@ def change_password():
     else:
         return jsonify(result), 400
 
+@app.route('/api/auth/logout', methods=['POST'])
+@token_required
+def logout():
+    """Aktif token'ı iptal et"""
+    auth.revoke_token(request.headers.get('Authorization', '').replace('Bearer ', ''))
+    return jsonify({"success": True, "message": "Çıkış yapıldı"}), 200
+
 # ============ DATA SYNC ENDPOINTS ============
 
 @app.route('/api/sync/portfolio', methods=['POST'])
 @token_required
 def sync_portfolio():
     """Portföy verilerini senkronize et"""
-    data = request.get_json()
+    data = request.get_json() or {}
     portfolio_data = data.get('data', [])
     
+    # Hiçbir şey silinmeden önce doğrula: hatalı veri mevcut kayıtlara dokunmaz
+    if not isinstance(portfolio_data, list):
+        return jsonify({"error": "data bir liste olmalı"}), 400
     try:
-        # Mevcut portföyü temizle
-        db.clear_all_data(request.user_id)
-        
-        # Yeni portföyü kaydet
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            for item in portfolio_data:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO portfolios 
-                    (user_id, sembol, adet, ort_maliyet, guncel_fiyat)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (request.user_id, item['sembol'], item['adet'], 
-                      item['ort_maliyet'], item['guncel_fiyat']))
-            conn.commit()
+        db.validate_portfolio_rows(portfolio_data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        with db.get_connection(immediate=True) as conn:
+            # Sadece portföy satırları değiştirilir (işlem, temettü, ayar ve alarmlara dokunulmaz);
+            # silme ve ekleme tek transaction: hata olursa ikisi birden geri alınır
+            conn.execute("DELETE FROM portfolios WHERE user_id = ?", (request.user_id,))
+            db.bulk_upsert_portfolio(portfolio_data, request.user_id)
         
         return jsonify({
             "success": True,
@@ -163,19 +197,10 @@ def sync_transactions():
     transactions = data.get('data', [])
     
     try:
-        with db.get_connection() as conn:
+        with db.get_connection(immediate=True) as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM transactions WHERE user_id = ?", (request.user_id,))
-            
-            for trans in transactions:
-                cursor.execute('''
-                    INSERT INTO transactions 
-                    (user_id, sembol, tip, adet, fiyat, toplam, tarih)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (request.user_id, trans['sembol'], trans['tip'],
-                      trans['adet'], trans['fiyat'], trans['toplam'], 
-                      trans['tarih']))
-            conn.commit()
+            db.bulk_add_transactions(transactions, request.user_id, update_positions=False)
         
         return jsonify({
             "success": True,
@@ -193,18 +218,10 @@ def sync_dividends():
     dividends = data.get('data', [])
     
     try:
-        with db.get_connection() as conn:
+        with db.get_connection(immediate=True) as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM dividends WHERE user_id = ?", (request.user_id,))
-            
-            for div in dividends:
-                cursor.execute('''
-                    INSERT INTO dividends 
-                    (user_id, sembol, tutar, adet, hisse_basi_tutar, tarih)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (request.user_id, div['sembol'], div['tutar'],
-                      div['adet'], div['hisse_basi_tutar'], div['tarih']))
-            conn.commit()
+            db.bulk_add_dividends(dividends, request.user_id)
         
         return jsonify({
             "success": True,
@@ -232,6 +249,143 @@ def sync_settings():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# ============ DELTA SYNC ENDPOINTS ============
+
+@app.route('/api/sync/changes', methods=['POST'])
+@token_required
+def push_changes():
+    """İstemcideki değişen satırları uygula (idempotent upsert/silme)"""
+    data = request.get_json() or {}
+    changes = data.get('changes', [])
+    
+    try:
+        # Sunucu kopyası yalnızca kullanıcının hiç değişiklik günlüğü yokken değiştirilir;
+        # aksi halde tam gönderim de diğer cihazların verisine dokunmayan upsert'lerdir
+        replace_all = bool(data.get('full')) and db.get_sync_seq(request.user_id) == 0
+        applied = db.apply_sync_changes(
+            changes,
+            request.user_id,
+            source=data.get('device_id'),
+            replace_all=replace_all
+        )
+        
+        return jsonify({
+            "success": True,
+            "applied": applied,
+            "seq": db.get_sync_seq(request.user_id)
+        }), 200
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/sync/changes', methods=['GET'])
+@token_required
+def pull_changes():
+    """Verilen sıra numarasından sonra değişen satırları indir"""
+    try:
+        since = int(request.args.get('since', 0))
+        limit = min(int(request.args.get('limit', 1000)), 5000)
+    except ValueError:
+        return jsonify({"error": "since ve limit sayı olmalı"}), 400
+    
+    try:
+        result = db.get_sync_changes(
+            since,
+            request.user_id,
+            exclude_source=request.args.get('device_id'),
+            limit=limit
+        )
+        return jsonify(result), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# ============ STREAMING YARDIMCILARI ============
+
+def _json_array(rows):
+    """Satırları JSON dizisi olarak parça parça serileştir"""
+    yield '['
+    buffer = []
+    first = True
+    for row in rows:
+        buffer.append(json.dumps(row, ensure_ascii=False, default=str))
+        if len(buffer) >= STREAM_CHUNK_ROWS:
+            yield ('' if first else ',') + ','.join(buffer)
+            first = False
+            buffer = []
+    if buffer:
+        yield ('' if first else ',') + ','.join(buffer)
+    yield ']'
+
+def _json_object(fields):
+    """(anahtar, değer veya satır üreteci) çiftlerini JSON nesnesi olarak serileştir"""
+    yield '{'
+    for index, (key, value) in enumerate(fields):
+        yield ('' if index == 0 else ',') + json.dumps(key) + ':'
+        if isinstance(value, (dict, list)):
+            yield json.dumps(value, ensure_ascii=False, default=str)
+        else:
+            yield from _json_array(value)
+    yield '}'
+
+def _negotiate_encoding():
+    """İstemcinin Accept-Encoding başlığına göre sıkıştırma seç"""
+    available = ['zstd', 'gzip'] if zstandard else ['gzip']
+    return request.accept_encodings.best_match(available)
+
+def _compress(chunks, encoding):
+    """Metin parçalarını seçilen kodlamayla akış halinde sıkıştır"""
+    if encoding == 'zstd':
+        compressor = zstandard.ZstdCompressor().compressobj()
+    elif encoding == 'gzip':
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    else:
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
+        return
+    
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def _data_version():
+    """İsteği yapan kullanıcının veri sürümü (zayıf ETag değeri)"""
+    return f"{request.user_id}-{db.get_data_version(request.user_id)}"
+
+def _not_modified(version):
+    """İstemcinin önbelleğindeki kopya güncel mi (If-None-Match)"""
+    return request.if_none_match.contains_weak(version)
+
+def _streamed_json(make_chunks, headers=None, version=None):
+    """
+    Kullanıcı verisi için ETag kontrollü, sıkıştırılmış akış yanıtı üret
+    
+    Args:
+        make_chunks: JSON metin parçaları üreten fonksiyon (304 durumunda çağrılmaz)
+        headers: Yanıta eklenecek ek başlıklar
+        version: Önceden okunmuş veri sürümü (verilmezse okunur)
+    """
+    version = version or _data_version()
+    
+    if _not_modified(version):
+        response = Response(status=304)
+    else:
+        encoding = _negotiate_encoding()
+        response = Response(
+            stream_with_context(_compress(make_chunks(), encoding)),
+            mimetype='application/json'
+        )
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    
+    response.set_etag(version, weak=True)
+    response.headers['Vary'] = 'Accept-Encoding, Authorization'
+    response.headers['Cache-Control'] = 'private, no-cache'
+    for key, value in (headers or {}).items():
+        response.headers[key] = value
+    return response
+
 # ============ DATA PULL ENDPOINTS ============
 
 @app.route('/api/pull/portfolio', methods=['GET'])
@@ -239,18 +393,38 @@ def sync_settings():
 def pull_portfolio():
     """Portföy verilerini indir"""
     try:
-        portfolio = db.get_portfolio(request.user_id)
-        return jsonify(portfolio), 200
+        return _streamed_json(lambda: _json_array(db.get_portfolio(request.user_id)))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/pull/transactions', methods=['GET'])
 @token_required
 def pull_transactions():
-    """İşlem verilerini indir"""
+    """
+    İşlem verilerini indir
+    
+    cursor veya limit parametresi verilirse id sırasıyla sayfalı döner;
+    sonraki sayfanın cursor'ı X-Next-Cursor başlığındadır.
+    """
     try:
-        transactions = db.get_transactions(request.user_id)
-        return jsonify(transactions), 200
+        if 'cursor' not in request.args and 'limit' not in request.args:
+            return _streamed_json(lambda: _json_array(db.iter_transactions(request.user_id)))
+        
+        try:
+            after_id = int(request.args.get('cursor', 0))
+            limit = min(int(request.args.get('limit', PULL_PAGE_DEFAULT)), PULL_PAGE_MAX)
+        except ValueError:
+            return jsonify({"error": "cursor ve limit sayı olmalı"}), 400
+        
+        # Sürüm sayfa sorgusundan önce kontrol edilir: 304'te işlem tablosu hiç okunmaz
+        # (istemci X-Next-Cursor'ı önbelleğe aldığı kopyadan kullanır)
+        version = _data_version()
+        if _not_modified(version):
+            return _streamed_json(None, version=version)
+        
+        page, next_cursor = db.get_transactions_page(request.user_id, after_id, limit)
+        headers = {'X-Next-Cursor': str(next_cursor)} if next_cursor is not None else None
+        return _streamed_json(lambda: _json_array(page), headers, version)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -259,8 +433,7 @@ def pull_transactions():
 def pull_dividends():
     """Temettü verilerini indir"""
     try:
-        dividends = db.get_dividends(request.user_id)
-        return jsonify(dividends), 200
+        return _streamed_json(lambda: _json_array(db.iter_dividends(request.user_id)))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -269,23 +442,24 @@ def pull_dividends():
 def pull_settings():
     """Ayarları indir"""
     try:
-        settings = db.get_settings(request.user_id)
-        return jsonify(settings), 200
+        return _streamed_json(
+            lambda: iter([json.dumps(db.get_settings(request.user_id), ensure_ascii=False, default=str)])
+        )
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/pull/all', methods=['GET'])
 @token_required
 def pull_all():
-    """Tüm verileri indir"""
+    """Tüm verileri indir (akış halinde)"""
     try:
-        data = {
-            "portfolio": db.get_portfolio(request.user_id),
-            "transactions": db.get_transactions(request.user_id),
-            "dividends": db.get_dividends(request.user_id),
-            "settings": db.get_settings(request.user_id)
-        }
-        return jsonify(data), 200
+        user_id = request.user_id
+        return _streamed_json(lambda: _json_object([
+            ("portfolio", db.get_portfolio(user_id)),
+            ("transactions", db.iter_transactions(user_id)),
+            ("dividends", db.iter_dividends(user_id)),
+            ("settings", db.get_settings(user_id))
+        ]))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -299,21 +473,90 @@ def not_found(error):
 def server_error(error):
     return jsonify({"error": "Sunucu hatası"}), 500
 
+# ============ SERVING ============
+
+def serve(host='0.0.0.0', port=5000, workers=SERVE_WORKERS, threads=SERVE_THREADS):
+    """
+    Uygulamayı üretim WSGI sunucusu altında çalıştır
+    
+    Unix'te gunicorn (gthread) ile çok süreçli çalışır: her worker kendi
+    thread'lerinde kalıcı SQLite bağlantıları tutar (worker başına havuz),
+    yazmalar WAL + BEGIN IMMEDIATE ile süreçler arasında sıralanır. SIGTERM
+    alındığında devam eden istekler GRACEFUL_TIMEOUT süresince tamamlanır.
+    gunicorn yoksa (Windows) waitress ile tek süreç, çok thread çalışır.
+    
+    Args:
+        host: Dinlenecek adres
+        port: Dinlenecek port
+        workers: Süreç sayısı (sadece gunicorn)
+        threads: Süreç başına thread sayısı
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        BaseApplication = None
+    
+    if BaseApplication is not None:
+        class _GunicornApp(BaseApplication):
+            def load_config(self):
+                self.cfg.set('bind', f"{host}:{port}")
+                self.cfg.set('workers', workers)
+                self.cfg.set('threads', threads)
+                self.cfg.set('worker_class', 'gthread')
+                self.cfg.set('graceful_timeout', GRACEFUL_TIMEOUT)
+                self.cfg.set('post_fork', lambda server, worker: db.reset_after_fork())
+                self.cfg.set('worker_exit', lambda server, worker: db.checkpoint())
+            
+            def load(self):
+                return app
+        
+        print(f"🚀 gunicorn: {workers} worker x {threads} thread")
+        _GunicornApp().run()
+        return
+    
+    try:
+        from waitress import serve as waitress_serve
+    except ImportError:
+        print("⚠️ gunicorn/waitress yüklü değil, geliştirme sunucusu (threaded) kullanılıyor")
+        app.run(host=host, port=port, threaded=True)
+        return
+    
+    print(f"🚀 waitress: {threads} thread")
+    try:
+        waitress_serve(app, host=host, port=port, threads=threads)
+    finally:
+        db.checkpoint()
+
 # ============ MAIN ============
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="HisseTakip Cloud Server")
+    parser.add_argument('--prod', action='store_true', help="Çok süreçli üretim modu")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=SERVE_WORKERS)
+    parser.add_argument('--threads', type=int, default=SERVE_THREADS)
+    args = parser.parse_args()
+    
     print("="*60)
     print("📊 HisseTakip Cloud Server başlıyor...")
     print("="*60)
-    print("URL: http://localhost:5000")
-    print("API Docs: http://localhost:5000/api/health")
+    print(f"URL: http://localhost:{args.port}")
+    print(f"API Docs: http://localhost:{args.port}/api/health")
     print("\nEndpoints:")
     print("  POST   /api/auth/register")
     print("  POST   /api/auth/login")
     print("  GET    /api/auth/me")
     print("  POST   /api/auth/change-password")
+    print("  POST   /api/auth/logout")
     print("  POST   /api/sync/{portfolio,transactions,dividends,settings}")
+    print("  GET    /api/sync/changes?since=<seq>")
+    print("  POST   /api/sync/changes")
     print("  GET    /api/pull/{portfolio,transactions,dividends,settings,all}")
+    print("  GET    /api/pull/transactions?cursor=<id>&limit=<n>")
     print("="*60)
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    if args.prod:
+        serve(args.host, args.port, args.workers, args.threads)
+    else:
+        app.run(debug=True, host=args.host, port=args.port)
@@ -0,0 +1,139 @@
+# startup_benchmark.py
+"""
+Açılış süresi ölçümü - ilk giriş ekranı ve ilk dashboard karesine kadar geçen süre
+Komut: python startup_benchmark.py --runs 5
+
+Her tur temiz bir Python sürecinde (soğuk import) çalışır ve geçici bir
+veritabanı kullanır. Ölçülen aşamalar:
+  import       : main modülünün import süresi
+  login_frame  : süreç başından giriş ekranının ilk çizimine kadar
+  dashboard    : giriş sonrası dashboard sayfasının ilk çizimine kadar
+Ayrıca giriş ekranı çizildiği anda ağır modüllerin (matplotlib, pandas,
+yfinance, squarify) yüklenmiş olup olmadığı raporlanır.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+_T0 = time.perf_counter()
+
+# Giriş ekranında yüklenmemiş olması beklenen modüller
+HEAVY_MODULES = ("matplotlib", "pandas", "yfinance", "squarify")
+# Dashboard için en fazla bekleme (sn); piyasa verisi ağdan gelir
+DASHBOARD_TIMEOUT = 60
+
+
+def _pump(app, until, timeout):
+    """Tk olay döngüsünü koşul sağlanana kadar elle çalıştır"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        app.update()
+        if until():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def run_child(db_dir):
+    """Tek ölçüm turu (ayrı süreçte): sonuçları JSON olarak stdout'a yaz"""
+    result = {}
+
+    import database
+    import functools
+    db_file = os.path.join(db_dir, "startup.db")
+
+    start = time.perf_counter()
+    import main
+    result["import"] = time.perf_counter() - start
+
+    # Gerçek portfolio.db'ye dokunmamak için geçici veritabanı
+    main.Database = functools.partial(database.Database, db_file)
+
+    app = main.HisseTakipProgrami()
+    app.update()
+    result["login_frame"] = time.perf_counter() - _T0
+    result["heavy_at_login"] = [m for m in HEAVY_MODULES if m in sys.modules]
+
+    username = "startup_bench"
+    app.auth.register_user(username, "bench@example.com", "bench-password")
+    login = app.auth.login_user(username, "bench-password")
+    if not login.get("success"):
+        result["error"] = login.get("error", "giriş başarısız")
+        print(json.dumps(result))
+        return
+
+    login_start = time.perf_counter()
+    app.on_login_success(login)
+    ready = _pump(
+        app,
+        lambda: type(app.current_page_instance).__name__ == "DashboardPage",
+        DASHBOARD_TIMEOUT
+    )
+    if ready:
+        app.update()
+        result["dashboard"] = time.perf_counter() - _T0
+        result["login_to_dashboard"] = time.perf_counter() - login_start
+    else:
+        result["error"] = "dashboard zaman aşımı"
+
+    result["page_load_times"] = dict(app.pages.load_times)
+
+    app.auto_update_running = False
+    if app.alert_manager:
+        app.alert_manager.stop_monitoring()
+    app.destroy()
+    print(json.dumps(result))
+
+
+def _summary(values):
+    if not values:
+        return "-"
+    return f"{statistics.median(values) * 1000:8.0f} ms (min {min(values) * 1000:.0f}, max {max(values) * 1000:.0f})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HisseTakip açılış süresi ölçümü")
+    parser.add_argument("--runs", type=int, default=5, help="Tur sayısı (her tur ayrı süreç)")
+    parser.add_argument("--child", metavar="DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    results = []
+    for i in range(args.runs):
+        with tempfile.TemporaryDirectory(prefix="hissetakip_startup_") as db_dir:
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", db_dir],
+                capture_output=True, text=True,
+                cwd=os.path.dirname(os.path.abspath(__file__))
+            )
+        lines = [line for line in completed.stdout.splitlines() if line.startswith("{")]
+        if not lines:
+            print(f"❌ Tur {i + 1} başarısız:\n{completed.stderr[-2000:]}")
+            continue
+        result = json.loads(lines[-1])
+        results.append(result)
+        print(f"Tur {i + 1}: giriş {result['login_frame'] * 1000:.0f} ms, "
+              f"dashboard {result.get('dashboard', 0) * 1000:.0f} ms {result.get('error', '')}")
+
+    if not results:
+        sys.exit(1)
+
+    print("\n" + "=" * 60)
+    for key, title in (("import", "main import"), ("login_frame", "İlk giriş karesi"),
+                       ("dashboard", "İlk dashboard karesi"), ("login_to_dashboard", "Giriş → dashboard")):
+        print(f"{title:<24}{_summary([r[key] for r in results if key in r])}")
+    print(f"{'Girişte yüklü ağır modül':<24}{', '.join(results[-1]['heavy_at_login']) or 'yok'}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
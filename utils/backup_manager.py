@@ -50,6 +50,7 @@ class BackupManager:
             # Mevcut veritabanını yedekle (güvenlik)
             current_backup = os.path.join(self.backup_dir, f"before_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
             if os.path.exists(self.db.db_name):
+                self.db.checkpoint()
                 shutil.copy(self.db.db_name, current_backup)
             
             # Geri yükle
@@ -0,0 +1,130 @@
+# utils/lazy_loader.py
+"""
+Ağır modüller için gecikmeli (lazy) yükleme
+
+Sayfa modülleri (matplotlib/TkAgg, pandas, yfinance, squarify) ve ağır
+servisler (APIService, IntegrationManager) ilk kullanıldıkları anda
+oluşturulur. Giriş ekranı bu importları beklemeden açılır; giriş sonrası
+kalan modüller arka plan thread'inde ısıtılır.
+"""
+
+import importlib
+import threading
+import time
+
+
+# Sayfa adı -> (modül, sınıf)
+PAGE_REGISTRY = {
+    "dashboard": ("pages.dashboard_page", "DashboardPage"),
+    "portfolio": ("pages.portfolio_page", "PortfolioPage"),
+    "transactions": ("pages.transactions_page", "TransactionsPage"),
+    "analysis": ("pages.analysis_page", "AnalysisPage"),
+    "price_alerts": ("pages.price_alert_page", "PriceAlertPage"),
+    "adv_analysis": ("pages.advanced_analysis_page", "AdvancedAnalysisPage"),
+    "adv_transactions": ("pages.advanced_transactions_page", "AdvancedTransactionsPage"),
+    "financial": ("pages.financials_page", "FinancialsPage"),
+    "history": ("pages.stock_history_page", "StockHistoryPage"),
+    "settings": ("settings", "SettingsPage"),
+}
+
+
+class PageRegistry:
+    """Sayfa sınıflarını ilk istendiklerinde import eden thread-safe kayıt"""
+
+    def __init__(self, registry=None):
+        self.registry = dict(registry or PAGE_REGISTRY)
+        self._classes = {}
+        self._errors = {}
+        # Sayfa başına kilit: arka planda bir sayfa yüklenirken başka sayfa istenirse beklemez
+        self._locks = {name: threading.Lock() for name in self.registry}
+        self.load_times = {}
+
+    def get(self, page_name):
+        """
+        Sayfa sınıfını döndür (gerekirse import et)
+
+        Args:
+            page_name: Sayfa adı (PAGE_REGISTRY anahtarı)
+
+        Returns:
+            type: Sayfa sınıfı; modül yüklenemiyorsa None
+        """
+        if page_name in self._classes:
+            return self._classes[page_name]
+
+        module_name, class_name = self.registry[page_name]
+        with self._locks[page_name]:
+            if page_name in self._classes:
+                return self._classes[page_name]
+            if page_name in self._errors:
+                return None
+
+            start = time.perf_counter()
+            try:
+                page_class = getattr(importlib.import_module(module_name), class_name)
+            except (ImportError, AttributeError) as e:
+                print(f"❌ Sayfa modülü yükleme hatası ({page_name}): {e}")
+                self._errors[page_name] = e
+                return None
+
+            self.load_times[page_name] = time.perf_counter() - start
+            self._classes[page_name] = page_class
+            return page_class
+
+    def error(self, page_name):
+        """Sayfa yüklenemediyse hatayı döndür"""
+        return self._errors.get(page_name)
+
+    def warm(self, page_names=None, services=(), on_done=None):
+        """
+        Sayfaları ve servisleri arka plan thread'inde önceden yükle
+
+        Args:
+            page_names: Yüklenecek sayfalar (None ise hepsi)
+            services: get() ile oluşturulacak LazyService listesi
+            on_done: Bittiğinde (thread içinde) çağrılacak fonksiyon
+
+        Returns:
+            threading.Thread: Başlatılan thread
+        """
+        names = list(self.registry) if page_names is None else list(page_names)
+
+        def run():
+            for service in services:
+                try:
+                    service.get()
+                except Exception as e:
+                    print(f"❌ Servis ısıtma hatası: {e}")
+            for name in names:
+                self.get(name)
+            if on_done:
+                on_done()
+
+        thread = threading.Thread(target=run, daemon=True, name="lazy-warmup")
+        thread.start()
+        return thread
+
+
+class LazyService:
+    """Fabrika fonksiyonunu ilk get() çağrısında bir kez çalıştıran sarmalayıcı"""
+
+    def __init__(self, factory):
+        """
+        Args:
+            factory: Servisi oluşturan parametresiz fonksiyon (importları içinde yapmalı)
+        """
+        self.factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._instance is not None
+
+    def get(self):
+        """Servis örneğini döndür (gerekirse oluştur)"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self.factory()
+        return self._instance
@@ -0,0 +1,173 @@
+# utils/market_calendar.py
+"""
+Borsa İstanbul (BIST) işlem takvimi ve seansa duyarlı yenileme planı
+
+Hafta sonları, resmi tatiller ve yarım günler (arife) dikkate alınır.
+RefreshSchedule, seans içinde sık, kapanıştan sonra bir kez son fiyat
+için, ardından bir sonraki açılışa kadar hiç çekim yapılmayacak şekilde
+bir sonraki çekim zamanını hesaplar.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+
+# Pay piyasası sürekli işlem seansı
+SESSION_OPEN = time(10, 0)
+SESSION_CLOSE = time(18, 0)
+# Arife günlerinde seans öğlen kapanır
+HALF_DAY_CLOSE = time(12, 30)
+# Kapanış seansı (kapanış fiyatı) tamamlandıktan sonra yapılacak son çekim gecikmesi
+POST_CLOSE_DELAY = timedelta(minutes=15)
+
+# Her yıl aynı tarihteki resmi tatiller (ay, gün)
+FIXED_HOLIDAYS = (
+    (1, 1),    # Yılbaşı
+    (4, 23),   # Ulusal Egemenlik ve Çocuk Bayramı
+    (5, 1),    # Emek ve Dayanışma Günü
+    (5, 19),   # Atatürk'ü Anma, Gençlik ve Spor Bayramı
+    (7, 15),   # Demokrasi ve Millî Birlik Günü
+    (8, 30),   # Zafer Bayramı
+    (10, 29),  # Cumhuriyet Bayramı
+)
+# Her yıl aynı tarihteki yarım günler (ay, gün)
+FIXED_HALF_DAYS = (
+    (10, 28),  # Cumhuriyet Bayramı arifesi
+)
+
+# Dini bayramlar (hicri takvime göre her yıl değişir): tatil günleri ve arife yarım günleri.
+# Hükümetin ek köprü tatilleri RefreshSchedule/BistCalendar'a extra_holidays ile verilebilir.
+RELIGIOUS_HOLIDAYS = {
+    # Ramazan Bayramı
+    date(2024, 4, 10), date(2024, 4, 11), date(2024, 4, 12),
+    date(2025, 3, 30), date(2025, 3, 31), date(2025, 4, 1),
+    date(2026, 3, 20), date(2026, 3, 21), date(2026, 3, 22),
+    date(2027, 3, 9), date(2027, 3, 10), date(2027, 3, 11),
+    # Kurban Bayramı
+    date(2024, 6, 16), date(2024, 6, 17), date(2024, 6, 18), date(2024, 6, 19),
+    date(2025, 6, 6), date(2025, 6, 7), date(2025, 6, 8), date(2025, 6, 9),
+    date(2026, 5, 27), date(2026, 5, 28), date(2026, 5, 29), date(2026, 5, 30),
+    date(2027, 5, 16), date(2027, 5, 17), date(2027, 5, 18), date(2027, 5, 19),
+}
+RELIGIOUS_HALF_DAYS = {
+    date(2024, 4, 9), date(2024, 6, 15),
+    date(2025, 3, 29), date(2025, 6, 5),
+    date(2026, 3, 19), date(2026, 5, 26),
+    date(2027, 3, 8), date(2027, 5, 15),
+}
+
+
+class BistCalendar:
+    """BIST işlem günleri ve seans saatleri"""
+
+    def __init__(self, extra_holidays=(), extra_half_days=()):
+        """
+        Args:
+            extra_holidays: Ek tatil günleri (date veya 'YYYY-MM-DD')
+            extra_half_days: Ek yarım günler (date veya 'YYYY-MM-DD')
+        """
+        self.holidays = set(RELIGIOUS_HOLIDAYS) | {_to_date(d) for d in extra_holidays}
+        self.half_days = set(RELIGIOUS_HALF_DAYS) | {_to_date(d) for d in extra_half_days}
+
+    def is_holiday(self, day):
+        return day in self.holidays or (day.month, day.day) in FIXED_HOLIDAYS
+
+    def is_half_day(self, day):
+        return day in self.half_days or (day.month, day.day) in FIXED_HALF_DAYS
+
+    def is_trading_day(self, day):
+        """Hafta içi ve tatil olmayan gün mü"""
+        return day.weekday() < 5 and not self.is_holiday(day)
+
+    def session(self, day):
+        """
+        Günün seansı
+
+        Returns:
+            (açılış, kapanış) datetime çifti; işlem günü değilse None
+        """
+        if not self.is_trading_day(day):
+            return None
+        close = HALF_DAY_CLOSE if self.is_half_day(day) else SESSION_CLOSE
+        return datetime.combine(day, SESSION_OPEN), datetime.combine(day, close)
+
+    def is_open(self, now=None):
+        """Seans şu an açık mı"""
+        now = now or datetime.now()
+        session = self.session(now.date())
+        return session is not None and session[0] <= now < session[1]
+
+    def next_open(self, now=None):
+        """Şu andan sonraki ilk seans açılışı"""
+        now = now or datetime.now()
+        day = now.date()
+        session = self.session(day)
+        if session and now < session[0]:
+            return session[0]
+
+        # Uzun bayram + hafta sonu birleşse bile iki hafta içinde işlem günü vardır
+        for _ in range(14):
+            day += timedelta(days=1)
+            session = self.session(day)
+            if session:
+                return session[0]
+        raise ValueError("İki hafta içinde işlem günü bulunamadı")
+
+    def last_trading_day(self, now=None):
+        """
+        Kapanış fiyatı oluşmuş son işlem günü (seans sürüyorsa veya
+        henüz açılmadıysa bir önceki işlem günü)
+        """
+        now = now or datetime.now()
+        day = now.date()
+        session = self.session(day)
+        if session and now >= session[1]:
+            return day
+
+        for _ in range(14):
+            day -= timedelta(days=1)
+            if self.is_trading_day(day):
+                return day
+        raise ValueError("İki hafta içinde işlem günü bulunamadı")
+
+
+class RefreshSchedule:
+    """
+    Seansa duyarlı çekim planı
+
+    - Seans içinde: her `interval` saniyede bir
+    - Kapanıştan POST_CLOSE_DELAY sonra: kapanış fiyatı için son bir çekim
+    - Sonrasında: bir sonraki açılışa kadar çekim yok
+    """
+
+    def __init__(self, calendar=None, post_close_delay=POST_CLOSE_DELAY):
+        self.calendar = calendar or BistCalendar()
+        self.post_close_delay = post_close_delay
+
+    def next_run(self, now, interval):
+        """
+        Bir sonraki çekim zamanı
+
+        Args:
+            now: Şu anki zaman (datetime)
+            interval: Seans içi çekim aralığı (saniye)
+
+        Returns:
+            datetime
+        """
+        session = self.calendar.session(now.date())
+        if session:
+            open_at, close_at = session
+            final_at = close_at + self.post_close_delay
+            if now < open_at:
+                return open_at
+            if now < close_at:
+                return min(now + timedelta(seconds=interval), final_at)
+            if now < final_at:
+                return final_at
+        return self.calendar.next_open(now)
+
+
+def _to_date(value):
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value), "%Y-%m-%d").date()
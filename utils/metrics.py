@@ -73,6 +73,14 @@ DEFAULT_DRAWDOWN: float = 5.0
 DEFAULT_DIVERSIFICATION: float = 50.0
 
 
+CLOSE_COLUMNS: Tuple[str, ...] = ('HISSE_KAPANIS', 'Close', 'close', 'Kapanış')
+
+
+def _find_close_column(df: pd.DataFrame) -> Optional[str]:
+    """Kapanış fiyatı sütununu bul"""
+    return next((col for col in CLOSE_COLUMNS if col in df.columns), None)
+
+
 # ============================================================================
 # DATA CLASSES
 # ============================================================================
@@ -90,6 +98,187 @@ class StockReturn:
         return np.array(self.returns)
 
 
+@dataclass(frozen=True)
+class PriceMatrix:
+    """
+    Tarihe göre hizalanmış fiyat ve getiri matrisi (tarih × sembol)
+    
+    Tüm sembollerin tarihleri birleştirilir ve fiyatlar ileri doldurulur;
+    tatil veya işlem durdurma günlerinde hisse sıfır getiri üretir, henüz
+    fiyatı olmayan (yeni listelenmiş) hisseler ise NaN olarak kalır.
+    """
+    dates: pd.DatetimeIndex
+    symbols: Tuple[str, ...]
+    prices: np.ndarray   # (T, N) ileri doldurulmuş kapanış fiyatları
+    returns: np.ndarray  # (T-1, N) logaritmik günlük getiriler
+    weights: np.ndarray  # (N,) değer ağırlıkları (toplamı 1)
+    
+    @classmethod
+    def from_frames(
+        cls,
+        frames: Dict[str, pd.DataFrame],
+        weights: Dict[str, float]
+    ) -> Optional['PriceMatrix']:
+        """
+        Sembol bazlı fiyat DataFrame'lerinden matris oluştur
+        
+        Args:
+            frames: {symbol: DataFrame} (kapanış sütunu içeren)
+            weights: {symbol: portföy değeri veya ağırlığı}
+            
+        Returns:
+            PriceMatrix veya yeterli veri yoksa None
+        """
+        closes = {}
+        for symbol, df in frames.items():
+            if df is None or df.empty or weights.get(symbol, 0) <= 0:
+                continue
+            
+            close_col = _find_close_column(df)
+            if close_col is None:
+                continue
+            
+            series = pd.to_numeric(df[close_col], errors='coerce')
+            index = df.index if isinstance(df.index, pd.DatetimeIndex) else pd.to_datetime(df.index)
+            if index.tz is not None:
+                index = index.tz_localize(None)
+            series.index = index.normalize()
+            series = series[~series.index.duplicated(keep='last')]
+            series = series[series > 0].dropna()
+            
+            if len(series) >= 2:
+                closes[symbol] = series
+        
+        if not closes:
+            return None
+        
+        aligned = pd.DataFrame(closes).sort_index().ffill()
+        if len(aligned) < 2:
+            return None
+        
+        symbols = tuple(aligned.columns)
+        prices = aligned.to_numpy(dtype=float)
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            returns = np.diff(np.log(prices), axis=0)
+        
+        raw_weights = np.array([weights[symbol] for symbol in symbols], dtype=float)
+        
+        return cls(
+            dates=aligned.index,
+            symbols=symbols,
+            prices=prices,
+            returns=returns,
+            weights=raw_weights / raw_weights.sum()
+        )
+    
+    @property
+    def num_observations(self) -> int:
+        """Getiri gözlem sayısı"""
+        return self.returns.shape[0]
+    
+    def portfolio_returns(self, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Ağırlıklı portföy getiri serisi (tek matris-vektör çarpımı)
+        
+        Bir günde fiyatı olmayan hisselerin ağırlığı o gün için diğer
+        hisselere dağıtılır.
+        
+        Args:
+            weights: Ağırlık vektörü (None ise değer ağırlıkları)
+            
+        Returns:
+            (T-1,) portföy getirileri
+        """
+        w = self.weights if weights is None else np.asarray(weights, dtype=float)
+        available = ~np.isnan(self.returns)
+        weighted = np.where(available, self.returns, 0.0) @ w
+        coverage = available @ w
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            series = weighted / coverage
+        
+        return series[coverage > 0]
+    
+    def symbol_returns(self, symbol: str) -> np.ndarray:
+        """Tek sembolün (NaN'sız) getiri serisi"""
+        column = self.returns[:, self.symbols.index(symbol)]
+        return column[~np.isnan(column)]
+
+
+@dataclass(frozen=True)
+class DrawdownReport:
+    """
+    Düşüş (drawdown) analizi sonucu
+    
+    Süreler işlem günü (gözlem) sayısı olarak verilir.
+    """
+    max_drawdown: float                   # Maksimum düşüş yüzdesi (pozitif)
+    peak_date: Optional[pd.Timestamp]     # Düşüş öncesi zirve
+    trough_date: Optional[pd.Timestamp]   # En dip nokta
+    recovery_date: Optional[pd.Timestamp] # Zirveye geri dönüş (yoksa None)
+    drawdown_duration: int                # Zirveden dibe kadar geçen gün
+    recovery_time: Optional[int]          # Dipten toparlanmaya kadar geçen gün
+    underwater: pd.Series                 # Her gün için zirveden uzaklık (%)
+    
+    @classmethod
+    def from_values(cls, dates: pd.DatetimeIndex, values: np.ndarray) -> 'DrawdownReport':
+        """
+        Portföy değer serisinden tek geçişte drawdown hesapla
+        
+        Args:
+            dates: Tarih indeksi
+            values: Günlük portföy değerleri (pozitif)
+            
+        Returns:
+            DrawdownReport
+        """
+        values = np.asarray(values, dtype=float)
+        running_peak = np.maximum.accumulate(values)
+        underwater = (running_peak - values) / running_peak * 100
+        
+        trough_idx = int(np.argmax(underwater))
+        max_dd = float(underwater[trough_idx])
+        
+        if max_dd <= 0:
+            return cls(
+                max_drawdown=0.0,
+                peak_date=None,
+                trough_date=None,
+                recovery_date=None,
+                drawdown_duration=0,
+                recovery_time=None,
+                underwater=pd.Series(underwater, index=dates)
+            )
+        
+        peak_value = running_peak[trough_idx]
+        peak_idx = int(np.argmax(values[:trough_idx + 1] >= peak_value))
+        
+        recovered = values[trough_idx:] >= peak_value
+        recovery_idx = trough_idx + int(np.argmax(recovered)) if recovered.any() else None
+        
+        return cls(
+            max_drawdown=max_dd,
+            peak_date=dates[peak_idx],
+            trough_date=dates[trough_idx],
+            recovery_date=dates[recovery_idx] if recovery_idx is not None else None,
+            drawdown_duration=trough_idx - peak_idx,
+            recovery_time=(recovery_idx - trough_idx) if recovery_idx is not None else None,
+            underwater=pd.Series(underwater, index=dates)
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Dictionary'e dönüştür"""
+        return {
+            'max_drawdown': self.max_drawdown,
+            'peak_date': self.peak_date,
+            'trough_date': self.trough_date,
+            'recovery_date': self.recovery_date,
+            'drawdown_duration': self.drawdown_duration,
+            'recovery_time': self.recovery_time
+        }
+
+
 @dataclass
 class PortfolioComposition:
     """Portföy bileşeni"""
@@ -500,6 +689,7 @@ class PortfolioMetrics:
         self._total_cost: Optional[float] = None
         self._daily_returns_cache: Optional[List[StockReturn]] = None
         self._cache_days: Optional[int] = None
+        self._matrix_cache: Dict[int, Optional[PriceMatrix]] = {}
         
         # Thread safety
         self._lock = threading.RLock()
@@ -549,6 +739,7 @@ class PortfolioMetrics:
             self._total_cost = None
             self._daily_returns_cache = None
             self._cache_days = None
+            self._matrix_cache.clear()
     
     def update_prices(self) -> bool:
         """
@@ -596,6 +787,54 @@ class PortfolioMetrics:
             print(f"Toplam getiri hesaplama hatası: {e}")
             return 0.0
     
+    def get_price_matrix(
+        self,
+        days: int = 30,
+        force_refresh: bool = False
+    ) -> Optional[PriceMatrix]:
+        """
+        Hizalanmış fiyat/getiri matrisini al
+        
+        Matris her fiyat anlık görüntüsü (gün sayısı) için bir kez
+        oluşturulur ve tüm risk metrikleri tarafından paylaşılır.
+        
+        Args:
+            days: Gün sayısı
+            force_refresh: Cache'i yoksay
+            
+        Returns:
+            PriceMatrix veya None
+        """
+        with self._lock:
+            if not force_refresh and days in self._matrix_cache:
+                return self._matrix_cache[days]
+            
+            matrix: Optional[PriceMatrix] = None
+            
+            if self.portfolio:
+                try:
+                    symbols = [stock['sembol'] for stock in self.portfolio]
+                    all_data = self._provider.get_multiple_historical_data(symbols, days)
+                    
+                    values = {
+                        stock['sembol']: stock['adet'] * stock.get('guncel_fiyat', stock['ort_maliyet'])
+                        for stock in self.portfolio
+                    }
+                    matrix = PriceMatrix.from_frames(all_data, values)
+                    
+                except Exception as e:
+                    print(f"Fiyat matrisi oluşturma hatası: {e}")
+            
+            self._matrix_cache[days] = matrix
+            return matrix
+    
+    def _portfolio_return_series(self, days: int) -> Optional[np.ndarray]:
+        """Ağırlıklı günlük portföy getirileri (matristen)"""
+        matrix = self.get_price_matrix(days)
+        if matrix is None:
+            return None
+        return matrix.portfolio_returns()
+    
     def calculate_daily_returns(
         self, 
         days: int = 30,
@@ -620,59 +859,20 @@ class PortfolioMetrics:
             
             returns_list: List[StockReturn] = []
             
-            if not self.portfolio:
+            matrix = self.get_price_matrix(days, force_refresh=force_refresh)
+            if matrix is None:
                 return returns_list
             
-            try:
-                # Tüm sembolleri çek
-                symbols = [stock['sembol'] for stock in self.portfolio]
-                all_data = self._provider.get_multiple_historical_data(symbols, days)
-                
-                for stock in self.portfolio:
-                    symbol = stock['sembol']
-                    
-                    if symbol not in all_data:
-                        continue
-                    
-                    df = all_data[symbol]
-                    
-                    if df.empty:
-                        continue
-                    
-                    # Kapanış fiyatı sütununu bul
-                    close_col = None
-                    for col in ['HISSE_KAPANIS', 'Close', 'close', 'Kapanış']:
-                        if col in df.columns:
-                            close_col = col
-                            break
-                    
-                    if close_col is None:
-                        continue
-                    
-                    prices = df[close_col].values
-                    
-                    if len(prices) < 2:
-                        continue
-                    
-                    # Logaritmik günlük getiri
-                    daily_returns = np.diff(np.log(prices))
-                    
-                    # Ağırlık hesapla
-                    value = stock['adet'] * stock.get('guncel_fiyat', stock['ort_maliyet'])
-                    weight = value / self.total_value if self.total_value > 0 else 0
-                    
-                    returns_list.append(StockReturn(
-                        symbol=symbol,
-                        returns=tuple(daily_returns),
-                        weight=weight
-                    ))
-                
-                # Cache'e kaydet
-                self._daily_returns_cache = returns_list
-                self._cache_days = days
-                
-            except Exception as e:
-                print(f"Günlük getiri hesaplama hatası: {e}")
+            for symbol, weight in zip(matrix.symbols, matrix.weights):
+                returns_list.append(StockReturn(
+                    symbol=symbol,
+                    returns=tuple(matrix.symbol_returns(symbol)),
+                    weight=float(weight)
+                ))
+            
+            # Cache'e kaydet
+            self._daily_returns_cache = returns_list
+            self._cache_days = days
             
             return returns_list
     
@@ -750,29 +950,11 @@ class PortfolioMetrics:
             Yıllık volatilite yüzdesi
         """
         try:
-            daily_returns = self.calculate_daily_returns(days)
-            
-            if not daily_returns:
-                return DEFAULT_VOLATILITY
+            portfolio_returns = self._portfolio_return_series(days)
             
-            # Minimum veri uzunluğunu bul
-            min_length = min(len(r.returns) for r in daily_returns)
-            
-            if min_length < 5:  # En az 5 gün veri gerekli
-                return DEFAULT_VOLATILITY
-            
-            # Portföy getirilerini hesapla
-            portfolio_returns = np.zeros(min_length)
-            total_weight = sum(r.weight for r in daily_returns)
-            
-            if total_weight <= 0:
+            if portfolio_returns is None or len(portfolio_returns) < 5:  # En az 5 gün veri gerekli
                 return DEFAULT_VOLATILITY
             
-            for stock_return in daily_returns:
-                returns = stock_return.returns_array[-min_length:]
-                weight = stock_return.weight / total_weight
-                portfolio_returns += returns * weight
-            
             # Günlük standart sapma
             daily_std = np.std(portfolio_returns, ddof=1)
             
@@ -796,29 +978,11 @@ class PortfolioMetrics:
             Yıllık negatif volatilite
         """
         try:
-            daily_returns = self.calculate_daily_returns(days)
+            portfolio_returns = self._portfolio_return_series(days)
             
-            if not daily_returns:
+            if portfolio_returns is None or len(portfolio_returns) < 5:
                 return DEFAULT_VOLATILITY
             
-            # Minimum uzunluk
-            min_length = min(len(r.returns) for r in daily_returns)
-            
-            if min_length < 5:
-                return DEFAULT_VOLATILITY
-            
-            # Portföy getirilerini hesapla
-            portfolio_returns = np.zeros(min_length)
-            total_weight = sum(r.weight for r in daily_returns)
-            
-            if total_weight <= 0:
-                return DEFAULT_VOLATILITY
-            
-            for stock_return in daily_returns:
-                returns = stock_return.returns_array[-min_length:]
-                weight = stock_return.weight / total_weight
-                portfolio_returns += returns * weight
-            
             # Sadece negatif getiriler
             negative_returns = portfolio_returns[portfolio_returns < 0]
             
@@ -848,80 +1012,56 @@ class PortfolioMetrics:
             if not self.portfolio:
                 return 0.0
             
-            # Tarihsel portföy değerlerini hesapla
-            symbols = [stock['sembol'] for stock in self.portfolio]
-            all_data = self._provider.get_multiple_historical_data(symbols, days=90)
+            report = self.calculate_drawdown_report()
             
-            if not all_data:
+            if report is None:
                 # Fallback: mevcut maliyet-fiyat farkından hesapla
                 return self._calculate_simple_drawdown()
             
-            # Ortak tarihleri bul
-            all_dates = set()
-            data_by_symbol = {}
-            
-            for symbol, df in all_data.items():
-                if df.empty:
-                    continue
-                    
-                close_col = None
-                for col in ['HISSE_KAPANIS', 'Close', 'close', 'Kapanış']:
-                    if col in df.columns:
-                        close_col = col
-                        break
-                
-                if close_col:
-                    data_by_symbol[symbol] = df[close_col].to_dict()
-                    all_dates.update(df.index)
-            
-            if not all_dates or not data_by_symbol:
-                return self._calculate_simple_drawdown()
-            
-            # Günlük portföy değerlerini hesapla
-            sorted_dates = sorted(all_dates)
-            portfolio_values = []
-            
-            for date in sorted_dates:
-                daily_value = 0.0
-                
-                for stock in self.portfolio:
-                    symbol = stock['sembol']
-                    shares = stock['adet']
-                    
-                    if symbol in data_by_symbol:
-                        # En yakın tarihi bul
-                        price = None
-                        for d in [date] + sorted_dates:
-                            if d in data_by_symbol[symbol]:
-                                price = data_by_symbol[symbol][d]
-                                break
-                        
-                        if price is not None:
-                            daily_value += shares * price
-                        else:
-                            daily_value += shares * stock.get('guncel_fiyat', stock['ort_maliyet'])
-                    else:
-                        daily_value += shares * stock.get('guncel_fiyat', stock['ort_maliyet'])
-                
-                if daily_value > 0:
-                    portfolio_values.append(daily_value)
-            
-            if len(portfolio_values) < 2:
-                return self._calculate_simple_drawdown()
-            
-            # Drawdown hesapla
-            values = np.array(portfolio_values)
-            peak = np.maximum.accumulate(values)
-            drawdown = (peak - values) / peak * 100
-            
-            max_dd = float(np.max(drawdown))
-            
-            return max_dd
+            return report.max_drawdown
             
         except Exception as e:
             print(f"Max drawdown hesaplama hatası: {e}")
             return DEFAULT_DRAWDOWN
     
+    def calculate_drawdown_report(self, days: int = 90) -> Optional[DrawdownReport]:
+        """
+        Drawdown, süre, toparlanma ve underwater eğrisini hesapla
+        
+        Günlük portföy değerleri hizalanmış fiyat matrisi ile adet
+        vektörünün çarpımından elde edilir (doğrusal zaman).
+        
+        Args:
+            days: Hesaplama dönemi
+            
+        Returns:
+            DrawdownReport veya yeterli veri yoksa None
+        """
+        matrix = self.get_price_matrix(days)
+        if matrix is None:
+            return None
+        
+        shares = {stock['sembol']: stock['adet'] for stock in self.portfolio}
+        share_vector = np.array([shares[symbol] for symbol in matrix.symbols], dtype=float)
+        
+        # Listelenme öncesi boşlukları ilk bilinen fiyatla doldur
+        prices = pd.DataFrame(matrix.prices).bfill().to_numpy()
+        
+        # Fiyat geçmişi olmayan hisseler güncel fiyatla sabit katkı yapar
+        static_value = sum(
+            stock['adet'] * stock.get('guncel_fiyat', stock['ort_maliyet'])
+            for stock in self.portfolio
+            if stock['sembol'] not in matrix.symbols
+        )
+        
+        values = prices @ share_vector + static_value
+        valid = values > 0
+        
+        if valid.sum() < 2:
+            return None
+        
+        return DrawdownReport.from_values(matrix.dates[valid], values[valid])
+    
     def _calculate_simple_drawdown(self) -> float:
         """Basit drawdown hesaplama (fallback)"""
         max_dd = 0.0
@@ -952,29 +1092,11 @@ class PortfolioMetrics:
             VaR değeri (portföy yüzdesi)
         """
         try:
-            daily_returns = self.calculate_daily_returns(days)
+            portfolio_returns = self._portfolio_return_series(days)
             
-            if not daily_returns:
+            if portfolio_returns is None or len(portfolio_returns) < 10:
                 return 5.0  # Varsayılan %5
             
-            # Minimum uzunluk
-            min_length = min(len(r.returns) for r in daily_returns)
-            
-            if min_length < 10:
-                return 5.0
-            
-            # Portföy getirileri
-            portfolio_returns = np.zeros(min_length)
-            total_weight = sum(r.weight for r in daily_returns)
-            
-            if total_weight <= 0:
-                return 5.0
-            
-            for stock_return in daily_returns:
-                returns = stock_return.returns_array[-min_length:]
-                weight = stock_return.weight / total_weight
-                portfolio_returns += returns * weight
-            
             # VaR = negatif percentile
             var = np.percentile(portfolio_returns, (1 - confidence) * 100)
             
@@ -1176,34 +1298,17 @@ class PortfolioMetrics:
             if len(self.portfolio) < 2:
                 return None
             
-            symbols = [stock['sembol'] for stock in self.portfolio]
-            all_data = self._provider.get_multiple_historical_data(symbols, days)
+            matrix = self.get_price_matrix(days)
             
-            if len(all_data) < 2:
+            if matrix is None or len(matrix.symbols) < 2:
                 return None
             
-            # Getiri serileri oluştur
-            returns_dict = {}
-            
-            for symbol, df in all_data.items():
-                if df.empty:
-                    continue
-                
-                close_col = None
-                for col in ['HISSE_KAPANIS', 'Close', 'close', 'Kapanış']:
-                    if col in df.columns:
-                        close_col = col
-                        break
-                
-                if close_col:
-                    returns = df[close_col].pct_change().dropna()
-                    returns_dict[symbol] = returns
-            
-            if len(returns_dict) < 2:
-                return None
-            
-            # DataFrame oluştur ve korelasyon hesapla
-            returns_df = pd.DataFrame(returns_dict)
+            # Basit getiriler (pct_change ile aynı) üzerinden korelasyon
+            returns_df = pd.DataFrame(
+                np.expm1(matrix.returns),
+                index=matrix.dates[1:],
+                columns=list(matrix.symbols)
+            )
             correlation = returns_df.corr()
             
             return correlation
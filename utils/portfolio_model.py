@@ -0,0 +1,142 @@
+# utils/portfolio_model.py
+"""
+Gözlemlenebilir portföy modeli
+
+Aktif kullanıcının portföyü bellekte tutulur. Fiyat güncellemeleri tek
+transaction ile veritabanına yazılır ve sadece fiyatı gerçekten değişen
+semboller için abonelere olay gönderilir; sayfalar bu olayla sadece
+etkilenen label, KPI kartı ve grafik nesnelerini yerinde günceller.
+"""
+
+import threading
+
+
+class PortfolioChange:
+    """
+    Portföy değişiklik olayı
+
+    Attributes:
+        semboller: Fiyatı değişen semboller {sembol: (eski fiyat, yeni fiyat)}
+        yapisal: True ise sembol eklendi/çıkarıldı veya adet/maliyet değişti;
+            abone kendini tamamen yenilemelidir
+    """
+
+    def __init__(self, semboller=None, yapisal=False):
+        self.semboller = semboller or {}
+        self.yapisal = yapisal
+
+    def __repr__(self):
+        return f"PortfolioChange(semboller={list(self.semboller)}, yapisal={self.yapisal})"
+
+
+class PortfolioModel:
+    def __init__(self, db, dispatcher=None):
+        """
+        Args:
+            db: Database
+            dispatcher: Olayları UI thread'ine taşıyan fonksiyon (örn. lambda fn: root.after(0, fn));
+                verilmezse abone çağrıları güncellemeyi yapan thread'de yapılır
+        """
+        self.db = db
+        self.dispatcher = dispatcher
+        self.user_id = None
+
+        self._lock = threading.Lock()
+        self._positions = {}
+        self._order = []
+        self._listeners = []
+
+    # ========== ABONELİK ==========
+
+    def subscribe(self, callback):
+        """
+        Değişiklik olaylarına abone ol
+
+        Args:
+            callback: (PortfolioChange) -> None
+
+        Returns:
+            callable: Aboneliği iptal eden fonksiyon
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._listeners:
+                    self._listeners.remove(callback)
+
+        return unsubscribe
+
+    def _emit(self, change):
+        with self._lock:
+            listeners = list(self._listeners)
+
+        def deliver():
+            for callback in listeners:
+                try:
+                    callback(change)
+                except Exception as e:
+                    print(f"Portföy olayı işleme hatası: {e}")
+
+        if self.dispatcher:
+            self.dispatcher(deliver)
+        else:
+            deliver()
+
+    # ========== VERİ ==========
+
+    def load(self, user_id=None):
+        """Portföyü veritabanından yeniden yükle ve yapısal değişiklik olayı gönder"""
+        if user_id is not None:
+            self.user_id = user_id
+
+        portfolio = self.db.get_portfolio(self.user_id)
+        with self._lock:
+            self._positions = {h["sembol"]: dict(h) for h in portfolio}
+            self._order = [h["sembol"] for h in portfolio]
+
+        self._emit(PortfolioChange(yapisal=True))
+
+    def get_portfolio(self):
+        """Portföyün kopyası (Database.get_portfolio ile aynı biçim ve sıra)"""
+        with self._lock:
+            return [dict(self._positions[s]) for s in self._order]
+
+    def symbols(self):
+        with self._lock:
+            return list(self._order)
+
+    def update_prices(self, prices):
+        """
+        Güncel fiyatları yaz ve değişen semboller için olay gönder
+
+        Args:
+            prices: {sembol: yeni fiyat}
+
+        Returns:
+            int: Fiyatı değişen sembol sayısı
+        """
+        with self._lock:
+            changed = {
+                symbol: (self._positions[symbol].get("guncel_fiyat"), float(price))
+                for symbol, price in prices.items()
+                if symbol in self._positions and price is not None
+                and self._positions[symbol].get("guncel_fiyat") != float(price)
+            }
+
+        if not changed:
+            return 0
+
+        # Fiyatlar ve price_ticks geçmişi tek transaction'da yazılır
+        self.db.update_portfolio_prices(
+            {symbol: new for symbol, (_, new) in changed.items()}, self.user_id
+        )
+
+        with self._lock:
+            for symbol, (_, new) in changed.items():
+                if symbol in self._positions:
+                    self._positions[symbol]["guncel_fiyat"] = new
+
+        self._emit(PortfolioChange(semboller=changed))
+        return len(changed)
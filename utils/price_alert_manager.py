@@ -1,5 +1,6 @@
 # utils/price_alert_manager.py
 
+import bisect
 import threading
 import time
 from datetime import datetime
@@ -17,6 +18,13 @@ class PriceAlertManager:
         self.active_alerts = {}  # {alert_id: alert_data}
         self.monitoring_thread = None
         self.monitoring_active = False
+        self._bus_unsubscribe = None
+        
+        # Sembol başına sıralı eşik listeleri: {symbol: [(target_price, alert_id), ...]}
+        # Fiyat gelince sadece geçilen eşikler bisect ile kesilip alınır
+        self._above = {}
+        self._below = {}
+        self._lock = threading.RLock()
         
         # DB'den alarmları yükle
         self._load_alerts_from_db()
@@ -25,12 +33,74 @@ class PriceAlertManager:
         """Veritabanından alarmları yükle"""
         try:
             alerts = self.db.get_price_alerts()
-            for alert in alerts:
-                if alert['active']:
-                    self.active_alerts[alert['id']] = alert
+            with self._lock:
+                for alert in alerts:
+                    if alert['active']:
+                        self.active_alerts[alert['id']] = alert
+                        self._index_add(alert['id'], alert)
         except Exception as e:
             print(f"Alarm yükleme hatası: {e}")
     
+    # ========== EŞİK İNDEKSİ ==========
+    
+    def _index_for(self, condition):
+        return self._above if condition == 'above' else self._below
+    
+    def _index_add(self, alert_id, alert):
+        """Alarmı sembolünün sıralı eşik listesine ekle"""
+        index = self._index_for(alert['condition'])
+        bisect.insort(index.setdefault(alert['symbol'], []), (float(alert['target_price']), alert_id))
+    
+    def _index_remove(self, alert_id, alert):
+        """Alarmı eşik listesinden çıkar (boşalan sembolü sil)"""
+        index = self._index_for(alert['condition'])
+        entries = index.get(alert['symbol'])
+        if not entries:
+            return
+        
+        key = (float(alert['target_price']), alert_id)
+        pos = bisect.bisect_left(entries, key)
+        if pos < len(entries) and entries[pos] == key:
+            del entries[pos]
+        if not entries:
+            del index[alert['symbol']]
+    
+    def _pop_crossed(self, symbol, price):
+        """
+        Fiyatın geçtiği eşikleri listelerden çıkar
+        
+        Returns:
+            list: [(alert_id, condition), ...]
+        """
+        crossed = []
+        
+        # 'above': hedef <= fiyat olanlar listenin başında
+        entries = self._above.get(symbol)
+        if entries:
+            cut = bisect.bisect_right(entries, (price, float('inf')))
+            if cut:
+                crossed.extend((alert_id, 'above') for _, alert_id in entries[:cut])
+                del entries[:cut]
+                if not entries:
+                    del self._above[symbol]
+        
+        # 'below': hedef >= fiyat olanlar listenin sonunda
+        entries = self._below.get(symbol)
+        if entries:
+            cut = bisect.bisect_left(entries, (price, float('-inf')))
+            if cut < len(entries):
+                crossed.extend((alert_id, 'below') for _, alert_id in entries[cut:])
+                del entries[cut:]
+                if not entries:
+                    del self._below[symbol]
+        
+        return crossed
+    
+    def watched_symbols(self) -> List[str]:
+        """Aktif alarmı olan semboller (tekrarsız)"""
+        with self._lock:
+            return list(self._above.keys() | self._below.keys())
+    
     def create_alert(self, symbol: str, target_price: float, 
                     condition: str, note: str = "") -> Optional[int]:
         """
@@ -65,7 +135,9 @@ class PriceAlertManager:
             
             if alert_id:
                 alert_data['id'] = alert_id
-                self.active_alerts[alert_id] = alert_data
+                with self._lock:
+                    self.active_alerts[alert_id] = alert_data
+                    self._index_add(alert_id, alert_data)
                 
                 #print(f"✓ Alarm oluşturuldu: {symbol} - {condition} {target_price}")
                 
@@ -81,8 +153,10 @@ class PriceAlertManager:
             # DB'den sil
             if self.db.delete_price_alert(alert_id):
                 # Aktif listeden kaldır
-                if alert_id in self.active_alerts:
-                    del self.active_alerts[alert_id]
+                with self._lock:
+                    alert = self.active_alerts.pop(alert_id, None)
+                    if alert:
+                        self._index_remove(alert_id, alert)
                 return True
         except Exception as e:
             print(f"Alarm silme hatası: {e}")
@@ -94,9 +168,16 @@ class PriceAlertManager:
         try:
             # DB'de güncelle
             if self.db.update_price_alert(alert_id, **kwargs):
-                # Aktif listede güncelle
-                if alert_id in self.active_alerts:
-                    self.active_alerts[alert_id].update(kwargs)
+                # Aktif listede güncelle (eşik/koşul değiştiyse indeksi yenile)
+                with self._lock:
+                    alert = self.active_alerts.get(alert_id)
+                    if alert:
+                        self._index_remove(alert_id, alert)
+                        alert.update(kwargs)
+                        if alert.get('active', True):
+                            self._index_add(alert_id, alert)
+                        else:
+                            del self.active_alerts[alert_id]
                 return True
         except Exception as e:
             print(f"Alarm güncelleme hatası: {e}")
@@ -115,12 +196,11 @@ class PriceAlertManager:
             if self.update_alert(alert_id, active=new_state):
                 if new_state:
                     # Tekrar aktif et
-                    self.active_alerts[alert_id] = alert
-                    self.active_alerts[alert_id]['active'] = True
-                else:
-                    # Pasif yap
-                    if alert_id in self.active_alerts:
-                        del self.active_alerts[alert_id]
+                    with self._lock:
+                        alert['active'] = True
+                        if alert_id not in self.active_alerts:
+                            self.active_alerts[alert_id] = alert
+                            self._index_add(alert_id, alert)
                 
                 return True
         except Exception as e:
@@ -144,61 +224,59 @@ class PriceAlertManager:
         """
         Alarmları kontrol et
         
+        Sadece fiyatı gelen sembollerin sıralı eşik listelerinde, fiyatın
+        geçtiği eşikler bisect ile bulunur; tetiklenen alarmlar DB'de tek
+        transaction ile işaretlenir.
+        
         Args:
             price_data: {symbol: current_price} dictionary
+        
+        Returns:
+            list: Tetiklenen alarmlar
         """
         triggered_alerts = []
+        now = datetime.now()
+        
+        with self._lock:
+            for symbol, current_price in price_data.items():
+                if current_price is None:
+                    continue
+                
+                for alert_id, condition in self._pop_crossed(symbol, current_price):
+                    alert = self.active_alerts.pop(alert_id)
+                    alert.update(active=False, triggered=True, triggered_at=now, triggered_price=current_price)
+                    triggered_alerts.append(alert)
         
-        for alert_id, alert in list(self.active_alerts.items()):
+        if not triggered_alerts:
+            return triggered_alerts
+        
+        self.db.mark_price_alerts_triggered(
+            [(alert['id'], alert['triggered_price'], now) for alert in triggered_alerts]
+        )
+        
+        for alert in triggered_alerts:
             symbol = alert['symbol']
-            current_price = price_data.get(symbol)
-            
-            if current_price is None:
-                continue
-            
             target = alert['target_price']
-            condition = alert['condition']
-            
-            # Tetikleme kontrolü
-            triggered = False
+            current_price = alert['triggered_price']
             
-            if condition == 'above' and current_price >= target:
-                triggered = True
+            if alert['condition'] == 'above':
                 message = f"{symbol} hedef fiyata ulaştı!\n\n" \
                          f"Hedef: {target:.2f} ₺\n" \
                          f"Güncel: {current_price:.2f} ₺"
                 icon = "success"
-            
-            elif condition == 'below' and current_price <= target:
-                triggered = True
+            else:
                 message = f"{symbol} hedef fiyata düştü!\n\n" \
                          f"Hedef: {target:.2f} ₺\n" \
                          f"Güncel: {current_price:.2f} ₺"
                 icon = "warning"
             
-            if triggered:
-                # Bildirimi gönder
-                self.notifier.send(
-                    title=f"🎯 Fiyat Alarmı: {symbol}",
-                    message=message,
-                    icon=icon,
-                    sound=True
-                )
-                
-                # Alarmı tetiklenmiş olarak işaretle
-                self.update_alert(
-                    alert_id,
-                    triggered=True,
-                    triggered_at=datetime.now(),
-                    active=False  # Otomatik devre dışı bırak
-                )
-                
-                # Aktif listeden kaldır
-                del self.active_alerts[alert_id]
-                
-                triggered_alerts.append(alert)
-                
-                #print(f"⚡ Alarm tetiklendi: {symbol} @ {current_price:.2f}")
+            # Bildirimi gönder
+            self.notifier.send(
+                title=f"🎯 Fiyat Alarmı: {symbol}",
+                message=message,
+                icon=icon,
+                sound=True
+            )
         
         return triggered_alerts
     
@@ -224,8 +302,38 @@ class PriceAlertManager:
         
         #print(f"✓ Alarm izleme başlatıldı (interval: {interval}s)")
     
+    def attach_to_bus(self, quote_bus, interval=30, schedule=None):
+        """
+        Alarmları ortak fiyat veri yoluna bağla (kendi izleme döngüsü yerine)
+        
+        Alarm sembolleri veri yoluna kaynak olarak kaydedilir; portföy ile ortak
+        semboller aynı turda tek kez çekilir ve her turun fiyatları kontrol edilir.
+        
+        Args:
+            quote_bus: utils.quote_bus.QuoteBus
+            interval: Alarm sembollerinin çekilme sıklığı (saniye)
+            schedule: Seans planı (utils.market_calendar.RefreshSchedule); verilirse
+                seans dışında alarm sembolleri çekilmez
+        """
+        self.detach_from_bus()
+        quote_bus.add_source('alerts', self.watched_symbols, interval, schedule=schedule)
+        unsubscribe = quote_bus.subscribe(lambda snapshot: self.check_alerts(snapshot.prices))
+        
+        def detach():
+            unsubscribe()
+            quote_bus.remove_source('alerts')
+        
+        self._bus_unsubscribe = detach
+    
+    def detach_from_bus(self):
+        """Veri yolu bağlantısını kaldır"""
+        if self._bus_unsubscribe:
+            self._bus_unsubscribe()
+            self._bus_unsubscribe = None
+    
     def stop_monitoring(self):
         """Alarm izlemeyi durdur"""
+        self.detach_from_bus()
         self.monitoring_active = False
         if self.monitoring_thread:
             self.monitoring_thread.join(timeout=2)
@@ -235,13 +343,13 @@ class PriceAlertManager:
         """İzleme döngüsü (arka planda çalışır)"""
         while self.monitoring_active:
             try:
-                if not self.active_alerts:
+                symbols = self.watched_symbols()
+                if not symbols:
                     # Aktif alarm yoksa bekle
                     time.sleep(interval)
                     continue
                 
                 # Fiyatları al
-                symbols = [alert['symbol'] for alert in self.active_alerts.values()]
                 price_data = price_provider.get_current_prices(symbols)
                 
                 # Alarmları kontrol et
@@ -0,0 +1,249 @@
+# utils/quote_bus.py
+"""
+Ortak fiyat zamanlayıcısı ve yayın/abone (publish/subscribe) veri yolu
+
+Portföy otomatik güncellemesi ve fiyat alarmları ayrı döngülerde aynı
+sembolleri ayrı ayrı çekmek yerine kaynak olarak veri yoluna kaydolur.
+Her turda vakti gelen kaynakların sembolleri birleştirilir, tek bir
+fiyat çekimi yapılır ve sonuç tüm abonelere dağıtılır; ortak semboller
+tur başına tam bir kez çekilir. Fiyatı başka sağlayıcılardan gelen kaynaklar
+(kripto/fon/emtia varlıkları) sembol katmak yerine aynı turda kendi
+yenileme fonksiyonlarıyla çalışır.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+
+# Kaynak aralığı belirtilmezse kullanılacak süre (sn)
+DEFAULT_INTERVAL = 300
+# Zamanlayıcının en kısa uyuma süresi (sn) - aralık ayarı küçük girilse bile
+MIN_INTERVAL = 5
+# Vakti bu kadar saniye içinde gelecek kaynaklar da aynı tura katılır (çekimleri birleştirir)
+COALESCE_WINDOW = 1.0
+# En uzun tek bekleme (sn); uyku/askıdan dönüşte planın gecikmeden yeniden değerlendirilmesi için
+MAX_WAIT = 300
+
+
+class QuoteSnapshot:
+    """
+    Tek bir turda çekilen fiyatlar
+
+    Attributes:
+        prices: {sembol: fiyat} (fiyatı alınamayan semboller yer almaz)
+        symbols: Bu turda istenen semboller
+        sources: Bu turda vakti gelen kaynak adları
+        fetched_at: Çekim zamanı
+    """
+
+    def __init__(self, prices, symbols, sources, fetched_at=None):
+        self.prices = prices
+        self.symbols = symbols
+        self.sources = sources
+        self.fetched_at = fetched_at or datetime.now()
+
+    def __repr__(self):
+        return f"QuoteSnapshot({len(self.prices)}/{len(self.symbols)} fiyat, kaynaklar={self.sources})"
+
+
+class _Source:
+    def __init__(self, name, symbols, interval, enabled, schedule, refresh):
+        self.name = name
+        self.symbols = symbols
+        self.interval = interval
+        self.enabled = enabled
+        self.schedule = schedule
+        self.refresh = refresh
+        self.next_due = 0.0
+
+
+class QuoteBus:
+    def __init__(self, fetch):
+        """
+        Args:
+            fetch: (sembol listesi) -> {sembol: fiyat}; örn. APIService.get_price_snapshot
+        """
+        self.fetch = fetch
+
+        self._sources = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+
+        self.last_snapshot = None
+
+    # ========== KAYNAK VE ABONELİK ==========
+
+    def add_source(self, name, symbols, interval=DEFAULT_INTERVAL, enabled=None, schedule=None, refresh=None):
+        """
+        Sembol kaynağı kaydet (aynı adla tekrar kaydetmek eskisinin yerine geçer)
+
+        Args:
+            name: Kaynak adı ('portfolio', 'alerts', ...)
+            symbols: () -> sembol listesi; her turda çağrılır (refresh verilirse None)
+            interval: Saniye veya () -> saniye (ayar değişikliklerini izlemek için)
+            enabled: () -> bool; False dönerse kaynak bu tur atlanır
+            schedule: next_run(now, interval) -> datetime sağlayan plan
+                (örn. utils.market_calendar.RefreshSchedule); verilmezse sabit aralık
+            refresh: () -> None; verilirse kaynak ortak çekime sembol katmaz, vakti
+                geldiği turda bu fonksiyon çağrılır (BIST dışı sağlayıcılar için)
+        """
+        source = _Source(name, symbols, interval, enabled, schedule, refresh)
+        if self._running:
+            # Çalışırken eklenen kaynak da kendi planına göre çekilir
+            source.next_due = self._next_due(source, time.time())
+
+        with self._lock:
+            self._sources[name] = source
+        self._wake.set()
+
+    def remove_source(self, name):
+        with self._lock:
+            self._sources.pop(name, None)
+
+    def subscribe(self, callback):
+        """
+        Fiyat turlarına abone ol
+
+        Args:
+            callback: (QuoteSnapshot) -> None; zamanlayıcı thread'inde çağrılır
+
+        Returns:
+            callable: Aboneliği iptal eden fonksiyon
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._listeners:
+                    self._listeners.remove(callback)
+
+        return unsubscribe
+
+    def publish(self, snapshot):
+        """Fiyatları tüm abonelere dağıt"""
+        self.last_snapshot = snapshot
+        with self._lock:
+            listeners = list(self._listeners)
+
+        for callback in listeners:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"❌ Fiyat abonesi hatası: {e}")
+
+    # ========== ZAMANLAYICI ==========
+
+    def _interval_of(self, source):
+        interval = source.interval() if callable(source.interval) else source.interval
+        if not isinstance(interval, (int, float)) or interval <= 0:
+            interval = DEFAULT_INTERVAL
+        return max(MIN_INTERVAL, interval)
+
+    def _next_due(self, source, now):
+        """Kaynağın bir sonraki çekim zamanı (time.time() cinsinden)"""
+        interval = self._interval_of(source)
+        if source.schedule is None:
+            return now + interval
+        next_run = source.schedule.next_run(datetime.fromtimestamp(now), interval)
+        return max(now + MIN_INTERVAL, next_run.timestamp())
+
+    def tick(self, force=False, extra_symbols=()):
+        """
+        Vakti gelen kaynakların sembollerini birleştirip tek seferde çek ve yayınla
+
+        Args:
+            force: True ise aralıklar beklenmeden tüm etkin kaynaklar çekilir
+            extra_symbols: Kaynaklardan bağımsız olarak bu tura eklenecek semboller
+                (elle yenileme için; seans kapısına takılmaz)
+
+        Returns:
+            QuoteSnapshot veya None (çekilecek sembol yoksa)
+        """
+        now = time.time()
+        with self._lock:
+            sources = list(self._sources.values())
+
+        due = []
+        refreshes = []
+        symbols = dict.fromkeys(s.upper() for s in extra_symbols if s)
+        for source in sources:
+            if not force and source.next_due > now + COALESCE_WINDOW:
+                continue
+            source.next_due = self._next_due(source, now)
+
+            try:
+                if source.enabled and not source.enabled():
+                    continue
+                if source.refresh is not None:
+                    refreshes.append(source)
+                else:
+                    # dict: sırayı koruyarak tekrarları ele
+                    symbols.update(dict.fromkeys(s.upper() for s in source.symbols() if s))
+            except Exception as e:
+                print(f"❌ Fiyat kaynağı hatası ({source.name}): {e}")
+                continue
+            due.append(source.name)
+
+        for source in refreshes:
+            try:
+                source.refresh()
+            except Exception as e:
+                print(f"❌ Fiyat kaynağı hatası ({source.name}): {e}")
+
+        if not symbols:
+            return None
+
+        symbol_list = list(symbols)
+        prices = self.fetch(symbol_list) or {}
+        snapshot = QuoteSnapshot(prices, symbol_list, due)
+        self.publish(snapshot)
+        return snapshot
+
+    def _seconds_until_due(self):
+        with self._lock:
+            dues = [source.next_due for source in self._sources.values()]
+        if not dues:
+            return MAX_WAIT
+        return min(MAX_WAIT, max(0.0, min(dues) - time.time()))
+
+    def _run(self):
+        while self._running:
+            self._wake.clear()
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"❌ Fiyat zamanlayıcı hatası: {e}")
+            self._wake.wait(self._seconds_until_due())
+
+    def start(self, initial_delay=True):
+        """
+        Zamanlayıcıyı başlat
+
+        Args:
+            initial_delay: True ise ilk çekim her kaynağın kendi planına göre yapılır
+        """
+        if self._running:
+            return
+
+        if initial_delay:
+            now = time.time()
+            with self._lock:
+                for source in self._sources.values():
+                    source.next_due = self._next_due(source, now)
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="quote-bus")
+        self._thread.start()
+
+    def stop(self):
+        """Zamanlayıcıyı durdur"""
+        self._running = False
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
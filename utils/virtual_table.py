@@ -0,0 +1,254 @@
+# utils/virtual_table.py
+"""
+Sanal (virtualized) tablo ve bellek içi sütun deposu
+
+Binlerce satırlık listelerde her satır için widget üretmek yerine sadece
+görünen satırlar kadar satır widget'ı oluşturulur; kaydırıldıkça aynı
+widget'lar yeni kayıtlarla doldurulur. Filtreleme ve sıralama, sayfa
+yüklenirken bir kez hesaplanan sütunlar üzerinde satır indeksleriyle yapılır.
+"""
+
+import math
+import tkinter as tk
+import customtkinter as ctk
+
+
+# Tekerlek olayları (Windows/macOS: MouseWheel, X11: Button-4/5)
+MOUSEWHEEL_EVENTS = ("<MouseWheel>", "<Button-4>", "<Button-5>")
+
+
+class ColumnStore:
+    """
+    Kayıtları sütun listeleri olarak tutan bellek içi depo
+
+    Filtre ve sıralama sonucu, kayıtların kopyası değil indeks listesidir
+    (self.view); veri değişmediği sürece veritabanına tekrar gidilmez.
+    """
+
+    def __init__(self, records=None, columns=None):
+        self.set_records(records or [], columns or {})
+
+    def set_records(self, records, columns):
+        """
+        Kayıtları yükle ve sütunları bir kez hesapla
+
+        Args:
+            records: Satır sözlükleri (satır aksiyonlarına olduğu gibi verilir)
+            columns: {sütun adı: kayıt -> değer} hesaplama fonksiyonları
+        """
+        self.records = list(records)
+        self.columns = {
+            name: [compute(record) for record in self.records]
+            for name, compute in columns.items()
+        }
+        self.view = list(range(len(self.records)))
+
+    def query(self, filters=None, sort_by=None, reverse=False):
+        """
+        Filtrele ve sırala
+
+        Args:
+            filters: {sütun adı: değer -> bool} koşulları (hepsi sağlanmalı)
+            sort_by: Sıralama sütunu (None ise kayıt sırası korunur)
+            reverse: Azalan sıralama
+
+        Returns:
+            list: Görünen kayıtlar (sıralı)
+        """
+        view = range(len(self.records))
+        for name, predicate in (filters or {}).items():
+            column = self.columns[name]
+            view = [i for i in view if predicate(column[i])]
+
+        if sort_by is not None:
+            view = sorted(view, key=self.columns[sort_by].__getitem__, reverse=reverse)
+
+        self.view = list(view)
+        return [self.records[i] for i in self.view]
+
+    def __len__(self):
+        return len(self.records)
+
+
+class VirtualTable(ctk.CTkFrame):
+    """
+    Sadece görünen satırları oluşturan, kaydırmada satır widget'larını yeniden kullanan tablo
+
+    Satır içeriği sayfaya aittir: build_row bir satır çerçevesine widget'ları
+    bir kez yerleştirir, fill_row ise o widget'ları verilen kayıtla günceller.
+    Butonlar kaydı satır sözlüğündeki 'kayit' anahtarından okumalıdır, çünkü
+    aynı satır widget'ı farklı kayıtlar için tekrar kullanılır.
+    """
+
+    def __init__(self, master, headers, weights, build_row, fill_row,
+                 row_height=44, empty_text="Kayıt yok", **kwargs):
+        """
+        Args:
+            master: Üst widget
+            headers: Sütun başlıkları
+            weights: Sütun genişlik ağırlıkları
+            build_row: (satır çerçevesi) -> widget sözlüğü
+            fill_row: (widget sözlüğü, kayıt) -> None
+            row_height: Sabit satır yüksekliği (px)
+            empty_text: Kayıt yokken gösterilecek metin
+        """
+        kwargs.setdefault("fg_color", "transparent")
+        super().__init__(master, **kwargs)
+
+        self.headers = headers
+        self.weights = weights
+        self.build_row = build_row
+        self.fill_row = fill_row
+        self.row_height = row_height
+
+        self.rows = []
+        self.offset = 0
+        self._pool = []
+
+        self._create_header()
+
+        content = ctk.CTkFrame(self, fg_color="transparent")
+        content.pack(fill="both", expand=True)
+
+        self.scrollbar = ctk.CTkScrollbar(content, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.body = ctk.CTkFrame(content, fg_color="transparent")
+        self.body.pack(side="left", fill="both", expand=True)
+        self.body.bind("<Configure>", lambda e: self._render())
+
+        self.empty_label = ctk.CTkLabel(self.body, text=empty_text, text_color="gray")
+        self._bind_mousewheel(self.body)
+
+    def _create_header(self):
+        header = ctk.CTkFrame(self, fg_color=("gray75", "gray25"), corner_radius=8, height=40)
+        header.pack(fill="x", pady=(0, 5), padx=(0, 16))
+
+        for i, (text, weight) in enumerate(zip(self.headers, self.weights)):
+            header.grid_columnconfigure(i, weight=weight, uniform="col")
+            ctk.CTkLabel(header, text=text, font=ctk.CTkFont(size=12, weight="bold")).grid(
+                row=0, column=i, sticky="nsew", padx=5, pady=6
+            )
+
+    # ========== VERİ ==========
+
+    def set_rows(self, rows, keep_position=False):
+        """
+        Gösterilecek kayıtları ayarla
+
+        Args:
+            rows: Kayıt listesi (görünen sırayla)
+            keep_position: Kaydırma konumunu koru (satır güncellemelerinde)
+        """
+        self.rows = rows
+        if not keep_position:
+            self.offset = 0
+
+        for row in self._pool:
+            row["index"] = None
+
+        if rows:
+            self.empty_label.place_forget()
+        else:
+            self.empty_label.place(relx=0.5, y=50, anchor="n")
+
+        self._render()
+
+    # ========== ÇİZİM ==========
+
+    def _max_offset(self):
+        return max(0, len(self.rows) * self.row_height - self.body.winfo_height())
+
+    def _ensure_pool(self, count):
+        """Görünür alanı dolduracak kadar satır widget'ı oluştur"""
+        while len(self._pool) < count:
+            frame = ctk.CTkFrame(self.body, fg_color="transparent", height=self.row_height)
+            frame.grid_propagate(False)
+            frame.grid_rowconfigure(0, weight=1)
+            for i, weight in enumerate(self.weights):
+                frame.grid_columnconfigure(i, weight=weight, uniform="col")
+
+            widgets = self.build_row(frame)
+            self._bind_mousewheel(frame)
+            widgets["frame"] = frame
+            widgets["index"] = None
+            widgets["kayit"] = None
+            widgets["gorunur"] = False
+            self._pool.append(widgets)
+
+    def _render(self):
+        """Görünen aralığı havuzdaki satır widget'larına bağla"""
+        height = self.body.winfo_height()
+        if height <= 1:
+            return
+
+        self.offset = min(max(self.offset, 0), self._max_offset())
+        self._ensure_pool(math.ceil(height / self.row_height) + 1)
+
+        first = self.offset // self.row_height
+        shift = self.offset - first * self.row_height
+
+        for slot, widgets in enumerate(self._pool):
+            index = first + slot
+            y = slot * self.row_height - shift
+            if index >= len(self.rows) or y >= height:
+                if widgets["gorunur"]:
+                    widgets["frame"].place_forget()
+                    widgets["gorunur"] = False
+                widgets["index"] = None
+                continue
+
+            if widgets["index"] != index:
+                widgets["kayit"] = self.rows[index]
+                self.fill_row(widgets, widgets["kayit"])
+                widgets["index"] = index
+            widgets["frame"].place(x=0, y=y, relwidth=1)
+            widgets["gorunur"] = True
+
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self.rows) * self.row_height
+        if total <= 0:
+            self.scrollbar.set(0, 1)
+            return
+        visible = self.body.winfo_height()
+        self.scrollbar.set(self.offset / total, min(1.0, (self.offset + visible) / total))
+
+    # ========== KAYDIRMA ==========
+
+    def scroll_to(self, offset):
+        """Verilen piksel konumuna kaydır"""
+        self.offset = int(offset)
+        self._render()
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self.scroll_to(float(args[0]) * len(self.rows) * self.row_height)
+        elif action == "scroll":
+            step = self.body.winfo_height() if args[1] == "pages" else self.row_height
+            self.scroll_to(self.offset + int(args[0]) * step)
+
+    def _on_mousewheel(self, event):
+        if getattr(event, "num", None) == 4:
+            units = -1
+        elif getattr(event, "num", None) == 5:
+            units = 1
+        else:
+            units = -int(event.delta / 120) if abs(event.delta) >= 120 else (-1 if event.delta > 0 else 1)
+        self.scroll_to(self.offset + units * self.row_height * 3)
+        # Üstteki CTkScrollableFrame'in bind_all işleyicisi de kaydırmasın
+        return "break"
+
+    def _bind_mousewheel(self, widget):
+        """
+        Tekerleği widget'a ve tüm alt widget'larına bağla
+
+        bind_all kullanılmaz: CTkScrollableFrame'lerin uygulama genelindeki
+        tekerlek işleyicilerinin yerine geçer. CTk widget'larının bind'i iç
+        canvas'a yönlendirdiği için tkinter seviyesinde bağlanır.
+        """
+        for sequence in MOUSEWHEEL_EVENTS:
+            tk.Misc.bind(widget, sequence, self._on_mousewheel, add="+")
+        for child in widget.winfo_children():
+            self._bind_mousewheel(child)